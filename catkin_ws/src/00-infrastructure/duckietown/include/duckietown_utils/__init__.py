@@ -38,6 +38,7 @@ from .matplotlib_utils import *
 from .memoization import *
 from .mkdirs import *
 from .networking import *
+from .parallel import *
 from .parameters import *
 from .path_utils import *
 from .paths import *
@@ -1,15 +1,16 @@
-import os
+from collections import OrderedDict
 import re
 import subprocess
 
 import rosbag
 
-from .caching import get_cached
+from .caching import get_cached, get_cache_name_for_file
 from .logging_logger import logger
 from .yaml_pretty import yaml_load_plain
 
 __all__ = [
     'rosbag_info',
+    'rosbag_info_native',
     'rosbag_info_cached',
     'd8n_get_all_images_topic_bag',
     'd8n_get_all_images_topic',
@@ -21,10 +22,9 @@ __all__ = [
 def rosbag_info_cached(filename):
 
     def f():
-        return rosbag_info(filename)
+        return rosbag_info_native(filename)
 
-    basename = os.path.basename(filename)
-    cache_name = 'rosbag_info/' + basename
+    cache_name = get_cache_name_for_file('rosbag_info', filename)
     return get_cached(cache_name, f, quiet=True)
 
 
@@ -41,6 +41,78 @@ def rosbag_info(bag):
     return info_dict
 
 
+def rosbag_info_native(filename):
+    """
+        Returns the same dictionary as rosbag_info(), without
+        starting the "rosbag info" process.
+
+        Only the index of the bag (connection, chunk info and index
+        records) is read, not the messages.
+
+        Returns None if the bag cannot be read (as rosbag_info()).
+    """
+    logger.debug('rosbag_info_native %s' % filename)
+    try:
+        bag = rosbag.Bag(filename)
+    except (rosbag.ROSBagException, IOError) as e:
+        logger.error('Cannot read bag %s: %s' % (filename, e))
+        return None
+
+    try:
+        return _info_from_bag(bag)
+    finally:
+        bag.close()
+
+
+def _info_from_bag(bag):
+    info = OrderedDict()
+    info['path'] = bag.filename
+    info['version'] = float('%d.%d' % (bag.version / 100, bag.version % 100))
+
+    tat = bag.get_type_and_topic_info()
+    num_messages = bag.get_message_count()
+    if num_messages > 0:
+        start = bag.get_start_time()
+        end = bag.get_end_time()
+        info['duration'] = round(end - start, 6)
+        info['start'] = round(start, 6)
+        info['end'] = round(end, 6)
+    else:
+        info['duration'] = None
+        info['start'] = None
+        info['end'] = None
+
+    info['size'] = bag.size
+    info['messages'] = num_messages
+    info['indexed'] = True
+
+    compression = bag.get_compression_info()
+    info['compression'] = compression.compression
+    if compression.compression != rosbag.Compression.NONE:
+        info['uncompressed'] = compression.uncompressed
+        info['compressed'] = compression.compressed
+
+    info['types'] = []
+    for msg_type in sorted(tat.msg_types):
+        info['types'].append(OrderedDict([('type', msg_type),
+                                          ('md5', tat.msg_types[msg_type])]))
+
+    info['topics'] = []
+    for topic in sorted(tat.topics):
+        t = tat.topics[topic]
+        d = OrderedDict()
+        d['topic'] = topic
+        d['type'] = t.msg_type
+        d['messages'] = t.message_count
+        if t.connections > 1:
+            d['connections'] = t.connections
+        if t.frequency is not None:
+            d['frequency'] = round(t.frequency, 4)
+        info['topics'].append(d)
+
+    return info
+
+
 def which_robot(bag):
     pattern = r'/(\w+)/camera_node/image/compressed'
 
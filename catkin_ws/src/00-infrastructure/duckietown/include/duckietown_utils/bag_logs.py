@@ -6,13 +6,15 @@ import rosbag
 from .bag_info import get_image_topic
 from .bag_reading import BagReadProxy
 from .expand_variables import expand_environment
-from .image_conversions import rgb_from_ros
+from .image_conversions import rgb_from_ros, bgr_from_ros
 from .logging_logger import logger
+from .parallel import imap_in_threads
 
 __all__ = [
     'd8n_read_images_interval',
     'd8n_read_all_images',
     'd8n_read_all_images_from_bag',
+    'd8n_iterate_images_from_bag',
 ]
 
 
@@ -124,3 +126,46 @@ def d8n_read_all_images_from_bag(bag, topic0, max_images=None, use_relative_time
         x[i]['rgb'][:] = v['rgb']
 
     return x
+
+
+def d8n_iterate_images_from_bag(bag, topic0, max_images=None, use_relative_time=False,
+                                nthreads=2, prefetch=None):
+    """
+        Yields the tuples (timestamp, bgr) for the images in the topic.
+
+        Unlike d8n_read_all_images_from_bag(), the images are read and
+        decoded lazily, so the memory used does not depend on the length
+        of the log, and the first image is available right away.
+
+        max_images and use_relative_time are as in d8n_read_all_images_from_bag().
+
+        The images are decoded by a pool of nthreads threads, which decode
+        up to `prefetch` images (default: 2 * nthreads) ahead of the consumer.
+        With nthreads = 1 they are decoded in the caller's thread.
+    """
+    def selected():
+        if max_images is None:
+            interval = 1
+        else:
+            nfound = bag.get_message_count(topic_filters=topic0)
+            interval = int(np.ceil(nfound / max_images))
+            if interval == 0:
+                interval = 1
+        n = 0
+        for j, (_, msg, t) in enumerate(bag.read_messages(topics=[topic0])):
+            if j % interval != 0:
+                continue
+            float_time = t.to_sec()
+            if use_relative_time:
+                float_time = float_time - bag.get_start_time()
+            yield float_time, msg
+            n += 1
+            # stop if we have enough images
+            if max_images is not None and n >= max_images:
+                break
+
+    def decode(x):
+        float_time, msg = x
+        return float_time, bgr_from_ros(msg)
+
+    return imap_in_threads(decode, selected(), nthreads=nthreads, prefetch=prefetch)
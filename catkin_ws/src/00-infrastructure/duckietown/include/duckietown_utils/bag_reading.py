@@ -1,4 +1,5 @@
 from collections import namedtuple
+import heapq
 import time
 
 import numpy as np
@@ -10,6 +11,7 @@ from .logging_logger import logger
 __all__ = [
     'd8n_bag_read_with_progress',
     'BagReadProxy',
+    'MultiBag',
 ]
 
 MessagePlus = namedtuple('MessagePlus', 'topic msg time_absolute time_from_physical_log_start time_window')
@@ -17,15 +19,95 @@ MessagePlus = namedtuple('MessagePlus', 'topic msg time_absolute time_from_physi
 debug_skip = False
 
 
+class MultiBag(object):
+    """
+        Several bags (for example, split recordings, or the camera and
+        the other topics recorded in separate files) seen as one.
+
+        read_messages() merges the messages of the bags in time order,
+        reading them lazily; the other methods combine the information
+        of the bags. It can be used as the bag of a BagReadProxy.
+    """
+
+    def __init__(self, bags):
+        """ bags: a list of rosbag.Bag or of filenames """
+        if not bags:
+            msg = 'Expected at least one bag.'
+            raise ValueError(msg)
+        self.bags = []
+        for bag in bags:
+            if not isinstance(bag, rosbag.Bag):
+                bag = rosbag.Bag(bag)
+            self.bags.append(bag)
+
+    def _get_nonempty_bags(self):
+        """ The bags with at least one message (rosbag cannot tell the times of the others). """
+        bags = [_ for _ in self.bags if _.get_message_count() > 0]
+        if not bags:
+            msg = 'All the %d bags are empty:' % len(self.bags)
+            for bag in self.bags:
+                msg += '\n- %s' % bag.filename
+            raise ValueError(msg)
+        return bags
+
+    def get_start_time(self):
+        """ The start of the first message; the empty bags are ignored. """
+        return min(_.get_start_time() for _ in self._get_nonempty_bags())
+
+    def get_end_time(self):
+        """ The end of the last message; the empty bags are ignored. """
+        return max(_.get_end_time() for _ in self._get_nonempty_bags())
+
+    def get_message_count(self, topic_filters=None):
+        return sum(_.get_message_count(topic_filters) for _ in self.bags)
+
+    def get_type_and_topic_info(self, *args, **kwargs):
+        """ Same as for rosbag.Bag; the counts of the topics in more bags are added. """
+        infos = [_.get_type_and_topic_info(*args, **kwargs) for _ in self.bags]
+        msg_types = {}
+        topics = {}
+        for info in infos:
+            msg_types.update(info.msg_types)
+            for topic, topic_info in info.topics.items():
+                if topic in topics:
+                    previous = topics[topic]
+                    topic_info = previous._replace(
+                        message_count=previous.message_count + topic_info.message_count,
+                        connections=previous.connections + topic_info.connections,
+                        frequency=None)
+                topics[topic] = topic_info
+        return infos[0]._replace(msg_types=msg_types, topics=topics)
+
+    def read_messages(self, *args, **kwargs):
+        """
+            Same arguments as rosbag.Bag.read_messages().
+
+            Messages with the same time are returned in the order of the bags.
+        """
+        def decorated(i, bag):
+            for n, m in enumerate(bag.read_messages(*args, **kwargs)):
+                yield m[2], i, n, m
+
+        sequences = [decorated(i, bag) for i, bag in enumerate(self.bags)]
+        for _, _, _, m in heapq.merge(*sequences):
+            yield m
+
+    def close(self):
+        for bag in self.bags:
+            bag.close()
+
+
 class BagReadProxy(object):
 
     def __init__(self, bag, t0, t1, bag_absolute_t0_ref=None):
         """
+            bag: a rosbag.Bag or a MultiBag
+
             t0, t1 are relative times to the bag start
 
             They can be None, in which case they are unbounded.
         """
-        if not isinstance(bag, rosbag.Bag):
+        if not isinstance(bag, (rosbag.Bag, MultiBag)):
             raise NotImplementedError(type(bag).__name__)
         bag_absolute_t0 = bag.get_start_time()
         bag_absolute_t1 = bag.get_end_time()
@@ -70,7 +152,7 @@ class BagReadProxy(object):
         return n1
 
     def read_messages_plus(self, *args, **kwargs):
-        if isinstance(self.bag, rosbag.Bag):
+        if isinstance(self.bag, (rosbag.Bag, MultiBag)):
             import rospy
             start_time = rospy.Time.from_sec(self.read_from_absolute)
             end_time = rospy.Time.from_sec(self.read_to_absolute)
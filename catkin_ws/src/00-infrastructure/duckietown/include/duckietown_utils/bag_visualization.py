@@ -44,6 +44,39 @@ def count_messages_in_slice(bag_filename, topic, t0, t1, stop_at=None):
     return actual_count, count, stopped_early
 
 
+def count_messages_in_slice_by_topic(bag_filename, topics, t0, t1, stop_at=None):
+    """
+        Same as count_messages_in_slice() for several topics,
+        with only one pass over the bag.
+
+        Returns a dict topic -> (count, total, stopped_early).
+    """
+    bag0 = rosbag.Bag(bag_filename)
+    total = dict((topic, bag0.get_message_count(topic_filters=[topic])) for topic in topics)
+
+    if t0 is None and t1 is None:
+        res = dict((topic, (total[topic], total[topic], False)) for topic in topics)
+    else:
+        bag = BagReadProxy(bag0, t0, t1)
+        actual_count = dict((topic, 0) for topic in topics)
+        missing = set(topics)
+        if missing:
+            for topic, _, _ in bag.read_messages(topics=topics):
+                if not topic in missing:
+                    continue
+                actual_count[topic] += 1
+                if stop_at is not None and actual_count[topic] >= stop_at:
+                    missing.remove(topic)
+                    if not missing:
+                        break
+        res = dict((topic, (actual_count[topic], total[topic], not topic in missing))
+                   for topic in topics)
+
+    bag0.close()
+
+    return res
+
+
 class NotEnoughFramesInSlice(Exception):
     pass
 
@@ -1,3 +1,4 @@
+import hashlib
 import os
 
 from .friendly_path_imp import friendly_path
@@ -7,6 +8,7 @@ from .safe_pickling import safe_pickle_load, safe_pickle_dump
 
 __all__ = [
     'get_cached',
+    'get_cache_name_for_file',
 ]
 
 
@@ -59,3 +61,19 @@ def get_cached(cache_name, f, quiet='not-given', just_delete=False):
 #
 #
     return ob
+
+
+def get_cache_name_for_file(prefix, filename):
+    """
+        Returns a cache name (for get_cached()) for a value computed from
+        the contents of filename.
+
+        The name depends on the real path, the size and the modification
+        time of the file, so that a different file with the same name
+        does not use the same cache.
+    """
+    realpath = os.path.realpath(filename)
+    st = os.stat(realpath)
+    key = '%s %d %r' % (realpath, st.st_size, st.st_mtime)
+    digest = hashlib.md5(key).hexdigest()
+    return '%s/%s-%s' % (prefix, os.path.basename(filename), digest)
@@ -1,4 +1,5 @@
 from abc import abstractmethod, ABCMeta
+import bisect
 from collections import OrderedDict
 import random
 import re
@@ -18,6 +19,100 @@ class InvalidQueryForUniverse(Exception):
     pass
 
 
+class FuzzyIndex(OrderedDict):
+    """
+        An OrderedDict that can be used as the universe for the specs,
+        and that keeps lookup tables from the values of an attribute
+        (or from the keys, for tagname = None) to the keys.
+
+        The tables are built the first time that an attribute is looked
+        up, and they are discarded if the dict is modified. The specs
+        use them for the exact and prefix matches instead of scanning
+        all the entries; the results are the same.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._tables = {}
+        self._positions = None
+        OrderedDict.__init__(self, *args, **kwargs)
+
+    def _invalidate(self):
+        self._tables = {}
+        self._positions = None
+
+    def __setitem__(self, key, value, *args, **kwargs):
+        self._invalidate()
+        OrderedDict.__setitem__(self, key, value, *args, **kwargs)
+
+    def __delitem__(self, key, *args, **kwargs):
+        self._invalidate()
+        OrderedDict.__delitem__(self, key, *args, **kwargs)
+
+    def pop(self, *args):
+        self._invalidate()
+        return OrderedDict.pop(self, *args)
+
+    def popitem(self, *args):
+        self._invalidate()
+        return OrderedDict.popitem(self, *args)
+
+    def clear(self):
+        self._invalidate()
+        OrderedDict.clear(self)
+
+    def _get_table(self, tagname):
+        """
+            Returns a tuple (value2keys, sorted_str_values), or None
+            if the values are not hashable.
+        """
+        if not tagname in self._tables:
+            value2keys = {}
+            try:
+                for k, v in self.items():
+                    value = k if tagname is None else _get_tag(v, tagname)
+                    value2keys.setdefault(value, []).append(k)
+            except TypeError:
+                # unhashable values
+                self._tables[tagname] = None
+            else:
+                sorted_values = sorted(_ for _ in value2keys if isinstance(_, str))
+                self._tables[tagname] = value2keys, sorted_values
+        return self._tables[tagname]
+
+    def get_keys_equal(self, tagname, value):
+        """ Returns the keys whose attribute is equal to value, or None if unknown. """
+        table = self._get_table(tagname)
+        if table is None:
+            return None
+        value2keys, _ = table
+        try:
+            return list(value2keys.get(value, []))
+        except TypeError:
+            return None
+
+    def get_keys_with_prefix(self, tagname, prefix):
+        """ Returns the keys whose attribute is a string starting with prefix, or None if unknown. """
+        table = self._get_table(tagname)
+        if table is None:
+            return None
+        value2keys, sorted_values = table
+        keys = []
+        i = bisect.bisect_left(sorted_values, prefix)
+        while i < len(sorted_values) and sorted_values[i].startswith(prefix):
+            keys.extend(value2keys[sorted_values[i]])
+            i += 1
+        return keys
+
+    def subset(self, keys):
+        """ Returns an OrderedDict with the given keys, in the order of this dict. """
+        if self._positions is None:
+            self._positions = dict((k, i) for i, k in enumerate(self))
+        res = OrderedDict()
+        for k in sorted(set(keys), key=self._positions.__getitem__):
+            res[k] = self[k]
+        return res
+
+
 class Spec(object):
     __metaclass__ = ABCMeta
 
@@ -34,7 +129,19 @@ class Spec(object):
     def match(self, k):
         pass
 
+    def lookup(self, index, tagname):
+        """
+            Returns the keys of the FuzzyIndex whose attribute tagname
+            (or the key, if None) matches, or None if the index cannot
+            answer and the entries need to be scanned.
+        """
+        return None
+
     def match_dict(self, stuff):
+        if isinstance(stuff, FuzzyIndex):
+            keys = self.lookup(stuff, None)
+            if keys is not None:
+                return stuff.subset(keys)
         res = OrderedDict()
         for k, v in stuff.items():
             if self.match(k):
@@ -97,6 +204,12 @@ class And(Spec):
             theirs = option.match_dict(seq)
             children_answers.append(theirs)
 
+        if isinstance(seq, FuzzyIndex) and children_answers:
+            # only look at the candidates in the smallest answer
+            smallest = min(children_answers, key=len)
+            keys = [k for k in smallest if all(k in _ for _ in children_answers)]
+            return seq.subset(keys)
+
         for k, v in seq.items():
             ok = all(k in _ for _ in children_answers)
             if ok:
@@ -113,9 +226,15 @@ class OnlyFirst(Spec):
         return self.children[0].match(x)  # XXX
 
     def match_dict(self, seq):
+        res = OrderedDict()
+        if isinstance(self.children[0], MatchAll):
+            for k, v in seq.items():
+                res[k] = v
+                break
+            return res
+
         results = self.children[0].match_dict(seq)
 
-        res = OrderedDict()
         if results:
             k = list(results)[0]
             res[k] = results[k]
@@ -295,6 +414,10 @@ class ByTag(Spec):
         return res
 
     def match_dict(self, seq):
+        if isinstance(seq, FuzzyIndex):
+            keys = self.spec.lookup(seq, self.tagname)
+            if keys is not None:
+                return seq.subset(keys)
         matches = OrderedDict()
         for k, v in seq.items():
             if self.match(v):
@@ -313,6 +436,14 @@ class Constant(Spec):
     def match(self, x):
         return self.s == x
 
+    def lookup(self, index, tagname):
+        if tagname is None:
+            # the keys are unique
+            if isinstance(self.s, str):
+                return [self.s] if self.s in index else []
+            return None
+        return index.get_keys_equal(tagname, self.s)
+
 
 class MatchAll(Spec):
 
@@ -338,6 +469,19 @@ class Wildcard(Spec):
     def match(self, x):
         return isinstance(x, str) and self.regexp.match(x)
 
+    def lookup(self, index, tagname):
+        # Only for patterns "prefix*", where the prefix has no
+        # characters that are special in the regular expression.
+        prefix = self.pattern[:-1]
+        if not self.pattern.endswith('*') or any(c in prefix for c in '*.^$+?{}[]()|\\'):
+            return None
+        candidates = index.get_keys_with_prefix(tagname, prefix)
+        if candidates is None:
+            return None
+        if tagname is None:
+            return [k for k in candidates if self.match(k)]
+        return [k for k in candidates if self.match(_get_tag(index[k], tagname))]
+
 
 def value_as_float(x):
     try:
@@ -51,9 +51,13 @@ def d8n_image_msg_from_cv_image(cv_image, image_format, same_timestamp_as=None):
 
 
 def pil_from_CompressedImage(msg):
+    return pil_from_jpg(msg.data)
+
+
+def pil_from_jpg(data):
     from PIL import ImageFile  # @UnresolvedImport
     parser = ImageFile.Parser()
-    parser.feed(msg.data)
+    parser.feed(data)
     res = parser.close()
     return res
 
@@ -80,4 +84,14 @@ def rgb_from_ros(msg):
         return rgb_from_imgmsg(msg)
 
 
+@contract(returns='array[HxWx3]')
+def bgr_from_ros(msg):
+    """ Same as rgb_from_ros(), but returns BGR; JPGs are decoded by OpenCV. """
+    if 'CompressedImage' in msg.__class__.__name__:
+        from .jpg import bgr_from_jpg
+        return bgr_from_jpg(msg.data)
+    else:
+        return bgr_from_imgmsg(msg)
+
+
 numpy_from_ros_compressed = rgb_from_ros
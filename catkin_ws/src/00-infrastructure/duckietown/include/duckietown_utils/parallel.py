@@ -0,0 +1,100 @@
+from collections import deque
+from multiprocessing import cpu_count, Pool
+from multiprocessing.pool import ThreadPool
+
+__all__ = [
+    'map_in_threads',
+    'imap_in_threads',
+    'imap_in_processes',
+]
+
+
+def map_in_threads(f, items, nthreads=None):
+    """
+        Returns [f(x) for x in items], computed by a pool of nthreads
+        threads (default: the number of CPUs).
+
+        This is useful when f spends its time in I/O, in subprocesses,
+        or in functions that release the GIL (such as hashlib).
+    """
+    items = list(items)
+    if nthreads is None:
+        nthreads = cpu_count()
+    nthreads = max(1, min(nthreads, len(items)))
+    if nthreads == 1:
+        return [f(x) for x in items]
+
+    pool = ThreadPool(nthreads)
+    try:
+        return pool.map(f, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def imap_in_threads(f, items, nthreads=None, prefetch=None):
+    """
+        Yields f(x) for x in items, in order, computed by a pool of
+        nthreads threads (default: the number of CPUs).
+
+        The items are consumed lazily, in the caller's thread, and at
+        most `prefetch` results (default: 2 * nthreads) are computed
+        ahead of the consumer, so the memory used is bounded.
+
+        If nthreads is 1 or prefetch is 0, f is called in the caller's thread.
+    """
+    if nthreads is None:
+        nthreads = cpu_count()
+    if prefetch is None:
+        prefetch = 2 * nthreads
+    if nthreads <= 1 or prefetch <= 0:
+        for x in items:
+            yield f(x)
+        return
+
+    pool = ThreadPool(nthreads)
+    for y in _imap_in_pool(pool, f, items, prefetch):
+        yield y
+
+
+def imap_in_processes(f, items, nprocesses=None, prefetch=None, initializer=None, initargs=()):
+    """
+        Same as imap_in_threads(), using a pool of nprocesses processes,
+        for functions that need the CPU.
+
+        f, the items and the results must be picklable. initializer(*initargs)
+        is called once in each process, and can be used to set up
+        the state that f needs.
+
+        If nprocesses is 1 or prefetch is 0, f is called in the caller's
+        process (after initializer).
+    """
+    if nprocesses is None:
+        nprocesses = cpu_count()
+    if prefetch is None:
+        prefetch = 2 * nprocesses
+    if nprocesses <= 1 or prefetch <= 0:
+        if initializer is not None:
+            initializer(*initargs)
+        for x in items:
+            yield f(x)
+        return
+
+    pool = Pool(nprocesses, initializer, initargs)
+    for y in _imap_in_pool(pool, f, items, prefetch):
+        yield y
+
+
+def _imap_in_pool(pool, f, items, prefetch):
+    pending = deque()
+    try:
+        for x in items:
+            pending.append(pool.apply_async(f, (x,)))
+            if len(pending) >= prefetch:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        # also if the consumer stops early
+        pool.terminate()
+        pool.join()
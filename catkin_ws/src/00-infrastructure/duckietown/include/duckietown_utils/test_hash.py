@@ -6,12 +6,15 @@ import urlparse
 
 from duckietown_utils.logging_logger import logger
 
-from .caching import get_cached
+from .caching import get_cached, get_cache_name_for_file
+from .parallel import map_in_threads
 from .timeit import timeit_wall
 
 __all__ = [
     'get_md5',
     'sha1_for_file',
+    'sha1_for_file_cached',
+    'sha1_for_files_cached',
     'create_hash_url',
     'parse_hash_url',
 ]
@@ -42,11 +45,18 @@ def sha1_for_file_cached(filename):
     def f():
         return sha1_for_file(filename)
 
-    basename = os.path.basename(filename)
-    cache_name = 'sha1_for_file/' + basename
+    cache_name = get_cache_name_for_file('sha1_for_file', filename)
     return get_cached(cache_name, f, quiet=True)
 
 
+def sha1_for_files_cached(filenames, nthreads=None):
+    """
+        Same as sha1_for_file_cached() for each file; the files are hashed
+        in parallel. Returns a list of hashes.
+    """
+    return map_in_threads(sha1_for_file_cached, filenames, nthreads=nthreads)
+
+
 def create_hash_url(fn):
     # scheme://netloc/path;parameters?query#fragment
     scheme = 'hash'
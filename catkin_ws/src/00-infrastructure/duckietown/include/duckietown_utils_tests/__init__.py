@@ -1,3 +1,9 @@
 from . import hierarchy
 from . import colors
 from . import fuzzy_match_test
+from . import bag_info_tests
+from . import hash_tests
+from . import bag_reading_tests
+from . import bag_images_tests
+from . import jpg_tests
+from . import parallel_tests
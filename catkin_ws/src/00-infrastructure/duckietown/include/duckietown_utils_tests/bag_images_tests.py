@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import rosbag
+import rospy
+from sensor_msgs.msg import CompressedImage
+
+import duckietown_utils as dtu
+
+
+def write_images_bag(filename, topic, n):
+    bag = rosbag.Bag(filename, 'w')
+    try:
+        for i in range(n):
+            bgr = np.zeros((48, 64, 3), 'uint8')
+            bgr[:, :, 0] = i * 10
+            msg = CompressedImage(format='jpeg', data=dtu.jpg_from_bgr(bgr))
+            t = rospy.Time.from_sec(1500000000 + i * 0.1)
+            bag.write(topic, msg, t)
+    finally:
+        bag.close()
+
+
+@dtu.unit_test
+def iterate_images_same_as_read_all():
+    d = dtu.create_tmpdir(prefix='bag_images_tests')
+    filename = os.path.join(d, 'images.bag')
+    topic = '/robot/camera_node/image/compressed'
+    write_images_bag(filename, topic, 20)
+
+    for max_images in [None, 1, 5]:
+        bag = rosbag.Bag(filename)
+        expected = dtu.d8n_read_all_images_from_bag(bag, topic, max_images=max_images,
+                                                    use_relative_time=True)
+        bag.close()
+
+        for nthreads in [1, 3]:
+            bag = rosbag.Bag(filename)
+            res = list(dtu.d8n_iterate_images_from_bag(bag, topic, max_images=max_images,
+                                                       use_relative_time=True, nthreads=nthreads))
+            bag.close()
+            assert len(res) == len(expected), (max_images, len(res), len(expected))
+            for (timestamp, bgr), e in zip(res, expected):
+                assert timestamp == e['timestamp']
+                assert bgr.shape == e['rgb'].shape
+                diff = np.abs(bgr.astype('int') - dtu.bgr_from_rgb(e['rgb']).astype('int'))
+                assert np.max(diff) <= 2, np.max(diff)
+
+
+@dtu.unit_test
+def imap_in_threads_order():
+    items = range(50)
+    for nthreads, prefetch in [(1, None), (4, None), (4, 1), (4, 0)]:
+        res = list(dtu.imap_in_threads(lambda x: x * x, items, nthreads=nthreads, prefetch=prefetch))
+        assert res == [x * x for x in items]
+
+    # the items are read lazily, at most prefetch ahead
+    read = []
+
+    def gen():
+        for x in items:
+            read.append(x)
+            yield x
+
+    it = dtu.imap_in_threads(lambda x: x, gen(), nthreads=2, prefetch=3)
+    assert next(it) == 0
+    assert len(read) == 3, read
+    it.close()
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,52 @@
+import os
+
+import rosbag
+import rospy
+from std_msgs.msg import String
+
+import duckietown_utils as dtu
+
+
+def write_test_bag(filename, n=20):
+    bag = rosbag.Bag(filename, 'w')
+    try:
+        for i in range(n):
+            t = rospy.Time.from_sec(1500000000 + i * 0.1)
+            bag.write('/robot/one', String(data='one %d' % i), t)
+            if i % 2 == 0:
+                bag.write('/robot/two', String(data='two %d' % i), t)
+    finally:
+        bag.close()
+
+
+@dtu.unit_test
+def rosbag_info_native_same_as_rosbag_info():
+    d = dtu.create_tmpdir(prefix='bag_info_tests')
+    filename = os.path.join(d, 'test.bag')
+    write_test_bag(filename)
+
+    native = dtu.rosbag_info_native(filename)
+    assert native['messages'] == 30, native
+    assert native['start'] == 1500000000
+    assert abs(native['duration'] - 1.9) < 1e-6, native
+
+    expected = dtu.rosbag_info(filename)
+    for k in ['duration', 'start', 'end', 'size', 'messages', 'compression', 'types']:
+        assert native[k] == expected[k], (k, native[k], expected[k])
+    assert len(native['topics']) == len(expected['topics'])
+    for t1, t2 in zip(native['topics'], expected['topics']):
+        for k in ['topic', 'type', 'messages']:
+            assert t1[k] == t2[k], (k, t1, t2)
+
+
+@dtu.unit_test
+def rosbag_info_native_not_a_bag():
+    d = dtu.create_tmpdir(prefix='bag_info_tests')
+    filename = os.path.join(d, 'invalid.bag')
+    with open(filename, 'w') as f:
+        f.write('not a bag')
+    assert dtu.rosbag_info_native(filename) is None
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,86 @@
+import os
+
+import rosbag
+import rospy
+from std_msgs.msg import String
+
+import duckietown_utils as dtu
+
+
+def write_split_bags(d):
+    """ Writes two bags with interleaved messages; returns the filenames and all the messages. """
+    filenames = [os.path.join(d, 'split_0.bag'), os.path.join(d, 'split_1.bag')]
+    bags = [rosbag.Bag(_, 'w') for _ in filenames]
+    expected = []
+    try:
+        for i in range(20):
+            t = rospy.Time.from_sec(1500000000 + i * 0.1)
+            topic = '/robot/one' if i % 3 else '/robot/two'
+            bags[i % 2].write(topic, String(data='%d' % i), t)
+            expected.append((topic, '%d' % i))
+    finally:
+        for bag in bags:
+            bag.close()
+    return filenames, expected
+
+
+@dtu.unit_test
+def multibag_merges_in_time_order():
+    d = dtu.create_tmpdir(prefix='bag_reading_tests')
+    filenames, expected = write_split_bags(d)
+
+    bag = dtu.MultiBag(filenames)
+    assert bag.get_start_time() == 1500000000
+    assert abs(bag.get_end_time() - 1500000001.9) < 1e-6
+    assert bag.get_message_count() == 20
+    topics = bag.get_type_and_topic_info().topics
+    assert topics['/robot/one'].message_count + topics['/robot/two'].message_count == 20
+
+    res = [(topic, msg.data) for topic, msg, _ in bag.read_messages()]
+    assert res == expected, res
+
+    res = [(topic, msg.data) for topic, msg, _ in bag.read_messages(topics=['/robot/two'])]
+    assert res == [_ for _ in expected if _[0] == '/robot/two'], res
+    bag.close()
+
+
+@dtu.unit_test
+def multibag_time_window():
+    d = dtu.create_tmpdir(prefix='bag_reading_tests')
+    filenames, expected = write_split_bags(d)
+
+    bag = dtu.BagReadProxy(dtu.MultiBag(filenames), 0.5, 1.0)
+    res = list(bag.read_messages_plus())
+    assert [(_.topic, _.msg.data) for _ in res] == expected[5:11]
+    assert abs(res[0].time_window) < 1e-6
+    assert abs(res[0].time_from_physical_log_start - 0.5) < 1e-6
+    bag.close()
+
+
+
+@dtu.unit_test
+def multibag_ignores_empty_bags():
+    d = dtu.create_tmpdir(prefix='bag_reading_tests')
+    filenames, expected = write_split_bags(d)
+    empty = os.path.join(d, 'empty.bag')
+    rosbag.Bag(empty, 'w').close()
+
+    bag = dtu.MultiBag([empty] + filenames + [empty])
+    assert bag.get_start_time() == 1500000000
+    assert abs(bag.get_end_time() - 1500000001.9) < 1e-6
+    res = [(topic, msg.data) for topic, msg, _ in bag.read_messages()]
+    assert res == expected, res
+    bag.close()
+
+    bag = dtu.MultiBag([empty, empty])
+    try:
+        bag.get_start_time()
+    except ValueError as e:
+        assert 'empty' in str(e)
+    else:
+        raise Exception('Expected ValueError')
+    bag.close()
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
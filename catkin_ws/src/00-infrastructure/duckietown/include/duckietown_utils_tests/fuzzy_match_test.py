@@ -128,6 +128,33 @@ def my_filter_sort():
         raise Exception()
 
 
+@dtu.unit_test
+def matches_index():
+    Species = namedtuple('Species', 'name size weight')
+    data = OrderedDict([
+        ('jeb', Species('A big horse', 'large', 200)),
+        ('fuffy', Species('A medium dog', 'medium', 50)),
+        ('ronny', Species('A medium cat', 'medium', 30)),
+        ('rex', Species('A large dog', 'large', 40)),
+        ('r.x', Species('A lazy cat', 'large', [1])),
+    ])
+    index = dtu.FuzzyIndex(data)
+    queries = ['*', 'jeb', 'none', 'r*', 'r.*', 'size:medium', 'size:large/first',
+               'size:l*', 'size:*ge', 'name:A medium*', 'name:A medium*,size:medium',
+               'size:large,r*', 'fuffy+rex', 'weight:40', 'all/first', 'r*/[1]']
+    for query in queries:
+        expected = dtu.fuzzy_match(query, data)
+        res = dtu.fuzzy_match(query, index)
+        assert list(res) == list(expected), (query, list(res), list(expected))
+
+    # the tables are discarded when the dict changes
+    assert list(dtu.fuzzy_match('size:tiny', index)) == []
+    index['bob'] = Species('A small mouse', 'tiny', 1)
+    assert list(dtu.fuzzy_match('size:tiny', index)) == ['bob']
+    del index['bob']
+    assert list(dtu.fuzzy_match('size:t*', index)) == []
+
+
 if __name__ == '__main__':
     dtu.run_tests_for_this_module()
 
@@ -0,0 +1,36 @@
+import os
+
+import duckietown_utils as dtu
+
+
+@dtu.unit_test
+def sha1_cache_depends_on_file():
+    d = dtu.create_tmpdir(prefix='hash_tests')
+    fn = os.path.join(d, 'file.txt')
+
+    dtu.write_data_to_file('one', fn)
+    h1 = dtu.sha1_for_file_cached(fn)
+    assert h1 == dtu.sha1_for_file(fn)
+
+    # same name, different contents and size
+    dtu.write_data_to_file('three', fn)
+    h2 = dtu.sha1_for_file_cached(fn)
+    assert h2 == dtu.sha1_for_file(fn)
+    assert h1 != h2
+
+
+@dtu.unit_test
+def sha1_for_files_in_parallel():
+    d = dtu.create_tmpdir(prefix='hash_tests')
+    filenames = []
+    for i in range(10):
+        fn = os.path.join(d, 'file%d.txt' % i)
+        dtu.write_data_to_file('contents %d' % i, fn)
+        filenames.append(fn)
+
+    hashes = dtu.sha1_for_files_cached(filenames, nthreads=4)
+    assert hashes == [dtu.sha1_for_file(_) for _ in filenames]
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,61 @@
+import numpy as np
+
+import duckietown_utils as dtu
+
+
+def get_test_jpg(H=480, W=640):
+    bgr = np.zeros((H, W, 3), 'uint8')
+    bgr[:, :, 0] = np.linspace(0, 255, W)[np.newaxis, :]
+    bgr[:, :, 2] = np.linspace(0, 255, H)[:, np.newaxis]
+    return dtu.jpg_from_bgr(bgr)
+
+
+@dtu.unit_test
+def jpg_shape_from_header():
+    assert dtu.get_jpg_shape(get_test_jpg(480, 640)) == (480, 640)
+    assert dtu.get_jpg_shape(get_test_jpg(10, 30)) == (10, 30)
+    assert dtu.get_jpg_shape('not a jpg') is None
+
+    assert dtu.get_jpg_reduce_factor((480, 640), (120, 160)) == 4
+    assert dtu.get_jpg_reduce_factor((480, 640), (121, 160)) == 2
+    assert dtu.get_jpg_reduce_factor((480, 640), (480, 640)) == 1
+    assert dtu.get_jpg_reduce_factor((480, 640), (10, 10)) == 8
+
+
+@dtu.unit_test
+def jpg_decoder_same_as_bgr_from_jpg():
+    data = get_test_jpg()
+    expected = dtu.bgr_from_jpg(data)
+    for backend in ['opencv', None]:
+        decoder = dtu.JPGDecoder(backend=backend, reuse_buffers=True)
+        for _ in range(2):
+            bgr = decoder.decode(data)
+            assert bgr.shape == expected.shape
+            diff = np.abs(bgr.astype('int') - expected.astype('int'))
+            assert np.max(diff) <= 2, np.max(diff)
+
+    decoder = dtu.JPGDecoder()
+    res = decoder.decode_many([data] * 4)
+    assert len(res) == 4
+    assert all(_.shape == expected.shape for _ in res)
+
+    try:
+        decoder.decode('not a jpg')
+    except ValueError:
+        pass
+    else:
+        raise Exception()
+
+
+@dtu.unit_test
+def jpg_decoder_reduced():
+    data = get_test_jpg()
+    decoder = dtu.JPGDecoder()
+    assert decoder.decode(data, min_shape=(120, 160)).shape == (120, 160, 3)
+    assert decoder.decode(data, min_shape=(100, 100)).shape == (120, 160, 3)
+    assert decoder.decode(data, min_shape=(200, 200)).shape == (240, 320, 3)
+    assert decoder.decode(data, min_shape=(480, 640)).shape == (480, 640, 3)
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,32 @@
+import os
+
+import duckietown_utils as dtu
+
+_offset = {}
+
+
+def init_offset(offset):
+    _offset['value'] = offset
+
+
+def add_offset(x):
+    return os.getpid(), x + _offset['value']
+
+
+@dtu.unit_test
+def imap_in_processes_ordered():
+    items = iter(range(50))
+    res = list(dtu.imap_in_processes(add_offset, items, nprocesses=3, prefetch=4,
+                                     initializer=init_offset, initargs=(100,)))
+    assert [_[1] for _ in res] == list(range(100, 150))
+    assert not os.getpid() in set(_[0] for _ in res)
+
+    # in this process
+    res = list(dtu.imap_in_processes(add_offset, range(5), nprocesses=1,
+                                     initializer=init_offset, initargs=(10,)))
+    assert [_[1] for _ in res] == list(range(10, 15))
+    assert set(_[0] for _ in res) == set([os.getpid()])
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -100,6 +100,58 @@ class EasyAlgoDB(object):
 
         return res
 
+    @dtu.contract(family_name=str, instance_name_or_spec='str|dict')
+    def get_pooled_instance(self, family_name, instance_name_or_spec):
+        """
+            Same as create_instance(), but the instance is created only
+            the first time and then reused.
+
+            Only instances given by name are pooled; inline specs are
+            created every time.
+
+            The same object is returned to all the callers, and it keeps
+            its state between calls. This is fine for the instances that
+            have no state (or that are re-initialized before each use), but
+            a stateful instance (for example, an incremental color
+            correction) carries over what it saw in a previous run. The
+            callers must call reset_instance_pool() between independent
+            runs (e.g., at the beginning of each log).
+        """
+        if not isinstance(instance_name_or_spec, str):
+            return self.create_instance(family_name, instance_name_or_spec)
+
+        pool = self._get_instance_pool()
+        key = (family_name, instance_name_or_spec)
+        if key not in pool:
+            pool[key] = self.create_instance(family_name, instance_name_or_spec)
+        return pool[key]
+
+    @dtu.contract(family_name='None|str')
+    def reset_instance_pool(self, family_name=None):
+        """
+            Forgets the pooled instances, so that the next call to
+            get_pooled_instance() creates new ones.
+
+            If family_name is given, only the instances of that family
+            are forgotten.
+        """
+        pool = self._get_instance_pool()
+        for key in list(pool):
+            if family_name is None or key[0] == family_name:
+                del pool[key]
+
+    def _get_instance_pool(self):
+        # not created in __init__ because the DB might come from an old cache
+        if not hasattr(self, '_instance_pool'):
+            self._instance_pool = {}
+        return self._instance_pool
+
+    def __getstate__(self):
+        # the pooled instances are not part of the DB
+        state = dict(self.__dict__)
+        state.pop('_instance_pool', None)
+        return state
+
 #         """ Instantiates an algorithm """
 
 
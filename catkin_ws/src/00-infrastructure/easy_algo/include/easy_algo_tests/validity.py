@@ -78,6 +78,38 @@ def test_instance():
     except Exception as e:
         assert 'MyAdderInterface' in str(e)
 
+@dtu.unit_test 
+def test_instance_pool():
+    data="""
+"adder.easy_algo_family.yaml": | 
+    description: desc
+    interface: easy_algo_tests.validity.MyAdderInterface
+
+"one.adder.yaml": |
+    description: desc
+    constructor: easy_algo_tests.validity.One
+    parameters:
+"""
+    d = dtu.dir_from_data(data)
+    sources = [d]
+    db = EasyAlgoDB(sources)
+    
+    one = db.get_pooled_instance('adder', 'one')
+    assert type(one).__name__ == 'One'
+    assert db.get_pooled_instance('adder', 'one') is one
+    # create_instance() always creates a new one
+    assert db.create_instance('adder', 'one') is not one
+    
+    db.reset_instance_pool('other_family')
+    assert db.get_pooled_instance('adder', 'one') is one
+    
+    db.reset_instance_pool('adder')
+    one2 = db.get_pooled_instance('adder', 'one')
+    assert one2 is not one
+    
+    db.reset_instance_pool()
+    assert db.get_pooled_instance('adder', 'one') is not one2
+
 
 if __name__ == '__main__':
     dtu.run_tests_for_this_module()
\ No newline at end of file
@@ -0,0 +1,48 @@
+import os
+
+import duckietown_utils as dtu
+from easy_logs.resource_desc import DTR
+
+__all__ = [
+    'get_artifacts_key',
+    'artifacts_up_to_date',
+    'mark_artifacts_done',
+]
+
+
+def get_artifacts_key(log, **params):
+    """
+        Returns a string that identifies the content of the log (the sha1
+        of the bag and the time slice) together with the parameters used
+        to create the artifacts (thumbnails, videos, ...).
+
+        Returns None if the hash of the bag is not known.
+    """
+    dtr = DTR.from_yaml(log.resources['bag'])
+    sha1 = dtr.hash.get('sha1', None)
+    if sha1 is None:
+        return None
+    s = '%s %r %r %r' % (sha1, log.t0, log.t1, sorted(params.items()))
+    return dtu.get_md5(s)
+
+
+def artifacts_up_to_date(stamp, key):
+    """
+        True if the stamp file was written by mark_artifacts_done()
+        with the same key, and all the artifacts still exist.
+    """
+    if key is None or not os.path.exists(stamp):
+        return False
+    lines = open(stamp).read().split('\n')
+    if lines[0] != key:
+        return False
+    outputs = [_ for _ in lines[1:] if _]
+    return all(os.path.exists(_) for _ in outputs)
+
+
+def mark_artifacts_done(stamp, key, outputs):
+    """ Writes the stamp file with the key and the list of artifacts. """
+    if key is None:
+        return
+    s = '\n'.join([key] + list(outputs)) + '\n'
+    dtu.write_data_to_file(s, stamp)
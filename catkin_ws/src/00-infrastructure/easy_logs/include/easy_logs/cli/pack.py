@@ -2,8 +2,8 @@ from collections import OrderedDict
 
 from easy_logs.app_with_logs import D8AppWithLogs
 from easy_logs.cli.gallery import get_report, get_gallery_style
-from easy_logs.ipfs_utils import MakeIPFS
-from easy_logs.logs_db import yaml_representation_of_phy_logs
+from easy_logs.ipfs_utils import MakeIPFS, get_ipfs_hashes_cached
+from easy_logs.logs_db import yaml_representation_of_phy_logs, get_local_file
 from easy_logs.resource_desc import DTR
 
 __all__ = [
@@ -122,13 +122,34 @@ def get_index():
 
 
 def create_ipfs_dag(logs, m):
+    missing = get_missing_ipfs_hashes(logs)
 
     for id_log, log in logs.items():
         for rname, res in log.resources.items():
             dtr = DTR.from_yaml(res)
-            ipfs = dtr.hash['ipfs']
+            if 'ipfs' in dtr.hash:
+                ipfs = dtr.hash['ipfs']
+            else:
+                ipfs = missing[(id_log, rname)]
 
             filename = id_log + '.' + rname
             #print ipfs, filename
             m.add_file(filename, ipfs, dtr.size)
 
+
+def get_missing_ipfs_hashes(logs):
+    """
+        Computes in parallel the IPFS hashes of the resources that do not
+        have one. Returns a dict (id_log, resource name) -> hash.
+    """
+    keys = []
+    filenames = []
+    for id_log, log in logs.items():
+        for rname, res in log.resources.items():
+            if not 'ipfs' in res['hash']:
+                keys.append((id_log, rname))
+                filenames.append(get_local_file(res))
+    if filenames:
+        print('computing %d IPFS hashes' % len(filenames))
+    hashes = get_ipfs_hashes_cached(filenames)
+    return dict(zip(keys, hashes))
@@ -11,6 +11,8 @@ import rosbag
 from easy_logs import get_local_bag_file
 from easy_logs.app_with_logs import D8AppWithLogs, download_if_necessary
 
+from .artifacts import artifacts_up_to_date, get_artifacts_key, mark_artifacts_done
+
 __all__ = ['MakeThumbnails']
 
 
@@ -27,6 +29,9 @@ Use like this:
 
     $ %(prog)s --max_images=[num] [logs]
 
+Use --workers=[num] to render the logs in parallel processes.
+The logs whose thumbnails are up to date are skipped.
+
 
 """
 
@@ -35,6 +40,7 @@ Use like this:
         params.add_flag('write_frames', help='Also write each frame in a separate file')
         params.add_flag('all_topics', help='If set, plots all topics, in addition to the camera.')
         params.add_string('outdir', help='Output directory', default=None)
+        params.add_int('workers', default=1, help='Number of processes (uses "parmake")')
         params.accept_extra()
 
         params.add_flag('compmake', help='Activate compmake caching')
@@ -44,6 +50,8 @@ Use like this:
         if not options.compmake:
             self.debug('Because --compmake not given, simulating --reset.')
             options.reset = True
+        if options.workers > 1 and not options.command:
+            options.command = 'parmake n=%d' % options.workers
 
         super(MakeThumbnails, self).go()
 
@@ -82,16 +90,30 @@ Use like this:
 
         od = self.options.output
 
+        nskipped = 0
         for log_name, log in logs_valid.items():
             out = os.path.join(od, log_name)
 
+            key = get_artifacts_key(log, max_images=max_images, only_camera=only_camera,
+                                    write_frames=write_frames)
+            if artifacts_up_to_date(get_stamp(out), key):
+                nskipped += 1
+                continue
+
             log_downloaded = download_if_necessary(log)
 
             context.comp(work, log_downloaded, out, max_images, only_camera=only_camera,
-                         write_frames=write_frames, job_id=log_name)
+                         write_frames=write_frames, key=key, job_id=log_name)
+
+        if nskipped:
+            self.info('Skipped %d logs whose thumbnails are up to date.' % nskipped)
 
 
-def work(log, outd, max_images, only_camera, write_frames):
+def get_stamp(outd):
+    return outd + '.thumbnails.stamp'
+
+
+def work(log, outd, max_images, only_camera, write_frames, key=None):
     filename = get_local_bag_file(log)
     t0 = log.t0
     t1 = log.t1
@@ -99,28 +121,30 @@ def work(log, outd, max_images, only_camera, write_frames):
     MIN_HEIGHT = 480
 
     # noinspection PyUnboundLocalVariable
-    bag = rosbag.Bag(filename)
+    try:
+        bag = rosbag.Bag(filename)
+    except:
+        msg = 'Cannot read Bag file %s' % filename
+        dtu.logger.error(msg)
+        raise
 
     main = dtu.get_image_topic(bag)
 
     topics = [_ for _, __ in dtu.d8n_get_all_images_topic_bag(bag)]
-    bag.close()
     dtu.logger.debug('%s - topics: %s' % (filename, topics))
-    for topic in topics:
-
-        if only_camera and topic != main:
-            continue
+    if only_camera:
+        read_topics = [main]
+    else:
+        read_topics = topics
+
+    # all the topics are read in one pass over the bag
+    bag_proxy = dtu.BagReadProxy(bag, t0, t1)
+    topic2res = read_images_from_topics(bag_proxy, read_topics, max_images=max_images)
+    bag.close()
 
-        try:
-            bag = rosbag.Bag(filename)
-        except:
-            msg = 'Cannot read Bag file %s' % filename
-            dtu.logger.error(msg)
-            raise
-        bag_proxy = dtu.BagReadProxy(bag, t0, t1)
-        res = dtu.d8n_read_all_images_from_bag(bag_proxy, topic, max_images=max_images,
-                                               use_relative_time=True)
-        bag.close()
+    outputs = []
+    for topic in read_topics:
+        res = topic2res[topic]
 
         d = topic.replace('/', '_')
         if d.startswith('_'):
@@ -147,6 +171,7 @@ def work(log, outd, max_images, only_camera, write_frames):
                 rgb = res[i]['rgb']
                 fn = os.path.join(d0, ('image-%05d' % i) + '.jpg')
                 dtu.write_bgr_as_jpg(dtu.bgr_from_rgb(rgb), fn)
+                outputs.append(fn)
 
         grid = dtu.make_images_grid(images_with_label, pad=4,
                                     bgcolor=dtu.ColorConstants.RGB_DUCKIETOWN_YELLOW)
@@ -156,7 +181,57 @@ def work(log, outd, max_images, only_camera, write_frames):
         if (topic != main) or len(topics) > 1:
             fn = d0 + '.jpg'
             dtu.write_rgb_as_jpg(grid, fn)
+            outputs.append(fn)
 
         if topic == main:
             fn = outd + '.thumbnails.jpg'
             dtu.write_rgb_as_jpg(grid, fn)
+            outputs.append(fn)
+
+    mark_artifacts_done(get_stamp(outd), key, outputs)
+
+
+def read_images_from_topics(bag, topics, max_images):
+    """
+        Same as dtu.d8n_read_all_images_from_bag() with use_relative_time=True,
+        for all the topics at once, with a single pass over the bag.
+
+        Only the selected frames are decoded.
+
+        Returns a dict topic -> list of dict(timestamp, rgb).
+    """
+    interval = {}
+    for topic in topics:
+        if max_images is None:
+            interval[topic] = 1
+        else:
+            nfound = bag.get_message_count(topic_filters=topic)
+            interval[topic] = max(1, int(np.ceil(nfound / max_images)))
+
+    num_read = dict((_, 0) for _ in topics)
+    res = dict((_, []) for _ in topics)
+    missing = set(topics)
+    bag_t0 = bag.get_start_time()
+    for topic, msg, t in bag.read_messages(topics=topics):
+        if not topic in missing:
+            continue
+        j = num_read[topic]
+        num_read[topic] += 1
+        if j % interval[topic] != 0:
+            continue
+
+        rgb = dtu.rgb_from_ros(msg)
+        res[topic].append({'timestamp': t.to_sec() - bag_t0, 'rgb': rgb})
+
+        # stop if we have enough images for all topics
+        if max_images is not None and len(res[topic]) >= max_images:
+            missing.remove(topic)
+            if not missing:
+                break
+
+    for topic in topics:
+        dtu.logger.info('Returned %d images for %s' % (len(res[topic]), topic))
+        if not res[topic]:
+            msg = 'No data found for topic %s' % topic
+            raise ValueError(msg)
+    return res
@@ -3,12 +3,14 @@ from collections import OrderedDict
 
 import duckietown_utils as dtu
 import rosbag
-from duckietown_utils.bag_visualization import count_messages_in_slice
+from duckietown_utils.bag_visualization import count_messages_in_slice_by_topic
 from easy_logs import get_local_bag_file
 from easy_logs.app_with_logs import D8AppWithLogs, download_if_necessary
 from easy_logs.easy_logs_summary_imp import format_logs
 from quickapp import QuickApp
 
+from .artifacts import artifacts_up_to_date, get_artifacts_key, mark_artifacts_done
+
 __all__ = [
     'MakeVideos',
 ]
@@ -31,12 +33,16 @@ For example:
 
     $ %(prog)s --cloud vehicle:shamrock
 
+Use --workers=[num] to render the videos in parallel processes.
+The logs whose videos are up to date are skipped.
+
 """
 
     def define_options(self, params):
         params.add_flag('all_topics',
                         help='If set, plots all topics, in addition to the camera.')
         params.add_string('outdir', help='Output directory', default=None)
+        params.add_int('workers', default=1, help='Number of processes (uses "parmake")')
         params.accept_extra()
 
         params.add_flag('compmake', help='Activate compmake caching')
@@ -46,6 +52,8 @@ For example:
         if not options.compmake:
             self.debug('Because --compmake not given, simulating --reset.')
             options.reset = True
+        if options.workers > 1 and not options.command:
+            options.command = 'parmake n=%d' % options.workers
 
         super(MakeVideos, self).go()
 
@@ -77,18 +85,31 @@ For example:
         s = format_logs(logs_valid)
         self.info(s)
 
-
+        nskipped = 0
         for log_name, log in logs_valid.items():
             out = os.path.join(outdir, log_name)
 
+            key = get_artifacts_key(log, only_camera=only_camera)
+            if artifacts_up_to_date(get_stamp(out), key):
+                nskipped += 1
+                continue
+
             job_id = 'download-%s' % log.log_name
             log_downloaded = context.comp(download_if_necessary, log, job_id=job_id)
 
             job_id = 'setup-%s' % log_name
-            context.comp_dynamic(jobs_videos, log_downloaded, log_name, out, only_camera, job_id=job_id)
+            context.comp_dynamic(jobs_videos, log_downloaded, log_name, out, only_camera,
+                                 key=key, job_id=job_id)
+
+        if nskipped:
+            self.info('Skipped %d logs whose videos are up to date.' % nskipped)
 
 
-def jobs_videos(context, log, name, outd, only_camera):
+def get_stamp(outd):
+    return outd + '.videos.stamp'
+
+
+def jobs_videos(context, log, name, outd, only_camera, key=None):
     filename = get_local_bag_file(log)
 
     bag = rosbag.Bag(filename)
@@ -97,12 +118,18 @@ def jobs_videos(context, log, name, outd, only_camera):
 
     topics = [_ for _, __ in dtu.d8n_get_all_images_topic_bag(bag, min_messages=min_messages)]
     bag.close()
+    if only_camera:
+        topics = [_ for _ in topics if _ == main_camera_topic]
+
+    # count the messages for all topics with one pass over the bag
+    stop_at = min_messages + 2
+    topic2counts = count_messages_in_slice_by_topic(filename, topics, log.t0, log.t1, stop_at=stop_at)
 
     only_camera_fn = outd + '-video.mp4'
+    jobs = []
+    outputs = []
     for topic in topics:
-        stop_at = min_messages + 2
-        actual_count, count, _stopped_early = \
-            count_messages_in_slice(filename, topic, log.t0, log.t1, stop_at=stop_at)
+        actual_count, count, _stopped_early = topic2counts[topic]
 
         assert count >= min_messages
         if actual_count < min_messages:
@@ -121,15 +148,27 @@ def jobs_videos(context, log, name, outd, only_camera):
             j = context.comp(dtu.d8n_make_video_from_bag, filename, topic, out,
                              t0=log.t0, t1=log.t1,
                              job_id='%s-%s' % (name, topic))
+            jobs.append(j)
+            outputs.append(out)
 
         else:
             out = os.path.join(outd, name + '-' + d + '.mp4')
             j = context.comp(dtu.d8n_make_video_from_bag, filename, topic, out,
                              job_id='%s-%s' % (name, topic))
+            jobs.append(j)
+            outputs.append(out)
 
             # create link
             if topic == main_camera_topic:
-                context.comp(link, j, out, only_camera_fn)
+                jobs.append(context.comp(link, j, out, only_camera_fn))
+                outputs.append(only_camera_fn)
+
+    context.comp(mark_done, jobs, get_stamp(outd), key, outputs,
+                 job_id='%s-done' % name)
+
+
+def mark_done(_jobs, stamp, key, outputs):
+    mark_artifacts_done(stamp, key, outputs)
 
 
 def link(_, src, dst):
@@ -2,4 +2,5 @@
 class EasyLogsConstants(object):
     CACHE_CLOUD = 'EasyLogsDB-logs-cloud'
     CACHE_LOCAL = 'EasyLogsDB-logs-local'
+    LOCAL_INDEX = 'EasyLogsDB-logs-local.sqlite'
 
@@ -1,5 +1,4 @@
 import json
-import os
 
 import duckietown_utils as dtu
 
@@ -74,11 +73,18 @@ def get_ipfs_hash_cached(filename):
     def f():
         return get_ipfs_hash(filename)
 
-    basename = os.path.basename(filename)
-    cache_name = 'get_ipfs_hash/' + basename
+    cache_name = dtu.get_cache_name_for_file('get_ipfs_hash', filename)
     return dtu.get_cached(cache_name, f, quiet=True)
 
 
+def get_ipfs_hashes_cached(filenames, nthreads=None):
+    """
+        Same as get_ipfs_hash_cached() for each file, computed in parallel.
+        Returns a list of hashes.
+    """
+    return dtu.map_in_threads(get_ipfs_hash_cached, filenames, nthreads=nthreads)
+
+
 def get_ipfs_hash(filename):
     # ipfs add --only-hash LICENSE
     # added QmcgpsyWgH8Y8ajJz1Cu72KnS5uo2Aa2LpzU7kinSupNKC LICENSE
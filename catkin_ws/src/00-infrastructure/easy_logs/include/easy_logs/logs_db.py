@@ -4,6 +4,7 @@ from collections import OrderedDict, namedtuple, defaultdict
 import duckietown_utils as dtu
 from duckietown_utils.yaml_pretty import yaml_dump_pretty
 from .constants import EasyLogsConstants
+from .logs_index import get_local_logs_index, LogSummary
 from .logs_structure import PhysicalLog, yaml_from_physical_log, physical_log_from_yaml
 from .resource_desc import create_dtr_version_1, DTR, get_local_filepath, NotLocalPath
 from .time_slice import filters_slice
@@ -22,8 +23,9 @@ def get_easy_logs_db2(do_not_use_cloud, do_not_use_local, ignore_cache):
         db.update_logs(logs_cloud)
 
     if not do_not_use_local:
-        logs_local = dtu.get_cached(EasyLogsConstants.CACHE_LOCAL, get_logs_local, just_delete=False)
-        db.update_logs(logs_local)
+        index = get_local_logs_index()
+        update_local_logs_index(index)
+        db.set_local_index(index)
 
     return db
 
@@ -37,11 +39,12 @@ def delete_easy_logs_cache():
     dtu.get_cached(EasyLogsConstants.CACHE_CLOUD, lambda: None, just_delete=True)
 
     cache_dir = dtu.get_duckietown_cache_dir()
-    fn = os.path.join(cache_dir, 'candidate_cloud.yaml')
+    for basename in ['candidate_cloud.yaml', EasyLogsConstants.LOCAL_INDEX]:
+        fn = os.path.join(cache_dir, basename)
 
-    if os.path.exists(fn):
-        dtu.logger.info('Removing %s' % fn)
-        os.unlink(fn)
+        if os.path.exists(fn):
+            dtu.logger.info('Removing %s' % fn)
+            os.unlink(fn)
 
 
 def write_candidate_cloud(logs):
@@ -100,18 +103,91 @@ class EasyLogsDB(object):
 
     def __init__(self):
         # ordereddict str -> PhysicalLog
-        self.logs = OrderedDict()
+        self._logs = OrderedDict()
+        # LocalLogsIndex, whose logs are loaded only when needed
+        self._local_index = None
+        # LogsQueryIndex for the logs (or the summaries in the index)
+        self._query_index = None
 
     def update_logs(self, logs2):
         self.logs.update(logs2)
+        self._query_index = None
+
+    def set_local_index(self, index):
+        """ The logs in the index override the ones given with update_logs(). """
+        self._local_index = index
+        self._query_index = None
+
+    @property
+    def logs(self):
+        """ OrderedDict str -> PhysicalLog. Loads all the logs in the local index. """
+        if self._local_index is not None:
+            self._logs.update(self._local_index.get_logs())
+            self._local_index = None
+            self._query_index = None
+        return self._logs
+
+    def _get_query_index(self):
+        if self._query_index is None:
+            universe = OrderedDict(self._logs)
+            if self._local_index is not None:
+                universe.update(self._local_index.get_summaries())
+            self._query_index = LogsQueryIndex(universe)
+        return self._query_index
 
     @dtu.contract(returns=OrderedDict, query='str|list(str)')
     def query(self, query, raise_if_no_matches=True):
-        return query_logs(logs=self.logs, query=query, raise_if_no_matches=raise_if_no_matches)
+        if self._local_index is None:
+            return query_logs(logs=self.logs, query=query, raise_if_no_matches=raise_if_no_matches,
+                              index=self._get_query_index())
+
+        # First try to query the summaries in the index, and load only the results
+        index = self._get_query_index()
+        try:
+            result = query_logs(logs=index.logs, query=query, raise_if_no_matches=raise_if_no_matches,
+                                index=index)
+        except dtu.DTNoMatches:
+            # the index has all the logs: no need to load them to know
+            raise
+        except dtu.DTUserError as e:
+            # The query uses some field that is not in the index
+            dtu.logger.debug('Cannot use the index for query %r: %s' % (query, e))
+            return query_logs(logs=self.logs, query=query, raise_if_no_matches=raise_if_no_matches,
+                              index=self._get_query_index())
+        return self._local_index.load_logs(result)
+
+
+class LogsQueryIndex(object):
+    """
+        The universes for query_logs(), computed once for many queries.
+
+        Both `logs` and `aliases` (the logs, plus the names of their bag
+        files) are dtu.FuzzyIndex, so the queries by name, by vehicle,
+        by date (exact or "prefix*") and their "/first" do not scan
+        all the logs.
+    """
+
+    def __init__(self, logs):
+        self.logs = dtu.FuzzyIndex(logs)
+        self.aliases = get_aliases(logs)
+
+
+def get_aliases(logs):
+    """
+        Returns a dtu.FuzzyIndex with the logs, also indexed by
+        the name of their bag file, with and without ".bag".
+    """
+    aliases = dtu.FuzzyIndex(logs)
+    for _, log in logs.items():
+        original_name = get_original_name(log)
+        aliases[original_name] = log
+        original_name = original_name.replace('.bag', '')
+        aliases[original_name] = log
+    return aliases
 
 
 @dtu.contract(returns=OrderedDict, query='str|list(str)')
-def query_logs(logs, query, raise_if_no_matches=True):
+def query_logs(logs, query, raise_if_no_matches=True, index=None):
     """
         query: a string or a list of strings
 
@@ -119,11 +195,13 @@ def query_logs(logs, query, raise_if_no_matches=True):
 
         The query can also be a filename.
 
+        index: optionally, the LogsQueryIndex for the logs, to reuse
+        across queries.
     """
     if isinstance(query, list):
         res = OrderedDict()
         for q in query:
-            res.update(query_logs(logs, q, raise_if_no_matches=False))
+            res.update(query_logs(logs, q, raise_if_no_matches=False, index=index))
         if raise_if_no_matches and not res:
             msg = "Could not find any match for the queries:"
             for q in query:
@@ -136,22 +214,15 @@ def query_logs(logs, query, raise_if_no_matches=True):
         filters = OrderedDict()
         filters.update(filters_slice)
         filters.update(dtu.filters0)
-        aliases = OrderedDict()
-        aliases.update(logs)
         # adding aliases unless we are asking for everything
-        if query != '*':
-            # print('adding more (query = %s)' % query)
-            for _, log in logs.items():
-                dtr = DTR.from_yaml(log.resources['bag'])
-
-                original_name = dtr.name
-
-                # print ('alias: %s %s' % (original_name, dtr.name))
-                aliases[original_name] = log
-                original_name = original_name.replace('.bag', '')
-                aliases[original_name] = log
+        if query == '*':
+            universe = logs
+        elif index is not None:
+            universe = index.aliases
+        else:
+            universe = get_aliases(logs)
 
-        result = dtu.fuzzy_match(query, aliases, filters=filters,
+        result = dtu.fuzzy_match(query, universe, filters=filters,
                                  raise_if_no_matches=raise_if_no_matches)
         # remove doubles after
         # XXX: this still has bugs
@@ -175,6 +246,14 @@ def query_logs(logs, query, raise_if_no_matches=True):
         return c
 
 
+def get_original_name(log):
+    """ Returns the name of the bag file of a PhysicalLog or LogSummary. """
+    if isinstance(log, LogSummary):
+        return log.original_name
+    dtr = DTR.from_yaml(log.resources['bag'])
+    return dtr.name
+
+
 def _read_stats(pl, use_filename):
     assert isinstance(pl, PhysicalLog)
 
@@ -262,12 +341,9 @@ def get_all_resources():
                         base2basename2filename=base2basename2filename)
 
 
-def get_logs_local():
-    raise_if_duplicated = False
-    all_resources = get_all_resources()
-
-    logs = OrderedDict()
-    ignored = []
+def get_local_bag_files(all_resources):
+    """ Returns the list of bag files that are local logs. """
+    filenames = []
     for basename, filename in all_resources.basename2filename.items():
         if not basename.endswith('.bag'):
             continue
@@ -278,7 +354,6 @@ def get_logs_local():
             if c in filename:
                 to_censor = True
         if to_censor:
-            ignored.append(filename)
             dtu.logger.warn('Ignoring %s' % filename)
             continue
 
@@ -292,39 +367,23 @@ def get_logs_local():
 
         if basename != base + '.bag':
             continue
-        #        print('basename: %s base: %s filename: %s related : %s' % (basename, base, filename,
-        #                                                      related))
-        l = physical_log_from_filename(filename, all_resources.base2basename2filename)
 
-        if l.log_name in logs:
-            old = logs[l.log_name]
+        filenames.append(filename)
+    return filenames
 
-            old_sha1 = DTR.from_yaml(old.resources['bag']).hash['sha1']
-            new_sha1 = DTR.from_yaml(l.resources['bag']).hash['sha1']
 
-            if old_sha1 == new_sha1:
-                # just a duplicate
-                msg = 'File is a duplicate: %s ' % filename
-                dtu.logger.warn(msg)
-                continue
-            # Actually a different log
-            msg = 'Found twice this log: %s' % l.log_name
-            msg += '\nProbably it is a processed version.'
-            msg += "\n\nVersion 1:"
-
-            msg += '\n\n' + dtu.indent(str(old), '  ')
-            msg += "\n\n\nVersion 2:"
-            msg += '\n\ncurrent: %s' % filename
-            msg += '\n\ncurrent: %s' % ("RCDP" in filename)
-            msg += '\n\n' + dtu.indent(str(l), '  ')
-            if raise_if_duplicated:
-                raise Exception(msg)
-            else:
-                dtu.logger.error(msg)
+def update_local_logs_index(index):
+    """ Updates the LocalLogsIndex with the bag files found locally. """
+    all_resources = get_all_resources()
+    filenames = get_local_bag_files(all_resources)
+    index.update(filenames, all_resources.base2basename2filename)
 
-        logs[l.log_name] = l
 
-    return logs
+def get_logs_local():
+    """ Returns an OrderedDict str -> PhysicalLog with the local logs. """
+    index = get_local_logs_index()
+    update_local_logs_index(index)
+    return index.get_logs()
 
 
 @dtu.contract(returns=PhysicalLog, filename=str)
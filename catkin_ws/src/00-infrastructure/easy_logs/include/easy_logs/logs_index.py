@@ -0,0 +1,256 @@
+from collections import OrderedDict, namedtuple
+import os
+import pickle
+import sqlite3
+
+import duckietown_utils as dtu
+
+from .constants import EasyLogsConstants
+from .logs_structure import PhysicalLog
+from .resource_desc import DTR, compute_hashes_in_parallel
+
+__all__ = [
+    'LocalLogsIndex',
+    'LogSummary',
+    'get_local_logs_index',
+]
+
+# The fields of a PhysicalLog that are stored as columns, and can be
+# queried without loading the log. "path" is the local bag file, and
+# "original_name" is the name of the bag file (used for the aliases).
+LogSummary = namedtuple('LogSummary',
+                        ['log_name',
+                         'path',
+                         'original_name',
+                         'vehicle',
+                         'date', 'length',
+                         't0', 't1',
+                         'size',
+                         'has_camera',
+                         'valid', 'error_if_invalid', ])
+
+# Increase when the table or the pickled PhysicalLog change
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    related TEXT NOT NULL,
+    sha1 TEXT,
+    log_name TEXT NOT NULL,
+    original_name TEXT NOT NULL,
+    vehicle TEXT,
+    date TEXT,
+    length REAL,
+    t0 REAL,
+    t1 REAL,
+    has_camera INTEGER,
+    valid INTEGER NOT NULL,
+    error_if_invalid TEXT,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS logs_log_name ON logs (log_name);
+CREATE INDEX IF NOT EXISTS logs_vehicle ON logs (vehicle);
+CREATE INDEX IF NOT EXISTS logs_date ON logs (date);
+"""
+
+SUMMARY_COLUMNS = 'log_name, path, original_name, vehicle, date, length, t0, t1, size, has_camera, valid, error_if_invalid'
+
+
+def get_local_logs_index():
+    """ Returns the index of the local logs, in the Duckietown cache directory. """
+    cache_dir = dtu.get_duckietown_cache_dir()
+    fn = os.path.join(cache_dir, EasyLogsConstants.LOCAL_INDEX)
+    return LocalLogsIndex(fn)
+
+
+class LocalLogsIndex(object):
+    """
+        An SQLite index of the local bag files.
+
+        Each bag is indexed by (path, size, mtime) and by the names of
+        the other resources of the log (videos, thumbnails, ...).
+        update() re-reads only the bags for which these changed.
+
+        The rows store the fields in LogSummary as columns, and the
+        pickled PhysicalLog.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        d = os.path.dirname(filename)
+        if d and not os.path.exists(d):
+            os.makedirs(d)
+        self.conn = sqlite3.connect(filename)
+        # plain str instead of unicode (as in the rest of the logs DB)
+        self.conn.text_factory = str
+        self._init_schema()
+
+    def _init_schema(self):
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != SCHEMA_VERSION:
+            if version != 0:
+                dtu.logger.info('Recreating the logs index %s' % dtu.friendly_path(self.filename))
+            self.conn.execute('DROP TABLE IF EXISTS logs')
+            self.conn.executescript(SCHEMA)
+            self.conn.execute('PRAGMA user_version = %d' % SCHEMA_VERSION)
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __getstate__(self):
+        return {'filename': self.filename}
+
+    def __setstate__(self, state):
+        self.__init__(state['filename'])
+
+    def update(self, filenames, base2basename2filename):
+        """
+            Makes the index reflect the bag files in filenames.
+
+            Returns the number of bags that were (re)indexed.
+        """
+        from .logs_db import physical_log_from_filename
+
+        known = {}
+        for row in self.conn.execute('SELECT path, size, mtime, related, log_name FROM logs'):
+            known[row[0]] = row[1:]
+
+        to_update = []
+        for filename in filenames:
+            st = os.stat(filename)
+            base = os.path.splitext(os.path.basename(filename))[0]
+            if filename in known:
+                size, mtime, related, log_name = known[filename]
+                same = ((size, mtime) == (st.st_size, st.st_mtime) and
+                        related == get_related(base2basename2filename, base, log_name))
+                if same:
+                    continue
+            to_update.append((filename, st, base))
+
+        # hash the bags and their resources in parallel
+        resources = []
+        for filename, _, base in to_update:
+            resources.append(filename)
+            resources.extend(base2basename2filename[base].values())
+        compute_hashes_in_parallel(resources)
+
+        for filename, st, base in to_update:
+            l = physical_log_from_filename(filename, base2basename2filename)
+            related = get_related(base2basename2filename, base, l.log_name)
+            self._write(filename, st.st_size, st.st_mtime, related, l)
+        nupdated = len(to_update)
+
+        gone = set(known) - set(filenames)
+        for filename in gone:
+            self.conn.execute('DELETE FROM logs WHERE path = ?', (filename,))
+        self.conn.commit()
+        if nupdated or gone:
+            dtu.logger.info('Logs index: updated %d, removed %d, total %d.' %
+                            (nupdated, len(gone), len(filenames)))
+        return nupdated
+
+    def _write(self, filename, size, mtime, related, l):
+        dtr = DTR.from_yaml(l.resources['bag'])
+        sha1 = dtr.hash.get('sha1', None)
+        data = sqlite3.Binary(pickle.dumps(l, pickle.HIGHEST_PROTOCOL))
+        self.conn.execute('INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                          (filename, size, mtime, related, sha1,
+                           l.log_name, dtr.name, l.vehicle, l.date, l.length,
+                           l.t0, l.t1, l.has_camera, l.valid, l.error_if_invalid, data))
+
+    def get_summaries(self):
+        """ Returns an OrderedDict str -> LogSummary, without loading the logs. """
+        res = OrderedDict()
+        q = 'SELECT sha1, %s FROM logs ORDER BY path' % SUMMARY_COLUMNS
+        sha1s = {}
+        for row in self.conn.execute(q):
+            sha1 = row[0]
+            s = LogSummary(*row[1:])
+            s = s._replace(has_camera=as_bool(s.has_camera), valid=as_bool(s.valid))
+            add_log(res, sha1s, s.log_name, s, s.path, sha1, verbose=False)
+        return res
+
+    def get_logs(self):
+        """ Returns an OrderedDict str -> PhysicalLog, with all the logs. """
+        res = OrderedDict()
+        sha1s = {}
+        for path, sha1, data in self.conn.execute('SELECT path, sha1, data FROM logs ORDER BY path'):
+            l = load_physical_log(data)
+            add_log(res, sha1s, l.log_name, l, path, sha1, verbose=True)
+        return res
+
+    def load_log(self, summary):
+        """
+            Returns the PhysicalLog corresponding to the LogSummary.
+
+            The time slice (t0, t1, length) is the one of the summary.
+        """
+        rows = self.conn.execute('SELECT data FROM logs WHERE path = ?', (summary.path,)).fetchall()
+        if not rows:
+            msg = 'The log %r is not in the index anymore.' % summary.log_name
+            raise KeyError(msg)
+        l = load_physical_log(rows[0][0])
+        return l._replace(t0=summary.t0, t1=summary.t1, length=summary.length)
+
+    def load_logs(self, logs):
+        """
+            Given an OrderedDict str -> (PhysicalLog or LogSummary),
+            loads the logs for the LogSummary values.
+        """
+        res = OrderedDict()
+        for k, v in logs.items():
+            if isinstance(v, LogSummary):
+                v = self.load_log(v)
+            res[k] = v
+        return res
+
+
+def load_physical_log(data):
+    l = pickle.loads(bytes(data))
+    assert isinstance(l, PhysicalLog), type(l)
+    return l
+
+
+def as_bool(x):
+    if x is None:
+        return None
+    return bool(x)
+
+
+def get_related(base2basename2filename, base, log_name):
+    """ Returns the other resources for the log, as a string. """
+    filenames = set()
+    for _base in set([base, log_name]):
+        filenames.update(base2basename2filename[_base].values())
+    return '\n'.join(sorted(filenames))
+
+
+def add_log(res, sha1s, log_name, l, path, sha1, verbose):
+    """
+        Adds the log l to res, unless it is a duplicate of a log
+        already there with the same bag (same sha1).
+
+        If there is another log with the same name, l replaces it.
+    """
+    if log_name in res:
+        if sha1s[log_name] == sha1:
+            if verbose:
+                msg = 'File is a duplicate: %s ' % path
+                dtu.logger.warn(msg)
+            return
+        if verbose:
+            msg = 'Found twice this log: %s' % log_name
+            msg += '\nProbably it is a processed version.'
+            msg += "\n\nVersion 1:"
+            msg += '\n\n' + dtu.indent(str(res[log_name]), '  ')
+            msg += "\n\n\nVersion 2:"
+            msg += '\n\ncurrent: %s' % path
+            msg += '\n\n' + dtu.indent(str(l), '  ')
+            dtu.logger.error(msg)
+
+    res[log_name] = l
+    sha1s[log_name] = sha1
@@ -22,8 +22,8 @@ from copy import deepcopy
 import os
 
 import duckietown_utils as dtu
-from duckietown_utils.test_hash import sha1_for_file_cached
-from .ipfs_utils import detect_ipfs, get_ipfs_hash_cached
+from duckietown_utils.test_hash import sha1_for_file_cached, sha1_for_files_cached
+from .ipfs_utils import detect_ipfs, get_ipfs_hash_cached, get_ipfs_hashes_cached
 
 has_ipfs = detect_ipfs()
 
@@ -60,6 +60,20 @@ class DTR(object):
         return DTR(dtrv, size, name, mime, hashes, urls, desc)
 
 
+def compute_hashes_in_parallel(filenames, nthreads=None):
+    """
+        Computes in parallel the (cached) hashes that create_dtr_version_1()
+        needs for the files, so that it does not need to compute them.
+    """
+    filenames = sorted(set(filenames))
+    if not filenames:
+        return
+    with dtu.timeit_wall("hashing %d files" % len(filenames), minimum=500):
+        sha1_for_files_cached(filenames, nthreads=nthreads)
+        if has_ipfs:
+            get_ipfs_hashes_cached(filenames, nthreads=nthreads)
+
+
 def create_dtr_version_1(filename):
     res = OrderedDict()
 
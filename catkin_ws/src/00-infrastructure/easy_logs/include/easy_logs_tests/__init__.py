@@ -1 +1 @@
-from . import summary, slicing, thumbnails_tests
+from . import summary, slicing, thumbnails_tests, logs_index_tests
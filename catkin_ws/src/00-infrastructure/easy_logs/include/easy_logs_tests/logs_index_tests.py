@@ -0,0 +1,94 @@
+import os
+
+import duckietown_utils as dtu
+from easy_logs.logs_db import EasyLogsDB, get_easy_logs_db2, LogsQueryIndex, query_logs, get_original_name
+from easy_logs.logs_index import LocalLogsIndex, LogSummary
+from easy_logs.logs_structure import PhysicalLog
+
+
+def get_indexed_db(n):
+    """ Returns the first n cloud logs and an EasyLogsDB indexing them. """
+    db_cloud = get_easy_logs_db2(do_not_use_cloud=False, do_not_use_local=True, ignore_cache=False)
+    logs = db_cloud.logs
+    names = list(logs)[:n]
+
+    d = dtu.create_tmpdir(prefix='logs_index_tests')
+    index = LocalLogsIndex(os.path.join(d, 'index.sqlite'))
+    for i, name in enumerate(names):
+        index._write('/not-existing/%03d.bag' % i, 100, 0.0, '', logs[name])
+
+    db = EasyLogsDB()
+    db.set_local_index(index)
+    return logs, names, index, db
+
+
+@dtu.unit_test
+def logs_index_summaries():
+    logs, names, index, _ = get_indexed_db(5)
+    summaries = index.get_summaries()
+    assert list(summaries) == names, (list(summaries), names)
+    for name in names:
+        s = summaries[name]
+        assert isinstance(s, LogSummary)
+        assert s.vehicle == logs[name].vehicle
+        assert s.length == logs[name].length
+        assert s.valid == logs[name].valid
+        assert index.load_log(s) == logs[name]
+    assert list(index.get_logs()) == names
+
+
+@dtu.unit_test
+def logs_index_query():
+    logs, names, _, db = get_indexed_db(5)
+
+    vehicle = logs[names[0]].vehicle
+    res = db.query('vehicle:%s' % vehicle)
+    assert names[0] in res
+    for v in res.values():
+        assert isinstance(v, PhysicalLog)
+        assert v.vehicle == vehicle
+
+    res = db.query(names[0] + '/{1:2}')
+    assert len(res) == 1
+    l = list(res.values())[0]
+    assert isinstance(l, PhysicalLog)
+    assert l.t0 == logs[names[0]].t0 + 1
+    assert l.length == 1
+
+    # no matches: the index is enough, and the logs are not loaded
+    index = db._local_index
+    try:
+        db.query('vehicle:not-a-vehicle')
+    except dtu.DTNoMatches:
+        pass
+    else:
+        raise Exception('Expected DTNoMatches')
+    assert db._local_index is index
+    assert not db._logs
+    res = db.query('vehicle:not-a-vehicle', raise_if_no_matches=False)
+    assert not res
+    assert db._local_index is index
+
+    # not an indexed field: falls back to loading the logs
+    res = db.query('bag_info:*')
+    assert not res or all(isinstance(v, PhysicalLog) for v in res.values())
+
+
+@dtu.unit_test
+def logs_query_index():
+    db_cloud = get_easy_logs_db2(do_not_use_cloud=False, do_not_use_local=True, ignore_cache=False)
+    logs = db_cloud.logs
+    name = list(logs)[0]
+    vehicle = logs[name].vehicle
+    index = LogsQueryIndex(logs)
+    queries = [name, get_original_name(logs[name]), 'vehicle:%s' % vehicle,
+               'vehicle:%s*' % vehicle[:2], 'vehicle:%s/first' % vehicle,
+               'date:%s' % logs[name].date, 'not-a-log']
+    for query in queries:
+        expected = query_logs(logs, query, raise_if_no_matches=False)
+        res = query_logs(logs, query, raise_if_no_matches=False, index=index)
+        assert list(res) == list(expected), (query, list(res), list(expected))
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -1,6 +1,8 @@
 import os
 
 import duckietown_utils as dtu
+from easy_logs.cli.artifacts import artifacts_up_to_date, get_artifacts_key, mark_artifacts_done
+from easy_logs.logs_db import get_easy_logs_db2
 
 
 @dtu.unit_test
@@ -17,6 +19,43 @@ def test_videos():
     run_one(cmd)
 
 
+@dtu.unit_test
+def test_thumbnails_parallel():
+    id_log = '20160429223659_neptunus'
+    outdir = dtu.create_tmpdir(prefix='thumbnails')
+    cmd = ['rosrun', 'easy_logs', 'thumbnails', id_log, '--workers', '2', '-o', outdir]
+    run_one(cmd)
+    out = os.path.join(outdir, id_log)
+    stamp = out + '.thumbnails.stamp'
+    thumbnails = out + '.thumbnails.jpg'
+    assert os.path.exists(stamp), stamp
+    assert os.path.exists(thumbnails), thumbnails
+    mtime = os.path.getmtime(thumbnails)
+    # the second time the log is skipped
+    run_one(cmd)
+    assert os.path.getmtime(thumbnails) == mtime
+
+
+@dtu.unit_test
+def test_artifacts_stamp():
+    db = get_easy_logs_db2(do_not_use_cloud=False, do_not_use_local=True, ignore_cache=False)
+    log = list(db.query('20160429223659_neptunus').values())[0]
+    key = get_artifacts_key(log, max_images=20)
+    assert key == get_artifacts_key(log, max_images=20)
+    assert key != get_artifacts_key(log, max_images=10)
+
+    d = dtu.create_tmpdir(prefix='artifacts')
+    out = os.path.join(d, 'out.jpg')
+    stamp = os.path.join(d, 'out.stamp')
+    dtu.write_data_to_file('data', out)
+    assert not artifacts_up_to_date(stamp, key)
+    mark_artifacts_done(stamp, key, [out])
+    assert artifacts_up_to_date(stamp, key)
+    assert not artifacts_up_to_date(stamp, get_artifacts_key(log, max_images=10))
+    os.unlink(out)
+    assert not artifacts_up_to_date(stamp, key)
+
+
 def run_one(cmd):
     v = False
     cwd = dtu.get_output_dir_for_test()
@@ -1 +1 @@
-from .easy_node import EasyNode
\ No newline at end of file
+from .easy_node import EasyNode, signal_parameters_changed
\ No newline at end of file
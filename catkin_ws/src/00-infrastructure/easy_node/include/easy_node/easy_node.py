@@ -1,7 +1,8 @@
 from UserDict import UserDict
 from contextlib import contextmanager
+import time
+
 import rospy
-import threading
 
 import duckietown_utils as dtu
 
@@ -9,12 +10,32 @@ from .node_description.configuration import PROCESS_THREADED, PROCESS_SYNCHRONOU
 from .node_description.configuration import load_configuration_package_node
 from .user_config.decide import get_user_configuration
 from .utils.timing import ProcessingTimingStats
+from .utils.worker_pool import WorkerPool
 
 
 __all__ = [
     'EasyNode',
+    'signal_parameters_changed',
 ]
 
+# Name of the parameter that is incremented to signal that
+# the other parameters changed (see en_update_params_on_signal)
+PARAMETERS_VERSION = 'en_parameters_version'
+
+
+def timed_decode(decode, data):
+    """
+        Returns (decode(data), timing), where timing are the arguments
+        for ProcessingTimingStats.timed_phase(); the stats are updated
+        later, by the callback, because they are not thread-safe.
+    """
+    t1 = time.time()
+    c1 = time.clock()
+    decoded = decode(data)
+    c2 = time.clock()
+    t2 = time.time()
+    return decoded, (c2 - c1, t2 - t1, t2)
+
 
 class EasyNode(object):
 
@@ -71,8 +92,28 @@ class EasyNode(object):
                 self.sub = sub
                 self.pts = ProcessingTimingStats()
 
-            def init_threaded(self):
-                self.thread_lock = threading.Lock()
+            def init_threaded(self, node, subscription):
+                callback_name = 'on_received_%s' % subscription.name
+                # optional decode_<subscription>(data), called concurrently
+                # by the workers; the callbacks are called one at a time
+                decode = getattr(node, 'decode_%s' % subscription.name, None)
+                if decode is not None:
+                    prepare = lambda data: timed_decode(decode, data)
+                else:
+                    prepare = None
+
+                def process(data, *prepared):
+                    node._sub_callback_threaded(callback_name, subscription, self, data, *prepared)
+
+                def on_discarded(_data):
+                    self.pts.decided_to_skip()
+
+                self.pool = WorkerPool(name=subscription.name, process=process,
+                                       policy=subscription.queue_policy,
+                                       depth=subscription.queue_depth,
+                                       num_workers=subscription.workers,
+                                       on_discarded=on_discarded,
+                                       prepare=prepare)
 
         class Callback():
             def __init__(self, node, subscription):
@@ -94,7 +135,7 @@ class EasyNode(object):
 
             self.info('Subscribed to %s' % s.topic)
             if s.process == PROCESS_THREADED:
-                sp.init_threaded()
+                sp.init_threaded(node=self, subscription=s)
 
     def _sub_callback(self, subscription, subscriber_proxy, data):
         subscriber_proxy.pts.received_message(data)
@@ -105,12 +146,9 @@ class EasyNode(object):
                 subscriber_proxy.pts.decided_to_process(data)
                 self._call_callback(callback_name, subscription, data)
             elif subscription.process == PROCESS_THREADED:
-                # Start a daemon thread to process the image
-                target = self._sub_callback_threaded
-                args = (callback_name, subscription, subscriber_proxy, data)
-                thread = threading.Thread(target=target, args=args)
-                thread.setDaemon(True)
-                thread.start()
+                # The worker pool processes it, or discards it according
+                # to the queue policy
+                subscriber_proxy.pool.put(data)
             else:
                 assert False, subscription.process
         else:
@@ -130,28 +168,31 @@ class EasyNode(object):
                     yield
 
             def get_stats(self):
-                return self.sp.pts.get_stats()
+                s = self.sp.pts.get_stats()
+                if self.subscription.process == PROCESS_THREADED:
+                    s += '\n' + self.sp.pool.get_stats()
+                return s
 
         context = Context(self, subscription)
         return context
 
-    def _sub_callback_threaded(self, callback_name, subscription, subscriber_proxy, data):
-        if not subscriber_proxy.thread_lock.acquire(False):
-            # TODO self.stats.skipped()
-            subscriber_proxy.pts.decided_to_skip()
-            return
-        try:
-            subscriber_proxy.pts.decided_to_process(data)
+    def _sub_callback_threaded(self, callback_name, subscription, subscriber_proxy, data, *prepared):
+        # called by one of the workers of subscriber_proxy.pool,
+        # never concurrently for the same subscription
+        subscriber_proxy.pts.decided_to_process(data)
+        if prepared:
+            # the result of timed_decode()
+            (decoded, timing), = prepared
+            subscriber_proxy.pts.timed_phase('decoding', *timing)
+            self._call_callback(callback_name, subscription, data, decoded)
+        else:
             self._call_callback(callback_name, subscription, data)
-        finally:
-            # Release the thread lock
-            subscriber_proxy.thread_lock.release()
 
-    def _call_callback(self, callback_name, subscription, data):
+    def _call_callback(self, callback_name, subscription, data, *decoded):
         c = getattr(self, callback_name)
         context = self._get_context(subscription)
         try:
-            c(context, data)
+            c(context, data, *decoded)
         finally:
             pass
 
@@ -209,6 +250,7 @@ class EasyNode(object):
             setattr(self.config, p.name, val)
             values[p.name] = val
             
+        self._parameters_version = rospy.get_param('~' + PARAMETERS_VERSION, None)  # @UndefinedVariable
         self. _on_parameters_changed(first_time=True, values=values)
 
         duration = self.config.en_update_params_interval
@@ -231,6 +273,13 @@ class EasyNode(object):
              
         
     def _update_parameters(self, _event):
+        if self.config.en_update_params_on_signal:
+            # Compare the parameters only if the version changed
+            version = rospy.get_param('~' + PARAMETERS_VERSION, None)  # @UndefinedVariable
+            if version == self._parameters_version:
+                return
+            self._parameters_version = version
+
         changed = self._get_changed_parameters()
 #         self.info('Parameters changed: %s' % sorted(changed))
         if changed:
@@ -261,6 +310,18 @@ class EasyNode(object):
         rospy.spin()  # @UndefinedVariable
 
 
+def signal_parameters_changed(node_name):
+    """
+        Signals to the EasyNode called node_name (e.g. "/robot/line_detector_node")
+        that its parameters were changed on the parameter server.
+
+        This is needed for the nodes with en_update_params_on_signal set.
+    """
+    name = rospy.names.ns_join(node_name, PARAMETERS_VERSION)  # @UndefinedVariable
+    version = rospy.get_param(name, 0)  # @UndefinedVariable
+    rospy.set_param(name, version + 1)  # @UndefinedVariable
+
+
 class UpdatedParameters(UserDict):
     def __init__(self, *args, **kwargs):
         UserDict.__init__(self, *args, **kwargs)
@@ -4,6 +4,8 @@ from types import NoneType
 
 import duckietown_utils as dtu
 
+from ..utils.worker_pool import QUEUE_POLICIES, QUEUE_LATEST
+
 __all__ = [
     'EasyNodeConfig',
     'load_configuration',
@@ -11,13 +13,19 @@ __all__ = [
 
 EasyNodeConfig = namedtuple('EasyNodeConfig', 'filename package_name node_type_name description parameters subscriptions contracts publishers')
 EasyNodeParameter = namedtuple('EasyNodeParameter', 'name desc type has_default default')
-EasyNodeSubscription = namedtuple('EasyNodeSubscription', 'name desc type topic queue_size process latch timeout')
+EasyNodeSubscription = namedtuple('EasyNodeSubscription', 'name desc type topic queue_size process latch timeout '
+                                  'queue_policy queue_depth workers')
 EasyNodePublisher = namedtuple('EasyNodePublisher', 'name desc type topic queue_size latch')
 
 PROCESS_THREADED = 'threaded'
 PROCESS_SYNCHRONOUS = 'synchronous'
 PROCESS_VALUES = [PROCESS_THREADED, PROCESS_SYNCHRONOUS]
 
+# Options for the threaded processing
+DEFAULT_QUEUE_POLICY = QUEUE_LATEST
+DEFAULT_QUEUE_DEPTH = 1
+DEFAULT_WORKERS = 1
+
 
 
 # type = int, bool, float, or None (anything)
@@ -248,6 +256,18 @@ def load_configuration_subscription(name, data):
         if not process in PROCESS_VALUES:
             msg = 'Invalid value of process %r not in %r.' % (process, PROCESS_VALUES)
             raise dtu.DTConfigException(msg)
+        queue_policy = data.pop('queue_policy', DEFAULT_QUEUE_POLICY)
+        queue_depth = data.pop('queue_depth', DEFAULT_QUEUE_DEPTH)
+        workers = data.pop('workers', DEFAULT_WORKERS)
+        if not queue_policy in QUEUE_POLICIES:
+            msg = 'Invalid value of queue_policy %r not in %r.' % (queue_policy, QUEUE_POLICIES)
+            raise dtu.DTConfigException(msg)
+        if not isinstance(queue_depth, int) or queue_depth < 1:
+            msg = 'Invalid value of queue_depth %r.' % queue_depth
+            raise dtu.DTConfigException(msg)
+        if not isinstance(workers, int) or workers < 1:
+            msg = 'Invalid value of workers %r.' % workers
+            raise dtu.DTConfigException(msg)
 
     except KeyError as e:
         msg = 'Could not find field %r.' % e
@@ -263,7 +283,9 @@ def load_configuration_subscription(name, data):
     T = message_class_from_string(type_)
 
     return EasyNodeSubscription(name=name, desc=desc, topic=topic, timeout=timeout,
-                                type=T, queue_size=queue_size, latch=latch, process=process)
+                                type=T, queue_size=queue_size, latch=latch, process=process,
+                                queue_policy=queue_policy, queue_depth=queue_depth,
+                                workers=workers)
 
 
 def load_configuration_publisher(name, data):
@@ -364,6 +386,10 @@ def format_enc_subscriptions(enc, descriptions):
             options.append('latch = %s ' %  p.latch)
         if p.timeout is not None:
             options.append('timeout = %s ' %  p.timeout)
+        if p.process == PROCESS_THREADED:
+            options.append('queue_policy = %s' % p.queue_policy)
+            options.append('queue_depth = %s' % p.queue_depth)
+            options.append('workers = %s' % p.workers)
 
         options = '\n'.join(options)
         table.append([p.name, p.type.__name__, p.topic, options, p.process, desc])
@@ -1,4 +1,4 @@
-from collections import defaultdict
+from collections import defaultdict, deque
 from contextlib import contextmanager
 import time
 import duckietown_utils as dtu
@@ -49,9 +49,13 @@ class ProcessingTimingStats(object):
                 ...
                 
         A call to reset() resets all counters.
+        
+        Each statistic keeps only the last `window` values (see SingleStat),
+        so the memory used does not grow with the number of messages.
     """
     
-    def __init__(self):
+    def __init__(self, window=1000):
+        self.window = window
         self.num_resets = 0
         self.reset()
         
@@ -59,7 +63,7 @@ class ProcessingTimingStats(object):
         self.events = []
         self.last_msg_received = None
         self.last_msg_being_processed = None
-        self.stats = defaultdict(lambda: SingleStat())
+        self.stats = defaultdict(lambda: SingleStat(self.window))
         self.phase_names = []
         
     def received_message(self, msg=None):
@@ -106,11 +110,26 @@ class ProcessingTimingStats(object):
                 t2 = time.time()
                 delta_clock = c2 - c1
                 delta_wall = t2 - t1
-                latency_from_acquisition = t2 - self.last_msg_being_processed
     
-            self.stats[(phase_name, 'clock')].sample(delta_clock)
-            self.stats[(phase_name, 'wall')].sample(delta_wall)
-            self.stats[(phase_name, 'latency')].sample(latency_from_acquisition)
+            self._sample_phase(phase_name, delta_clock, delta_wall, t2)
+
+    def timed_phase(self, phase_name, delta_clock, delta_wall, t_end):
+        """
+            Records a phase that was timed elsewhere, for example in
+            another thread; t_end is the time.time() at which it finished.
+        """
+        if not phase_name in self.phase_names:
+            self.phase_names.append(phase_name)
+        if self.last_msg_being_processed is None:
+            msg = 'Did not call decided_to_process() before?'
+            raise ValueError(msg)
+        self._sample_phase(phase_name, delta_clock, delta_wall, t_end)
+
+    def _sample_phase(self, phase_name, delta_clock, delta_wall, t_end):
+        latency_from_acquisition = t_end - self.last_msg_being_processed
+        self.stats[(phase_name, 'clock')].sample(delta_clock)
+        self.stats[(phase_name, 'wall')].sample(delta_wall)
+        self.stats[(phase_name, 'latency')].sample(latency_from_acquisition)
     
     def get_stats(self):
         s = ""
@@ -138,8 +157,12 @@ class ProcessingTimingStats(object):
             total_latency = dtu.seconds_as_ms(stats_latency.last_value())
             delta_wall = dtu.seconds_as_ms(stats_wall.last_value())
             delta_clock = dtu.seconds_as_ms(stats_clock.last_value())
-            msg = ('%s | total latency %10s | delta wall %10s | delta clock %10s' %
-                   (phase_name.ljust(l), total_latency, delta_wall, delta_clock))
+            mean_wall = dtu.seconds_as_ms(stats_wall.mean())
+            p90_wall = dtu.seconds_as_ms(stats_wall.quantile(0.9))
+            msg = ('%s | total latency %10s | delta wall %10s | delta clock %10s'
+                   ' | mean wall %10s | 90%% wall %10s' %
+                   (phase_name.ljust(l), total_latency, delta_wall, delta_clock,
+                    mean_wall, p90_wall))
             s += '\n' + msg
         return s
 #                 acquired | total latency 49737091899.9ms | delta wall     None clock     None
@@ -154,41 +177,92 @@ class ProcessingTimingStats(object):
 #    pub_edge/pub_segment | total latency 49737091910.8ms | delta wall    1.1ms clock    1.1ms
    
 class SingleStat(object):
-    
-    def __init__(self):
-        self.times = []
-        self.values = []
-    
+    """
+        Statistics of a stream of samples, using bounded memory.
+
+        Only the last `window` values are stored (a ring buffer).
+        The count, mean, min and max are updated at each sample and
+        refer to all the samples; the quantiles are computed on the
+        values in the ring buffer.
+
+        The value of a sample can be None (only the time is recorded).
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.first_time = None
+        self.last_time = None
+        self.count = 0
+        # aggregates of the values that are not None
+        self.count_values = 0
+        self.sum_values = 0.0
+        self.min_value = None
+        self.max_value = None
+
     def sample(self, v=None):
 #         t = rospy.get_time()  # @UndefinedVariable
         t = time.time()
-        self.times.append(t)
+        if self.first_time is None:
+            self.first_time = t
+        self.last_time = t
+        self.count += 1
         self.values.append(v)
+        if v is not None:
+            self.count_values += 1
+            self.sum_values += v
+            if self.min_value is None or v < self.min_value:
+                self.min_value = v
+            if self.max_value is None or v > self.max_value:
+                self.max_value = v
 
     def last_value(self):
         if self.values:
             return self.values[-1]
         else:
             return None
-    
+
     def num(self):
         """ Returns the number of samples. """
-        return len(self.times)
-    
+        return self.count
+
+    def mean(self):
+        """ Returns the mean of the values, or None if there are none. """
+        if self.count_values == 0:
+            return None
+        return self.sum_values / self.count_values
+
+    def quantile(self, q):
+        """
+            Returns the q-quantile (0 <= q <= 1) of the values in the
+            ring buffer, or None if there are none.
+        """
+        if not (0 <= q <= 1):
+            msg = 'Invalid quantile %r.' % q
+            raise ValueError(msg)
+        values = sorted(_ for _ in self.values if _ is not None)
+        if not values:
+            return None
+        i = int(round(q * (len(values) - 1)))
+        return values[i]
+
     def fps(self):
         """ Returns the frames per second as a string. """
         n = self.num()
-        if n == 0:
+        duration = self.duration()
+        if n == 0 or duration == 0:
             return '0 fps'
         else:
-            duration = self.duration()
             f = n / duration
             return '%.1f fps' % f
-             
+
     def duration(self):
-        delta = time.time()
-        return delta - self.times[0]
-    
+        """ Returns the time since the first sample (0 if there are none). """
+        if self.first_time is None:
+            return 0.0
+        return time.time() - self.first_time
+
+
 def get_percentage(i, n):
     if n == 0: 
         return '0 %'
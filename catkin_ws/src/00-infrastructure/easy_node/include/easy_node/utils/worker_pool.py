@@ -0,0 +1,159 @@
+from collections import deque
+import threading
+import traceback
+
+import duckietown_utils as dtu
+
+__all__ = [
+    'WorkerPool',
+    'QUEUE_LATEST',
+    'QUEUE_FIFO',
+    'QUEUE_DROP_OLDEST',
+    'QUEUE_POLICIES',
+]
+
+# Only the most recent message is kept waiting;
+# a new message replaces the waiting one (coalesced).
+QUEUE_LATEST = 'latest'
+# Up to `depth` messages are kept waiting;
+# a new message is dropped if the queue is full.
+QUEUE_FIFO = 'fifo'
+# Up to `depth` messages are kept waiting;
+# the oldest waiting message is dropped if the queue is full.
+QUEUE_DROP_OLDEST = 'drop-oldest'
+
+QUEUE_POLICIES = [QUEUE_LATEST, QUEUE_FIFO, QUEUE_DROP_OLDEST]
+
+
+class WorkerPool(object):
+    """
+        A fixed number of daemon threads that call process(item)
+        for the items given to put().
+
+        The calls to process() never overlap, and they happen in the
+        order in which the items were taken from the queue. If prepare
+        is given, the workers call prepared = prepare(item) concurrently,
+        and then process(item, prepared) one at a time; so only prepare()
+        needs to be thread-safe, and more than one worker only helps if
+        there is one.
+
+        The items that are waiting are kept in a queue, whose behavior
+        when full is decided by `policy` (one of QUEUE_POLICIES).
+
+        on_discarded(item) is called for each item that is not going
+        to be processed. The counters num_dropped and num_coalesced
+        count those items; num_processed counts the processed ones.
+    """
+
+    def __init__(self, name, process, policy=QUEUE_LATEST, depth=1, num_workers=1,
+                 on_discarded=None, prepare=None):
+        if not policy in QUEUE_POLICIES:
+            msg = 'Invalid queue policy %r not in %r.' % (policy, QUEUE_POLICIES)
+            raise ValueError(msg)
+        if policy == QUEUE_LATEST:
+            depth = 1
+        if depth < 1:
+            msg = 'Invalid queue depth %r.' % depth
+            raise ValueError(msg)
+        if num_workers < 1:
+            msg = 'Invalid number of workers %r.' % num_workers
+            raise ValueError(msg)
+
+        self.name = name
+        self.process = process
+        self.prepare = prepare
+        self.policy = policy
+        self.depth = depth
+        self.num_workers = num_workers
+        self.on_discarded = on_discarded
+
+        self.num_dropped = 0
+        self.num_coalesced = 0
+        self.num_processed = 0
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        # sequence number of the next item taken from the queue,
+        # and of the item whose turn it is to be processed
+        self._next_seq = 0
+        self._turn_seq = 0
+        self._turn = threading.Condition()
+        self._threads = []
+        for i in range(num_workers):
+            thread = threading.Thread(target=self._work,
+                                      name='%s-%d' % (name, i))
+            thread.setDaemon(True)
+            thread.start()
+            self._threads.append(thread)
+
+    def put(self, item):
+        """ Queues the item, applying the queue policy. """
+        discarded = None
+        with self._condition:
+            if len(self._queue) < self.depth:
+                self._queue.append(item)
+            elif self.policy == QUEUE_LATEST:
+                discarded = self._queue.popleft()
+                self._queue.append(item)
+                self.num_coalesced += 1
+            elif self.policy == QUEUE_DROP_OLDEST:
+                discarded = self._queue.popleft()
+                self._queue.append(item)
+                self.num_dropped += 1
+            elif self.policy == QUEUE_FIFO:
+                discarded = item
+                self.num_dropped += 1
+            else:
+                assert False, self.policy
+            self._condition.notify()
+
+        if discarded is not None and self.on_discarded is not None:
+            self.on_discarded(discarded)
+
+    def num_waiting(self):
+        with self._condition:
+            return len(self._queue)
+
+    def get_stats(self):
+        return ('queue %s (depth %d, %d workers): processed %d dropped %d coalesced %d' %
+                (self.policy, self.depth, self.num_workers,
+                 self.num_processed, self.num_dropped, self.num_coalesced))
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                item = self._queue.popleft()
+                seq = self._next_seq
+                self._next_seq += 1
+
+            prepared = None
+            ok = True
+            if self.prepare is not None:
+                try:
+                    prepared = self.prepare(item)
+                except Exception:
+                    msg = 'Error while preparing in %s:\n%s' % (self.name, traceback.format_exc())
+                    dtu.logger.error(msg)
+                    ok = False
+
+            with self._turn:
+                while self._turn_seq != seq:
+                    self._turn.wait()
+            try:
+                if ok:
+                    if self.prepare is not None:
+                        self.process(item, prepared)
+                    else:
+                        self.process(item)
+            except Exception:
+                # keep the worker alive
+                msg = 'Error while processing in %s:\n%s' % (self.name, traceback.format_exc())
+                dtu.logger.error(msg)
+            finally:
+                with self._turn:
+                    self._turn_seq += 1
+                    self._turn.notify_all()
+            with self._condition:
+                self.num_processed += 1
@@ -1,2 +1,5 @@
 from . import summary
 from . import test_configuration 
+from . import timing_tests
+from . import worker_pool_tests
+from . import parameters_tests
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import rospy
+
+import duckietown_utils as dtu
+from easy_node import EasyNode, signal_parameters_changed
+from easy_node.node_description.configuration import EasyNodeParameter
+
+NODE_NAME = '/robot/test_node'
+
+
+@contextmanager
+def fake_parameter_server(node_name):
+    """ Replaces rospy.get_param() and rospy.set_param() with a dict. """
+    server = {}
+
+    def resolve(name):
+        if name.startswith('~'):
+            name = rospy.names.ns_join(node_name, name[1:])  # @UndefinedVariable
+        return name
+
+    _missing = object()
+
+    def get_param(name, default=_missing):
+        name = resolve(name)
+        if name in server:
+            return server[name]
+        if default is _missing:
+            raise KeyError(name)
+        return default
+
+    def set_param(name, value):
+        server[resolve(name)] = value
+
+    get0, set0 = rospy.get_param, rospy.set_param  # @UndefinedVariable
+    rospy.get_param, rospy.set_param = get_param, set_param
+    try:
+        yield server
+    finally:
+        rospy.get_param, rospy.set_param = get0, set0
+
+
+class ParametersNode(EasyNode):
+    """ An EasyNode without ROS: only what _update_parameters() needs. """
+
+    def __init__(self, values):
+        self.node_type_name = 'test_node'
+        names = list(values) + ['en_update_params_on_signal']
+        parameters = OrderedDict((name, EasyNodeParameter(name=name, desc=None, type=None,
+                                                          has_default=False, default=None))
+                                 for name in names)
+
+        class Configuration():
+            pass
+        self._configuration = Configuration()
+        self._configuration.parameters = parameters
+
+        class Config():
+            pass
+        self.config = Config()
+        for k, v in values.items():
+            setattr(self.config, k, v)
+            rospy.set_param('~' + k, v)  # @UndefinedVariable
+        self.config.en_update_params_on_signal = True
+        rospy.set_param('~en_update_params_on_signal', True)  # @UndefinedVariable
+
+        self._parameters_version = None
+        self.num_get_changed = 0
+        self.changes = []
+
+    def _get_changed_parameters(self):
+        self.num_get_changed += 1
+        return EasyNode._get_changed_parameters(self)
+
+    def on_parameters_changed(self, first_time, updated):
+        self.changes.append((first_time, dict(updated)))
+
+
+@dtu.unit_test
+def update_parameters_on_signal():
+    with fake_parameter_server(NODE_NAME):
+        node = ParametersNode({'a': 1, 'b': 'two'})
+
+        # the version did not change: the parameters are not compared
+        rospy.set_param('~a', 10)  # @UndefinedVariable
+        for _ in range(3):
+            node._update_parameters(None)
+        assert node.num_get_changed == 0, node.num_get_changed
+        assert node.changes == [], node.changes
+        assert node.config.a == 1
+
+        signal_parameters_changed(NODE_NAME)
+        node._update_parameters(None)
+        assert node.num_get_changed == 1, node.num_get_changed
+        assert node.changes == [(False, {'a': 10})], node.changes
+        assert node.config.a == 10
+
+        # no other signal
+        node._update_parameters(None)
+        assert node.num_get_changed == 1, node.num_get_changed
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,69 @@
+import time
+
+import duckietown_utils as dtu
+from easy_node.utils.timing import ProcessingTimingStats, SingleStat
+
+
+@dtu.unit_test
+def single_stat_bounded():
+    s = SingleStat(window=10)
+    assert s.num() == 0
+    assert s.mean() is None
+    assert s.quantile(0.5) is None
+    assert s.last_value() is None
+
+    for i in range(1000):
+        s.sample(float(i))
+
+    assert len(s.values) == 10
+    assert s.num() == 1000
+    assert s.last_value() == 999.0
+    assert s.min_value == 0.0
+    assert s.max_value == 999.0
+    assert s.mean() == 499.5
+    # quantiles refer to the last 10 values
+    assert s.quantile(0) == 990.0
+    assert s.quantile(1) == 999.0
+
+
+@dtu.unit_test
+def single_stat_without_values():
+    s = SingleStat(window=10)
+    for _ in range(20):
+        s.sample()
+    assert s.num() == 20
+    assert s.mean() is None
+    assert s.quantile(0.9) is None
+
+
+@dtu.unit_test
+def processing_timing_stats_bounded():
+    pts = ProcessingTimingStats(window=5)
+    for _ in range(100):
+        pts.received_message()
+        pts.decided_to_process()
+        with pts.phase('one'):
+            pass
+    stat = pts.stats[('one', 'wall')]
+    assert stat.num() == 100
+    assert len(stat.values) == 5
+    s = pts.get_stats()
+    assert 'mean wall' in s, s
+
+
+@dtu.unit_test
+def processing_timing_stats_timed_phase():
+    pts = ProcessingTimingStats()
+    pts.received_message()
+    pts.decided_to_process()
+    pts.timed_phase('decoding', 0.001, 0.002, time.time())
+    with pts.phase('one'):
+        pass
+    assert pts.phase_names == ['decoding', 'one'], pts.phase_names
+    assert pts.stats[('decoding', 'wall')].last_value() == 0.002
+    assert pts.stats[('decoding', 'clock')].last_value() == 0.001
+    assert 'decoding' in pts.get_stats()
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import duckietown_utils as dtu
+from easy_node.utils.worker_pool import WorkerPool, QUEUE_LATEST, QUEUE_FIFO, QUEUE_DROP_OLDEST
+
+
+def run_pool(policy, depth, n):
+    """
+        Puts the items 0..n-1 while the (only) worker is blocked on
+        the first one. Returns the pool, the processed and the discarded items.
+    """
+    processed = []
+    discarded = []
+    started = threading.Event()
+    go_on = threading.Event()
+
+    def process(item):
+        started.set()
+        go_on.wait()
+        processed.append(item)
+
+    pool = WorkerPool('test', process, policy=policy, depth=depth,
+                      on_discarded=discarded.append)
+    pool.put(0)
+    started.wait()
+    for i in range(1, n):
+        pool.put(i)
+    go_on.set()
+    wait_for(lambda: pool.num_processed + len(discarded) == n)
+    return pool, processed, discarded
+
+
+def wait_for(f, timeout=5.0):
+    t0 = time.time()
+    while not f():
+        if time.time() - t0 > timeout:
+            raise Exception('Timeout')
+        time.sleep(0.001)
+
+
+@dtu.unit_test
+def worker_pool_latest():
+    pool, processed, discarded = run_pool(QUEUE_LATEST, 1, 5)
+    assert processed == [0, 4], processed
+    assert discarded == [1, 2, 3], discarded
+    assert pool.num_coalesced == 3
+    assert pool.num_dropped == 0
+
+
+@dtu.unit_test
+def worker_pool_fifo():
+    pool, processed, discarded = run_pool(QUEUE_FIFO, 2, 6)
+    assert processed == [0, 1, 2], processed
+    assert discarded == [3, 4, 5], discarded
+    assert pool.num_dropped == 3
+    assert pool.num_coalesced == 0
+
+
+@dtu.unit_test
+def worker_pool_drop_oldest():
+    pool, processed, discarded = run_pool(QUEUE_DROP_OLDEST, 2, 6)
+    assert processed == [0, 4, 5], processed
+    assert discarded == [1, 2, 3], discarded
+    assert pool.num_dropped == 3
+
+
+@dtu.unit_test
+def worker_pool_survives_errors():
+    processed = []
+
+    def process(item):
+        if item == 0:
+            raise ValueError(item)
+        processed.append(item)
+
+    pool = WorkerPool('test', process, policy=QUEUE_FIFO, depth=10)
+    pool.put(0)
+    pool.put(1)
+    wait_for(lambda: pool.num_processed == 2)
+    assert processed == [1]
+
+
+@dtu.unit_test
+def worker_pool_serializes_process():
+    n = 40
+    processed = []
+    prepared = set()
+    active = [0]
+    overlapped = []
+    all_prepared = threading.Event()
+    lock = threading.Lock()
+
+    def prepare(item):
+        with lock:
+            prepared.add(item)
+            if len(prepared) == 4:
+                all_prepared.set()
+        # the first items wait until 4 of them are being prepared at once
+        if item < 4:
+            assert all_prepared.wait(5.0), 'prepare() is not called concurrently'
+        return item * 2
+
+    def process(item, result):
+        active[0] += 1
+        if active[0] > 1:
+            overlapped.append(item)
+        time.sleep(0.001)
+        assert result == item * 2
+        processed.append(item)
+        active[0] -= 1
+
+    pool = WorkerPool('test', process, policy=QUEUE_FIFO, depth=n, num_workers=4,
+                      prepare=prepare)
+    for i in range(n):
+        pool.put(i)
+    wait_for(lambda: pool.num_processed == n)
+    assert not overlapped, overlapped
+    assert processed == list(range(n)), processed
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
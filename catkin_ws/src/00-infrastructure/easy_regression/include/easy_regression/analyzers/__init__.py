@@ -1,4 +1,4 @@
 from .count_messages import *
 from .show_topics import *
 from .signal_stats import *
-
+from .streaming_stats import *
@@ -1,34 +1,41 @@
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict
 
-import duckietown_utils as dtu
 from easy_regression.analyzer_interface import AnalyzerInterface
 from easy_regression.cli.processing import interpret_ros
-import numpy as np
+
+from .streaming_stats import StreamingStats
 
 __all__ = ['SignalStats']
 
 
 class SignalStats(AnalyzerInterface):
+    """
+        Statistics of the std_msgs/Float64 topics.
+
+        The values are not stored: each log is summarized by
+        StreamingStats (count, mean, variance, min, max, quantiles),
+        and the summaries of different logs are merged in reduce().
+    """
 
     def analyze_log(self, bag_in, dict_out):
         topic2type = look_for_topics(bag_in)
 
-        topic2data = defaultdict(lambda: [])
-        topic2timestamp = defaultdict(lambda: [])
+        topic2stats = OrderedDict()
+        topic2interval = OrderedDict()
 
         for topic, msg, t in bag_in.read_messages(topics=list(topic2type)):
             data = interpret_ros(msg)
             timestamp = t.to_sec()
-            topic2data[topic].append(data)
-            topic2timestamp[topic].append(timestamp)
-
-        for topic in topic2data:
-            value = np.array(topic2data[topic])
-            timestamp = np.array(topic2timestamp[topic])
-            # print topic, value.dtype, value.shape
+            if not topic in topic2stats:
+                topic2stats[topic] = StreamingStats()
+                topic2interval[topic] = [timestamp, timestamp]
+            topic2stats[topic].add_many(data)
+            topic2interval[topic][1] = timestamp
 
+        for topic, stats in topic2stats.items():
             sane = self.name_from_topic(topic)
-            dict_out[sane] = compute_stats(timestamp, value)
+            t0, t1 = topic2interval[topic]
+            dict_out[sane] = compute_stats(t0, t1, stats)
 
     def name_from_topic(self, topic):
         """ Sanitize the topic:
@@ -41,11 +48,15 @@ class SignalStats(AnalyzerInterface):
         return sane
 
     def reduce(self, a, b, a_plus_b):
-        topics = set(a)  #(a) + list(b))
+        topics = list(a) + [_ for _ in b if not _ in a]
         for topic in topics:
-            a_plus_b[topic] = OrderedDict()
-            print(topic + ' ----------- ')
-            reduce_stats(a[topic], b[topic], a_plus_b[topic])
+            if not topic in b:
+                a_plus_b[topic] = a[topic]
+            elif not topic in a:
+                a_plus_b[topic] = b[topic]
+            else:
+                a_plus_b[topic] = OrderedDict()
+                reduce_stats(a[topic], b[topic], a_plus_b[topic])
 
     def summarize_as_text(self, res):
         raise NotImplementedError()
@@ -56,30 +67,19 @@ class SignalStats(AnalyzerInterface):
         raise NotImplementedError()
 
 
-def compute_stats(timestamps, values):
+def compute_stats(t0, t1, stats):
     res = OrderedDict()
     res['num_log_segments'] = 1
-    res['length'] = float(timestamps[-1] - timestamps[0])
-    res['nsamples'] = len(timestamps)
-    res['mean'] = float(np.mean(values))
-    res['min'] = float(np.min(values))
-    res['max'] = float(np.max(values))
-    res['median'] = float(np.max(values))
+    res['length'] = float(t1 - t0)
+    res.update(stats.to_yaml())
     return res
 
 
 def reduce_stats(a, b, a_plus_b):
     a_plus_b['num_log_segments'] = a['num_log_segments'] + b['num_log_segments']
     a_plus_b['length'] = a['length'] + b['length']
-    a_plus_b['nsamples'] = a['nsamples'] + b['nsamples']
-    a_plus_b['mean'] = (a['mean'] * a['nsamples'] + b['mean'] * b['nsamples']) / a_plus_b['nsamples']
-    a_plus_b['min'] = min(a['min'], b['min'])
-    a_plus_b['max'] = max(a['max'], b['max'])
-    # Note: it is not possible to compute the median in an efficient manner
-    a_plus_b['median'] = (a['median'] + b['median']) / 2.0
-    print dtu.indent(a, 'a: ')
-    print dtu.indent(b, 'b: ')
-    print dtu.indent(a_plus_b, 'a_plus_b: ')
+    stats = StreamingStats.from_yaml(a).merge(StreamingStats.from_yaml(b))
+    a_plus_b.update(stats.to_yaml())
 
 
 def look_for_topics(bag):
@@ -0,0 +1,217 @@
+from collections import OrderedDict
+import math
+
+import numpy as np
+
+__all__ = [
+    'StreamingStats',
+    'QuantileSketch',
+]
+
+
+class QuantileSketch(object):
+    """
+        A mergeable summary of a distribution, from which the quantiles
+        can be estimated (a "merging t-digest").
+
+        The values are summarized by at most ~compression centroids
+        (mean, weight). The centroids are smaller at the tails, so the
+        extreme quantiles (p99) are more precise than the median.
+    """
+
+    def __init__(self, compression=100, means=(), weights=()):
+        self.compression = compression
+        self.means = list(means)
+        self.weights = list(weights)
+        self._buffer = []
+
+    def add(self, x):
+        self._buffer.append(float(x))
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def add_many(self, xs):
+        self._buffer.extend(np.asarray(xs, dtype='float64').flat)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other):
+        """ Returns a new sketch that summarizes the values of both. """
+        self._compress()
+        other._compress()
+        res = QuantileSketch(max(self.compression, other.compression),
+                             self.means + other.means, self.weights + other.weights)
+        res._compress(force=True)
+        return res
+
+    def count(self):
+        return sum(self.weights) + len(self._buffer)
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inv(self, k):
+        k = min(k, self.compression / 4.0)
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self, force=False):
+        if not self._buffer and not force:
+            return
+        means = np.array(self.means + self._buffer, dtype='float64')
+        weights = np.array(self.weights + [1.0] * len(self._buffer), dtype='float64')
+        self._buffer = []
+        if len(means) == 0:
+            return
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+        total = float(np.sum(weights))
+
+        new_means = []
+        new_weights = []
+        w_so_far = 0.0
+        q_limit = self._k_inv(self._k(0.0) + 1)
+        sigma_mean = means[0]
+        sigma_weight = weights[0]
+        for m, w in zip(means[1:], weights[1:]):
+            q = (w_so_far + sigma_weight + w) / total
+            if q <= q_limit:
+                sigma_mean += (m - sigma_mean) * w / (sigma_weight + w)
+                sigma_weight += w
+            else:
+                new_means.append(float(sigma_mean))
+                new_weights.append(float(sigma_weight))
+                w_so_far += sigma_weight
+                q_limit = self._k_inv(self._k(w_so_far / total) + 1)
+                sigma_mean = m
+                sigma_weight = w
+        new_means.append(float(sigma_mean))
+        new_weights.append(float(sigma_weight))
+        self.means = new_means
+        self.weights = new_weights
+
+    def quantile(self, q, vmin, vmax):
+        """
+            Returns the estimate of the q-quantile, 0 <= q <= 1.
+
+            vmin, vmax are the exact minimum and maximum of the values.
+        """
+        self._compress()
+        if not self.means:
+            return None
+        weights = np.array(self.weights)
+        total = float(np.sum(weights))
+        # the mass of each centroid is around its mean
+        mids = (np.cumsum(weights) - weights / 2.0) / total
+        xs = np.concatenate(([0.0], mids, [1.0]))
+        ys = np.concatenate(([vmin], self.means, [vmax]))
+        return float(np.interp(q, xs, ys))
+
+    def to_yaml(self):
+        self._compress()
+        res = OrderedDict()
+        res['compression'] = self.compression
+        res['means'] = list(self.means)
+        res['weights'] = list(self.weights)
+        return res
+
+    @staticmethod
+    def from_yaml(data):
+        return QuantileSketch(data['compression'], data['means'], data['weights'])
+
+
+class StreamingStats(object):
+    """
+        Count, mean, variance, min, max and quantiles of a signal,
+        computed without keeping the values.
+
+        Two summaries can be merged, so the statistics over many logs
+        are computed from the per-log summaries.
+    """
+
+    QUANTILES = OrderedDict([('median', 0.5), ('p90', 0.9), ('p99', 0.99)])
+
+    def __init__(self, compression=100):
+        self.nsamples = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of the squared differences from the mean
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch(compression)
+
+    def add(self, x):
+        x = float(x)
+        # Welford's algorithm
+        self.nsamples += 1
+        delta = x - self.mean
+        self.mean += delta / self.nsamples
+        self.m2 += delta * (x - self.mean)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+        self.sketch.add(x)
+
+    def add_many(self, xs):
+        xs = np.asarray(xs, dtype='float64').flatten()
+        if len(xs) == 0:
+            return
+        batch = StreamingStats()
+        batch.nsamples = len(xs)
+        batch.mean = float(np.mean(xs))
+        batch.m2 = float(np.sum((xs - batch.mean) ** 2))
+        batch.min = float(np.min(xs))
+        batch.max = float(np.max(xs))
+        self._add_moments(batch)
+        self.sketch.add_many(xs)
+
+    def _add_moments(self, other):
+        """ Adds the count, mean, variance, min, max of other (Chan et al.). """
+        n = self.nsamples + other.nsamples
+        if n > 0:
+            delta = other.mean - self.mean
+            self.mean = self.mean + delta * other.nsamples / float(n)
+            self.m2 = self.m2 + other.m2 + delta * delta * self.nsamples * other.nsamples / float(n)
+        self.nsamples = n
+        mins = [_ for _ in [self.min, other.min] if _ is not None]
+        maxs = [_ for _ in [self.max, other.max] if _ is not None]
+        self.min = min(mins) if mins else None
+        self.max = max(maxs) if maxs else None
+
+    def merge(self, other):
+        """ Returns the summary of the values of both. """
+        res = StreamingStats()
+        res._add_moments(self)
+        res._add_moments(other)
+        res.sketch = self.sketch.merge(other.sketch)
+        return res
+
+    def variance(self):
+        if self.nsamples == 0:
+            return None
+        return self.m2 / self.nsamples
+
+    def quantile(self, q):
+        return self.sketch.quantile(q, self.min, self.max)
+
+    def to_yaml(self):
+        """ Returns the results as a dict that can be serialized. """
+        res = OrderedDict()
+        res['nsamples'] = self.nsamples
+        res['mean'] = float(self.mean)
+        res['variance'] = self.variance()
+        res['min'] = self.min
+        res['max'] = self.max
+        for name, q in self.QUANTILES.items():
+            res[name] = self.quantile(q)
+        res['quantile_sketch'] = self.sketch.to_yaml()
+        return res
+
+    @staticmethod
+    def from_yaml(data):
+        res = StreamingStats()
+        res.nsamples = data['nsamples']
+        res.mean = data['mean']
+        res.m2 = (data['variance'] or 0.0) * data['nsamples']
+        res.min = data['min']
+        res.max = data['max']
+        res.sketch = QuantileSketch.from_yaml(data['quantile_sketch'])
+        return res
@@ -4,6 +4,7 @@ import os
 import duckietown_utils as dtu
 from easy_algo import get_easy_algo_db
 from easy_regression.analyzer_interface import AnalyzerInterface
+from easy_regression.cli.scheduling import SharedReadBag
 import rosbag
 
 
@@ -41,6 +42,8 @@ def table_for_analyzer(results_all):
             elif isinstance(value, dict):
                 s = ""
                 for mk, mv in value.items():
+                    if isinstance(mv, (list, dict)):
+                        mv = type(mv).__name__
                     s += '\n %s  %s' % (mk, mv)
                 row.append(s)
             else:
@@ -68,23 +71,40 @@ def job_merge(results, analyzer):
 
 @dtu.contract(analyzer=AnalyzerInterface)
 def merge_n(analyzer, results):
-    if len(results) == 1:
-        return results[0]
-    else:
-        first = results[0]
-        rest = merge_n(analyzer, results[1:])
+    # same as reduce(results[0], merge_n(results[1:])), without recursion
+    total = results[-1]
+    for first in reversed(results[:-1]):
         r = OrderedDict()
-        analyzer.reduce(first, rest, r)
-        return r
+        analyzer.reduce(first, total, r)
+        total = r
+    return total
+
+
+@dtu.contract(analyzers='list(str)', max_cache_mb='int,>=0')
+def job_analyze_log(log, analyzers, max_cache_mb=512):
+    """
+        Runs all the analyzers on the log, opening it only once.
 
+        The messages read by one analyzer are kept (up to max_cache_mb)
+        for the following ones.
 
-@dtu.contract(analyzer=str)
-def job_analyze(log, analyzer):
+        Returns a dict analyzer -> results, with the results of
+        each analyzer's analyze_log().
+    """
     easy_algo_db = get_easy_algo_db()
-    analyzer_instance = easy_algo_db.create_instance('analyzer', analyzer)
-    in_bag = rosbag.Bag(log)
-    results = OrderedDict()
-    dtu.logger.info('Running %s on %s' % (analyzer, log))
-    analyzer_instance.analyze_log(in_bag, results)
+    in_bag = SharedReadBag(rosbag.Bag(log), max_cache_bytes=max_cache_mb * 1024 * 1024)
+    res = OrderedDict()
+    for analyzer in analyzers:
+        analyzer_instance = easy_algo_db.create_instance('analyzer', analyzer)
+        results = OrderedDict()
+        dtu.logger.info('Running %s on %s' % (analyzer, log))
+        analyzer_instance.analyze_log(in_bag, results)
+        res[analyzer] = results
+    dtu.logger.debug('%d reads of %s were served from memory.' % (in_bag.num_cached_reads, log))
     in_bag.close()
-    return results
+    return res
+
+
+def get_analyzer_results(res, analyzer):
+    """ Returns the results of one analyzer from the output of job_analyze_log(). """
+    return res[analyzer]
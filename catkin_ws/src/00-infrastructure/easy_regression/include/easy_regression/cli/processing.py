@@ -1,5 +1,4 @@
 import os
-import shutil
 
 import duckietown_utils as dtu
 from easy_algo import get_easy_algo_db
@@ -9,6 +8,7 @@ from easy_logs.app_with_logs import download_if_necessary
 from easy_logs.logs_structure import PhysicalLog
 from easy_regression.processor_interface import ProcessorUtilsInterface, \
     ProcessorInterface
+from easy_regression.cli.scheduling import run_with_memory_limit
 import numpy as np
 import rosbag
 from std_msgs.msg import Float64, Int64, Float64MultiArray, MultiArrayDimension, MultiArrayLayout
@@ -76,7 +76,8 @@ def ros_from_np_array(data):
 
 
 @dtu.contract(log=PhysicalLog)
-def process_one_dynamic(context, bag_filename, t0, t1, processors, log_out, log, delete, tmpdir):
+def process_one_dynamic(context, bag_filename, t0, t1, processors, log_out, log, delete, tmpdir,
+                        max_memory_mb=None):
     dtu.logger.info('process_one_dynamic()')
     dtu.logger.info('   input: %s' % bag_filename)
     dtu.logger.info('   processors: %s' % processors)
@@ -99,30 +100,43 @@ def process_one_dynamic(context, bag_filename, t0, t1, processors, log_out, log,
     t0_absolute = bag.get_start_time() + t0
     t1_absolute = bag.get_start_time() + t1
 
+    # Each processor writes only the topics it adds to a temporary bag;
+    # it reads the original bag together with the bags written before.
+    bag_filenames = [bag_filename]
     for i, processor_entry in enumerate(processors):
         processor_name = name_from_spec(processor_entry.processor)
         prefix_in = processor_entry.prefix_in
         prefix_out = processor_entry.prefix_out
         tmp = get_tmp_bag()
 
-        bag_filename = context.comp(process_one_processor, processor_entry.processor, prefix_in, prefix_out,
-                                             bag_filename, tmp, t0_absolute, t1_absolute, log,
-                                             job_id='process-%d-%s' % (i, processor_name))
+        bag_filenames = context.comp(run_with_memory_limit, max_memory_mb,
+                                     process_one_processor, processor_entry.processor, prefix_in, prefix_out,
+                                     bag_filenames, tmp, t0_absolute, t1_absolute, log,
+                                     job_id='process-%d-%s' % (i, processor_name))
 
-    final = context.comp(finalize, bag_filename, log_out, processors, tmpfiles, delete)
+    final = context.comp(finalize, bag_filenames, log_out, processors, tmpfiles, delete)
     return final
 
 
-def finalize(bag_filename, log_out, processors, tmpfiles, delete):
+def finalize(bag_filenames, log_out, processors, tmpfiles, delete):
+    """
+        Writes log_out, merging the original bag with the topics
+        added by the processors.
+    """
     dtu.logger.info('Creating output file %s' % log_out)
     if not processors:
         # just create symlink
         dtu.logger.info('(Just creating symlink, because there '
                         'was no processing done.)')
-        os.symlink(os.path.realpath(bag_filename), log_out)
+        os.symlink(os.path.realpath(bag_filenames[0]), log_out)
     else:
         try:
-            shutil.copy(bag_filename, log_out)
+            in_bag = dtu.MultiBag(bag_filenames)
+            out_bag = rosbag.Bag(log_out, 'w')
+            for topic, msg, t in in_bag.read_messages(raw=True):
+                out_bag.write(topic, msg, t, raw=True)
+            out_bag.close()
+            in_bag.close()
         except:
             dtu.logger.error('Could not create %s' % log_out)
     dtu.logger.info('I created %s' % log_out)
@@ -135,17 +149,26 @@ def finalize(bag_filename, log_out, processors, tmpfiles, delete):
     return log_out
 
 
-def process_one_processor(processor_name_or_spec, prefix_in, prefix_out, bag_filename,
+def process_one_processor(processor_name_or_spec, prefix_in, prefix_out, bag_filenames,
                           next_bag_filename, t0_absolute, t1_absolute, log):
+    """
+        Runs the processor on the messages of all the bags in bag_filenames
+        (the original bag, then the topics added by the previous processors),
+        and writes the topics that it adds to next_bag_filename.
+
+        Returns bag_filenames + [next_bag_filename], or bag_filenames if
+        the processor did not write anything.
+    """
     dtu.DuckietownConstants.show_timeit_benchmarks = True
 
     easy_algo_db = get_easy_algo_db()
     processor = easy_algo_db.create_instance(ProcessorInterface.FAMILY, processor_name_or_spec)
 
-    dtu.logger.info('in: bag_filename: %s' % bag_filename)
-    if not os.path.exists(bag_filename):
-        msg = 'File does not exist: %s' % bag_filename
-        raise ValueError(msg)
+    dtu.logger.info('in: bag_filenames: %s' % bag_filenames)
+    for bag_filename in bag_filenames:
+        if not os.path.exists(bag_filename):
+            msg = 'File does not exist: %s' % bag_filename
+            raise ValueError(msg)
     dtu.logger.info('out: next_bag_filename: %s' % next_bag_filename)
     dtu.logger.info('t0_absolute: %s' % t0_absolute)
     dtu.logger.info('t1_absolute: %s' % t1_absolute)
@@ -156,10 +179,17 @@ def process_one_processor(processor_name_or_spec, prefix_in, prefix_out, bag_fil
     bag_absolute_t0_ref = original_bag.get_start_time()
     original_bag.close()
 
+    return run_processor(processor, prefix_in, prefix_out, bag_filenames, next_bag_filename,
+                         t0_absolute, t1_absolute, bag_absolute_t0_ref, log)
+
+
+def run_processor(processor, prefix_in, prefix_out, bag_filenames, next_bag_filename,
+                  t0_absolute, t1_absolute, bag_absolute_t0_ref, log):
+    """ The part of process_one_processor() after the processor and the log are loaded. """
     dtu.d8n_make_sure_dir_exists(next_bag_filename)
     out_bag = rosbag.Bag(next_bag_filename, 'w')
 
-    bag0 = rosbag.Bag(bag_filename)
+    bag0 = dtu.MultiBag(bag_filenames)
     t0_rel = t0_absolute - bag0.get_start_time()
     t1_rel = t1_absolute - bag0.get_start_time()
 
@@ -168,25 +198,16 @@ def process_one_processor(processor_name_or_spec, prefix_in, prefix_out, bag_fil
     utils = ProcessorUtils(bag_out=out_bag, log=log)
     processor.process_log(in_bag, prefix_in, out_bag, prefix_out, utils)
     in_bag.close()
-    # also copy the other messages
-
-    in_bag1 = rosbag.Bag(bag_filename)
-    for topic, msg, t in in_bag1.read_messages(raw=True):
-        out_bag.write(topic, msg, t, raw=True)
-    in_bag1.close()
 
     out_bag.close()
 
-#     r = rosbag.Bag(next_bag_filename)
-#     for topic, msg, t in r.read_messages(raw=True):
-#         pass
-#     r.close()
-
-#     cmd = ['rosbag', 'fix', next_bag_filename, next_bag_filename]
-#     dtu.system_cmd_result(cwd='.', cmd=cmd, raise_on_error=True, display_stdout=True,
-#                           display_stderr=True)
-#     cmd = ['rosbag', 'reindex', next_bag_filename]
-#     dtu.system_cmd_result(cwd='.', cmd=cmd, raise_on_error=True, display_stdout=True,
-#                           display_stderr=True)
-    return next_bag_filename
+    # an empty bag would only be a problem for the following steps
+    written = rosbag.Bag(next_bag_filename)
+    nwritten = written.get_message_count()
+    written.close()
+    if nwritten == 0:
+        dtu.logger.info('The processor did not write any message; skipping %s' % next_bag_filename)
+        os.unlink(next_bag_filename)
+        return bag_filenames
 
+    return bag_filenames + [next_bag_filename]
@@ -10,10 +10,11 @@ import rosbag
 from duckietown_utils.bag_visualization import get_summary_of_bag_messages
 from easy_algo import get_easy_algo_db
 from easy_logs.app_with_logs import D8AppWithLogs, get_log_if_not_exists
-from easy_regression.cli.analysis_and_stat import job_analyze, job_merge, print_results
+from easy_regression.cli.analysis_and_stat import job_analyze_log, get_analyzer_results, job_merge, print_results
 from easy_regression.cli.checking import compute_check_results, display_check_results, fail_if_not_expected, \
     write_to_db
 from easy_regression.cli.processing import process_one_dynamic
+from easy_regression.cli.scheduling import choose_num_workers, run_with_memory_limit, get_cache_budget_mb
 from easy_regression.conditions.interface import RTCheck
 from easy_regression.regression_test import RegressionTest
 from quickapp import QuickApp
@@ -39,6 +40,25 @@ class RunRegressionTest(D8AppWithLogs, QuickApp):
 
         params.add_flag('debug_no_delete', help='Do not delete temporary files.')
 
+        g = 'Scheduling'
+        params.add_int('workers', default=1, group=g,
+                       help='Number of processes (uses "parmake"); 0 chooses it from the number '
+                       'of CPUs and the available memory divided by --max_memory_mb.')
+        params.add_int('max_memory_mb', default=0, group=g,
+                       help='Memory budget in MB for each processing or analysis job (0: no limit).')
+        params.add_int('max_cache_mb', default=512, group=g,
+                       help='Memory in MB used to share the messages read between the analyzers of a log '
+                       '(at most half of --max_memory_mb).')
+
+    def go(self):
+        options = self.get_options()
+        workers = choose_num_workers(options.workers, options.max_memory_mb)
+        if workers > 1 and not options.command:
+            self.info('Using %d workers.' % workers)
+            options.command = 'parmake n=%d' % workers
+
+        super(RunRegressionTest, self).go()
+
     def define_jobs_context(self, context):
         easy_algo_db = get_easy_algo_db()
 
@@ -51,6 +71,13 @@ class RunRegressionTest(D8AppWithLogs, QuickApp):
             msg = 'Invalid expect status %s; must be one of %s.' % (expect, RTCheck.CHECK_RESULTS)
             raise dtu.DTUserError(msg)
 
+        max_memory_mb = self.options.max_memory_mb
+        max_cache_mb = get_cache_budget_mb(self.options.max_cache_mb, max_memory_mb)
+        if max_cache_mb != self.options.max_cache_mb:
+            msg = ('Using --max_cache_mb %d instead of %d, because the cache counts against '
+                   '--max_memory_mb %d.' % (max_cache_mb, self.options.max_cache_mb, max_memory_mb))
+            self.warn(msg)
+
         query = self.options.tests
         regression_tests = easy_algo_db.query('regression_test', query, raise_if_no_matches=True)
 
@@ -61,11 +88,13 @@ class RunRegressionTest(D8AppWithLogs, QuickApp):
             c = context.child(rt_name)
 
             outd = os.path.join(self.options.output, 'regression_tests', rt_name)
-            jobs_rt(c, rt_name, rt, easy_logs_db, outd, expect, write_data_to_db=write_to_db, delete=delete)
+            jobs_rt(c, rt_name, rt, easy_logs_db, outd, expect, write_data_to_db=write_to_db, delete=delete,
+                    max_memory_mb=max_memory_mb, max_cache_mb=max_cache_mb)
 
 
 @dtu.contract(rt=RegressionTest)
-def jobs_rt(context, rt_name, rt, easy_logs_db, out, expect, write_data_to_db, delete):
+def jobs_rt(context, rt_name, rt, easy_logs_db, out, expect, write_data_to_db, delete,
+            max_memory_mb=0, max_cache_mb=512):
     logs = rt.get_logs(easy_logs_db)
 
     processors = rt.get_processors()
@@ -97,11 +126,16 @@ def jobs_rt(context, rt_name, rt, easy_logs_db, out, expect, write_data_to_db, d
         log_out_ = c.comp_dynamic(process_one_dynamic,
                                   bag_filename, t0, t1, processors, log_out, log,
                                   delete=delete, tmpdir=os.path.join(tmpdir, log_name),
+                                  max_memory_mb=max_memory_mb,
                                   job_id='process_one_dynamic')
 
-        for a in analyzers:
-            r = results_all[a][log_name] = c.comp(job_analyze, log_out_, a, job_id='analyze-%s' % a)
+        # all the analyzers run in the same job, reading the log once
+        if analyzers:
+            r = c.comp(run_with_memory_limit, max_memory_mb, job_analyze_log, log_out_, analyzers,
+                       max_cache_mb=max_cache_mb, job_id='analyze')
             do_before_deleting_tmp_dir.append(r)
+        for a in analyzers:
+            results_all[a][log_name] = c.comp(get_analyzer_results, r, a, job_id='analyze-%s' % a)
 
         def sanitize_topic(x):
             if x.startswith('/'):
@@ -114,14 +148,16 @@ def jobs_rt(context, rt_name, rt, easy_logs_db, out, expect, write_data_to_db, d
         for topic in rt.get_topic_videos():
             mp4 = os.path.join(log_out_dir, 'videos', log_name + '-' + sanitize_topic(topic) + '.mp4')
             job_id = 'make_video-%s' % sanitize_topic(topic)
-            v = c.comp(dtu.d8n_make_video_from_bag, log_out_, topic, mp4, job_id=job_id)
+            v = c.comp(run_with_memory_limit, max_memory_mb,
+                       dtu.d8n_make_video_from_bag, log_out_, topic, mp4, job_id=job_id)
             report_filenames.append(v)
             do_before_deleting_tmp_dir.append(v)
 
         for topic in rt.get_topic_images():
             basename = os.path.join(log_out_dir, 'images', log_name + '-' + sanitize_topic(topic))
             job_id = 'write_image-%s' % sanitize_topic(topic)
-            v = c.comp(write_images, log_out_, topic, basename, job_id=job_id)
+            v = c.comp(run_with_memory_limit, max_memory_mb,
+                       write_images, log_out_, topic, basename, job_id=job_id)
             report_filenames.append(v)
             do_before_deleting_tmp_dir.append(v)
 
@@ -212,13 +248,10 @@ def write_images(bag_filename, topic, basename):
         msg += '\n\n' + dtu.indent(get_summary_of_bag_messages(bag), '  ')
         raise ValueError(msg)
 
-    res = dtu.d8n_read_all_images_from_bag(bag, topic)
-    n = len(res)
     filenames = []
-    for i in range(n):
-        rgb = res[i]['rgb']
-        data = dtu.png_from_bgr(dtu.bgr_from_rgb(rgb))
-        if n == 1:
+    for i, (_, bgr) in enumerate(dtu.d8n_iterate_images_from_bag(bag, topic)):
+        data = dtu.png_from_bgr(bgr)
+        if nfound == 1:
             fn = basename + '.png'
         else:
             fn = basename + '-%02d' % i + '.png'
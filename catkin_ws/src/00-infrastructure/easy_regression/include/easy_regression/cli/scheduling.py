@@ -0,0 +1,168 @@
+from contextlib import contextmanager
+from multiprocessing import cpu_count
+import os
+
+__all__ = [
+    'choose_num_workers',
+    'get_cache_budget_mb',
+    'memory_limit',
+    'run_with_memory_limit',
+    'SharedReadBag',
+]
+
+
+def get_available_memory_mb():
+    """ Returns the available memory in MB, or None if it cannot be known. """
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except IOError:
+        pass
+    return None
+
+
+def choose_num_workers(workers, max_memory_mb):
+    """
+        Returns the number of worker processes.
+
+        If workers is 0, it is chosen as the number of CPUs, limited
+        by the number of jobs with max_memory_mb that fit in the
+        available memory.
+    """
+    if workers > 0:
+        return workers
+    n = cpu_count()
+    available = get_available_memory_mb()
+    if max_memory_mb and available is not None:
+        n = min(n, int(available / max_memory_mb))
+    return max(1, n)
+
+
+def get_cache_budget_mb(max_cache_mb, max_memory_mb):
+    """
+        Returns the memory for the SharedReadBag cache: max_cache_mb,
+        but at most half of the memory budget of the job (if any),
+        because the cache counts against it.
+    """
+    if max_memory_mb:
+        return min(max_cache_mb, max_memory_mb // 2)
+    return max_cache_mb
+
+
+def get_virtual_memory_bytes():
+    """ Returns the virtual memory size of this process (Linux only). """
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[0])
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+@contextmanager
+def memory_limit(max_memory_mb):
+    """
+        Limits the address space of the process to its current size
+        plus max_memory_mb, so that a job that goes over its budget
+        gets a MemoryError instead of slowing down all the others.
+    """
+    if not max_memory_mb:
+        yield
+        return
+    import resource
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = get_virtual_memory_bytes() + max_memory_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def run_with_memory_limit(max_memory_mb, f, *args, **kwargs):
+    """ Calls f(*args, **kwargs) within memory_limit(max_memory_mb); use as a job. """
+    with memory_limit(max_memory_mb):
+        try:
+            return f(*args, **kwargs)
+        except MemoryError as e:
+            msg = ('%s went over the memory budget of %s MB (option --max_memory_mb): %s' %
+                   (f.__name__, max_memory_mb, e))
+            raise MemoryError(msg)
+
+
+class SharedReadBag(object):
+    """
+        Wraps a rosbag.Bag read by several analyzers in turn.
+
+        The messages returned by read_messages() are kept, if their
+        estimated size is less than max_cache_bytes, so the following
+        analyzers that read the same topics (or a subset of them) do not
+        read and deserialize them again.
+
+        The raw reads are not kept: reading them again is cheap, and
+        the analyzers that read raw messages (such as CountMessages)
+        usually read the whole log.
+
+        The analyzers get the same message objects, so they should not
+        modify them.
+    """
+
+    def __init__(self, bag, max_cache_bytes):
+        self.bag = bag
+        self.max_cache_bytes = max_cache_bytes
+        # sorted topics (or None for all) -> list of messages
+        self._cache = {}
+        self.num_cached_reads = 0
+
+    def get_type_and_topic_info(self, *args, **kwargs):
+        return self.bag.get_type_and_topic_info(*args, **kwargs)
+
+    def get_message_count(self, *args, **kwargs):
+        return self.bag.get_message_count(*args, **kwargs)
+
+    def get_start_time(self):
+        return self.bag.get_start_time()
+
+    def get_end_time(self):
+        return self.bag.get_end_time()
+
+    def _estimate_bytes(self, topics):
+        """ The size of the messages in the topics, assuming they have the same size. """
+        total = self.bag.get_message_count()
+        if total == 0:
+            return 0
+        n = self.bag.get_message_count(topic_filters=topics) if topics else total
+        return self.bag.size * n / total
+
+    def read_messages(self, topics=None, raw=False, **kwargs):
+        if kwargs or raw:
+            # start_time, end_time, ...: not cached
+            for m in self.bag.read_messages(topics=topics, raw=raw, **kwargs):
+                yield m
+            return
+
+        if isinstance(topics, str):
+            topics = [topics]
+        key = tuple(sorted(set(topics))) if topics else None
+        for cached_topics, messages in self._cache.items():
+            if cached_topics is None or (key is not None and set(key) <= set(cached_topics)):
+                self.num_cached_reads += 1
+                for m in messages:
+                    if key is None or m[0] in key:
+                        yield m
+                return
+
+        keep = self._estimate_bytes(topics) <= self.max_cache_bytes
+        messages = []
+        for m in self.bag.read_messages(topics=topics):
+            if keep:
+                messages.append(m)
+            yield m
+        if keep:
+            self._cache[key] = messages
+
+    def close(self):
+        self._cache = {}
+        self.bag.close()
+
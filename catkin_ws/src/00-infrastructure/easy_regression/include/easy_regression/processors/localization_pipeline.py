@@ -1,7 +1,13 @@
-from complete_image_pipeline.pipeline import run_pipeline
+from collections import deque
+import multiprocessing
+
+from anti_instagram import AntiInstagramInterface, AntiInstagramIncremental
+from complete_image_pipeline.pipeline import run_pipeline_detection, run_pipeline_localization, PipelineDetails
 import duckietown_utils as dtu
+from easy_algo import get_easy_algo_db
 from easy_regression import ProcessorInterface
 from ground_projection import GroundProjection
+import numpy as np
 import rospy
 
 __all__ = [
@@ -10,13 +16,22 @@ __all__ = [
 
 
 class LocalizationPipelineProcessor(ProcessorInterface):
+    """
+        Runs the localization pipeline on each frame of the log.
+
+        With nprocesses > 1, the first part of the pipeline (color
+        correction, line detection, ground projection) runs on a pool
+        of processes; the lane filter then runs in order on the results,
+        and the output images are encoded as JPGs in separate threads.
+    """
 
-    def __init__(self, line_detector, image_prep, lane_filter, anti_instagram):
+    def __init__(self, line_detector, image_prep, lane_filter, anti_instagram, nprocesses=1):
         self.line_detector = line_detector
         self.image_prep = image_prep
         self.lane_filter = lane_filter
         self.anti_instagram = anti_instagram
         self.all_details = False
+        self.nprocesses = nprocesses
 
     def process_log(self, bag_in, prefix_in, bag_out, prefix_out, utils):  #@UnusedVariable
         log_name = utils.get_log().log_name
@@ -27,46 +42,46 @@ class LocalizationPipelineProcessor(ProcessorInterface):
 
         gp = GroundProjection(vehicle_name)
 
-        topic = dtu.get_image_topic(bag_in)
-
-        bgcolor = dtu.ColorConstants.BGR_DUCKIETOWN_YELLOW
-
-        sequence = bag_in.read_messages_plus(topics=[topic])
-        for _i, mp in enumerate(sequence):
-
-            bgr = dtu.bgr_from_rgb(dtu.rgb_from_ros(mp.msg))
-
-            res, stats = run_pipeline(bgr, gp=gp,
-                                        line_detector_name=self.line_detector,
-                                        image_prep_name=self.image_prep,
-                                        lane_filter_name=self.lane_filter,
-                                        anti_instagram_name=self.anti_instagram,
-                                        all_details=self.all_details)
+        # the algorithm instances are reused for all the frames of this log,
+        # but are not shared with the previous logs
+        get_easy_algo_db().reset_instance_pool()
 
-            rect = (480, 640) if not self.all_details else (240, 320)
-            res = dtu.resize_images_to_fit_in_rect(res, rect, bgcolor=bgcolor)
-
-            print('abs: %s  window: %s  fron log: %s' % (mp.time_absolute, mp.time_window, mp.time_from_physical_log_start))
-            headers = [
-                "Robot: %s log: %s time: %.2f s" % (vehicle_name, log_name, mp.time_from_physical_log_start),
-                "Algorithms | color correction: %s | preparation: %s | detector: %s | filter: %s" % (
-                    self.anti_instagram,
-                    self.image_prep,
-                    self.line_detector,
-                    self.lane_filter,)
-            ]
-
-            res = dtu.write_bgr_images_as_jpgs(res, dirname=None, bgcolor=bgcolor)
-
-            cv_image = res['all']
-
-            for head in reversed(headers):
-                max_height = 35
-                cv_image = dtu.add_header_to_bgr(cv_image, head, max_height=max_height)
-
-            otopic = "all"
+        topic = dtu.get_image_topic(bag_in)
 
-            omsg = dtu.d8_compressed_image_from_cv_image(cv_image, same_timestamp_as=mp.msg)
+        nprocesses = self.nprocesses
+        if nprocesses > 1 and multiprocessing.current_process().daemon:
+            msg = 'Cannot create processes from a daemon process; using nprocesses = 1.'
+            dtu.logger.warning(msg)
+            nprocesses = 1
+        if nprocesses > 1 and is_stateful_anti_instagram(self.anti_instagram):
+            # each process would see only some of the frames
+            msg = ('The anti_instagram %r keeps state across frames; using nprocesses = 1.' %
+                   self.anti_instagram)
+            dtu.logger.warning(msg)
+            nprocesses = 1
+
+        # The messages stay in this process (their classes are created
+        # by rosbag); the other processes get only the image data.
+        mps = deque()
+
+        def frames():
+            for mp in bag_in.read_messages_plus(topics=[topic]):
+                mps.append(mp)
+                yield image_data_from_ros(mp.msg)
+
+        # each frame independently, possibly in other processes
+        details = PipelineDetails.ALL if self.all_details else PipelineDetails.DEFAULT
+        initargs = (vehicle_name, self.line_detector, self.image_prep, self.anti_instagram, details)
+        detected = dtu.imap_in_processes(detect_frame, frames(), nprocesses=nprocesses,
+                                         initializer=init_detect_frame, initargs=initargs)
+        # in order, in this process
+        localized = self._localize_frames(mps, detected, gp, details)
+        # the JPGs are encoded in threads
+        encode = lambda x: self._encode_frame(x, vehicle_name, log_name)
+        encoded = dtu.imap_in_threads(encode, localized, nthreads=nprocesses)
+
+        otopic = "all"
+        for mp, omsg, stats in encoded:
             t = rospy.Time.from_sec(mp.time_absolute)  # @UndefinedVariable
             print('written %r at t = %s' % (otopic, t.to_sec()))
             bag_out.write(prefix_out + '/' + otopic, omsg, t=t)
@@ -74,3 +89,84 @@ class LocalizationPipelineProcessor(ProcessorInterface):
             for name, value in stats.items():
                 utils.write_stat(prefix_out + '/' + name, value, t=t)
 
+    def _localize_frames(self, mps, detected, gp, details):
+        for res, detections in detected:
+            mp = mps.popleft()
+            bgr = res['Raw input image']
+            res, stats = run_pipeline_localization(bgr, gp, res, detections,
+                                                   lane_filter_name=self.lane_filter,
+                                                   details=details)
+            yield mp, res, stats
+
+    def _encode_frame(self, x, vehicle_name, log_name):
+        mp, res, stats = x
+        bgcolor = dtu.ColorConstants.BGR_DUCKIETOWN_YELLOW
+
+        rect = (480, 640) if not self.all_details else (240, 320)
+        res = dtu.resize_images_to_fit_in_rect(res, rect, bgcolor=bgcolor)
+
+        print('abs: %s  window: %s  fron log: %s' % (mp.time_absolute, mp.time_window, mp.time_from_physical_log_start))
+        headers = [
+            "Robot: %s log: %s time: %.2f s" % (vehicle_name, log_name, mp.time_from_physical_log_start),
+            "Algorithms | color correction: %s | preparation: %s | detector: %s | filter: %s" % (
+                self.anti_instagram,
+                self.image_prep,
+                self.line_detector,
+                self.lane_filter,)
+        ]
+
+        res = dtu.write_bgr_images_as_jpgs(res, dirname=None, bgcolor=bgcolor)
+
+        cv_image = res['all']
+
+        for head in reversed(headers):
+            max_height = 35
+            cv_image = dtu.add_header_to_bgr(cv_image, head, max_height=max_height)
+
+        omsg = dtu.d8_compressed_image_from_cv_image(cv_image, same_timestamp_as=mp.msg)
+        return mp, omsg, stats
+
+
+# The state of detect_frame() in each process, set by init_detect_frame()
+_detect_frame_context = {}
+
+
+def init_detect_frame(vehicle_name, line_detector, image_prep, anti_instagram, details):
+    get_easy_algo_db().reset_instance_pool()
+    _detect_frame_context.clear()
+    _detect_frame_context.update(gp=GroundProjection(vehicle_name),
+                                 line_detector=line_detector,
+                                 image_prep=image_prep,
+                                 anti_instagram=anti_instagram,
+                                 details=details)
+
+
+def is_stateful_anti_instagram(anti_instagram):
+    """ True if the anti_instagram instance remembers the previous frames. """
+    ai = get_easy_algo_db().create_instance(AntiInstagramInterface.FAMILY, anti_instagram)
+    return isinstance(ai, AntiInstagramIncremental)
+
+
+def image_data_from_ros(msg):
+    """ Returns the JPG data for a CompressedImage, or the BGR image. """
+    if 'CompressedImage' in msg.__class__.__name__:
+        return msg.data
+    else:
+        return dtu.bgr_from_rgb(dtu.rgb_from_ros(msg))
+
+
+def detect_frame(data):
+    """ Returns (res, detections) for the output of image_data_from_ros(). """
+    c = _detect_frame_context
+    if isinstance(data, np.ndarray):
+        bgr = data
+    else:
+        # the same decoder (PIL) as rgb_from_ros(), so that the results
+        # do not depend on nprocesses
+        bgr = dtu.bgr_from_rgb(dtu.rgb_from_pil(dtu.pil_from_jpg(data)))
+    res, detections = run_pipeline_detection(bgr, gp=c['gp'],
+                                             line_detector_name=c['line_detector'],
+                                             image_prep_name=c['image_prep'],
+                                             anti_instagram_name=c['anti_instagram'],
+                                             details=c['details'])
+    return res, detections
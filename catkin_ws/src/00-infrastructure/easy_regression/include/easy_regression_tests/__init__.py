@@ -7,3 +7,7 @@ from . import references
 from . import run_all
 from . import structured
 
+from . import processing
+from . import scheduling
+from . import signal_stats
+from . import localization
@@ -0,0 +1,67 @@
+import os
+
+import rosbag
+import rospy
+from sensor_msgs.msg import CompressedImage
+
+import duckietown_utils as dtu
+from easy_logs.logs_structure import PhysicalLog
+from easy_regression.cli.processing import run_processor
+from easy_regression.processors.localization_pipeline import LocalizationPipelineProcessor
+
+
+def write_frames_bag(filename, topic, times):
+    with open(dtu.require_resource('frame0002.jpg'), 'rb') as f:
+        data = f.read()
+    bag = rosbag.Bag(filename, 'w')
+    try:
+        for t in times:
+            msg = CompressedImage(format='jpeg', data=data)
+            msg.header.stamp = rospy.Time.from_sec(t)
+            bag.write(topic, msg, rospy.Time.from_sec(t))
+    finally:
+        bag.close()
+
+
+def read_bag(filename):
+    bag = rosbag.Bag(filename)
+    res = [(topic, msg, t.to_sec()) for topic, msg, t in bag.read_messages()]
+    bag.close()
+    return res
+
+
+@dtu.unit_test
+def localization_pipeline_same_with_processes():
+    d = dtu.create_tmpdir(prefix='localization_pipeline_tests')
+    original = os.path.join(d, 'original.bag')
+    robot = dtu.DuckietownConstants.ROBOT_NAME_FOR_TESTS
+    t0 = 1500000000
+    n = 4
+    write_frames_bag(original, '/%s/camera_node/image/compressed' % robot,
+                     [t0 + i * 0.5 for i in range(n)])
+    log = PhysicalLog(**dict((k, None) for k in PhysicalLog._fields))
+
+    results = {}
+    for nprocesses in [1, 2]:
+        processor = LocalizationPipelineProcessor(line_detector='baseline', image_prep='baseline',
+                                                  lane_filter='baseline', anti_instagram='baseline',
+                                                  nprocesses=nprocesses)
+        out = os.path.join(d, 'out%d.bag' % nprocesses)
+        bag_filenames = run_processor(processor, '', '/loc', [original], out,
+                                      t0, t0 + n, t0, log)
+        assert bag_filenames == [original, out], bag_filenames
+        results[nprocesses] = read_bag(out)
+
+    res1, res2 = results[1], results[2]
+    frames = [_ for _ in res1 if _[0] == '/loc/all']
+    assert len(frames) == n, frames
+    assert len(res1) > n, 'no stats written'
+    assert len(res1) == len(res2), (len(res1), len(res2))
+    for (topic1, msg1, t1), (topic2, msg2, t2) in zip(res1, res2):
+        assert topic1 == topic2, (topic1, topic2)
+        assert t1 == t2, (topic1, t1, t2)
+        assert msg1 == msg2, (topic1, msg1, msg2)
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,90 @@
+import os
+
+import rosbag
+import rospy
+from std_msgs.msg import String
+
+import duckietown_utils as dtu
+from easy_logs.logs_structure import PhysicalLog
+from easy_regression.cli.processing import finalize, run_processor
+from easy_regression.processor_interface import ProcessorInterface
+
+
+def write_bag(filename, topic, times):
+    bag = rosbag.Bag(filename, 'w')
+    try:
+        for t in times:
+            bag.write(topic, String(data='%s %s' % (topic, t)), rospy.Time.from_sec(t))
+    finally:
+        bag.close()
+
+
+@dtu.unit_test
+def finalize_merges_added_topics():
+    d = dtu.create_tmpdir(prefix='processing_tests')
+    original = os.path.join(d, 'original.bag')
+    added1 = os.path.join(d, 'added1.bag')
+    added2 = os.path.join(d, 'added2.bag')
+    write_bag(original, '/robot/camera', [1500000000 + i for i in range(10)])
+    write_bag(added1, '/one/stat', [1500000000 + i + 0.5 for i in range(2, 5)])
+    write_bag(added2, '/two/stat', [1500000000 + i for i in range(3, 6)])
+
+    log_out = os.path.join(d, 'out.bag')
+    finalize([original, added1, added2], log_out, processors=['p1', 'p2'],
+             tmpfiles=[added1, added2], delete=True)
+
+    bag = rosbag.Bag(log_out)
+    res = [(topic, t.to_sec()) for topic, _, t in bag.read_messages()]
+    bag.close()
+    assert len(res) == 16, res
+    assert [_[1] for _ in res] == sorted(_[1] for _ in res)
+    assert len([_ for _ in res if _[0] == '/two/stat']) == 3
+    assert not os.path.exists(added1) and not os.path.exists(added2)
+    assert os.path.exists(original)
+
+
+
+class WritesNothing(ProcessorInterface):
+
+    def process_log(self, bag_in, prefix_in, bag_out, prefix_out, utils):  #@UnusedVariable
+        for _ in bag_in.read_messages():
+            pass
+
+
+class WritesStat(ProcessorInterface):
+
+    def process_log(self, bag_in, prefix_in, bag_out, prefix_out, utils):  #@UnusedVariable
+        for _, msg, t in bag_in.read_messages():
+            bag_out.write(prefix_out + '/stat', msg, t)
+
+
+@dtu.unit_test
+def processor_writing_nothing():
+    d = dtu.create_tmpdir(prefix='processing_tests')
+    original = os.path.join(d, 'original.bag')
+    t0 = 1500000000
+    write_bag(original, '/robot/camera', [t0 + i for i in range(10)])
+    log = PhysicalLog(**dict((k, None) for k in PhysicalLog._fields))
+
+    tmp0 = os.path.join(d, 'tmp0.bag')
+    tmp1 = os.path.join(d, 'tmp1.bag')
+    bag_filenames = [original]
+    bag_filenames = run_processor(WritesNothing(), '', '/one', bag_filenames, tmp0,
+                                  t0, t0 + 9, t0, log)
+    assert bag_filenames == [original]
+    assert not os.path.exists(tmp0)
+
+    bag_filenames = run_processor(WritesStat(), '', '/two', bag_filenames, tmp1,
+                                  t0, t0 + 9, t0, log)
+    assert bag_filenames == [original, tmp1]
+
+    log_out = os.path.join(d, 'out.bag')
+    finalize(bag_filenames, log_out, processors=['p1', 'p2'],
+             tmpfiles=[tmp0, tmp1], delete=True)
+    bag = rosbag.Bag(log_out)
+    assert bag.get_message_count() == 20
+    bag.close()
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,63 @@
+import os
+
+import rosbag
+
+import duckietown_utils as dtu
+from easy_regression.cli.scheduling import SharedReadBag, choose_num_workers, memory_limit, \
+    get_cache_budget_mb
+
+from .processing import write_bag
+
+
+@dtu.unit_test
+def shared_read_bag_reuses_messages():
+    d = dtu.create_tmpdir(prefix='scheduling_tests')
+    fn = os.path.join(d, 'log.bag')
+    write_bag(fn, '/robot/camera', [1500000000 + i for i in range(10)])
+
+    bag = SharedReadBag(rosbag.Bag(fn), max_cache_bytes=10 * 1024 * 1024)
+    all1 = [(topic, t) for topic, _, t in bag.read_messages()]
+    all2 = [(topic, t) for topic, _, t in bag.read_messages(topics=['/robot/camera'])]
+    none = list(bag.read_messages(topics=['/other']))
+    assert all1 == all2 and len(all1) == 10
+    assert none == []
+    assert bag.num_cached_reads == 2
+    # the raw reads are not kept
+    assert len(list(bag.read_messages(raw=True))) == 10
+    assert len(list(bag.read_messages(raw=True))) == 10
+    assert bag.num_cached_reads == 2
+    bag.close()
+
+    # too large to keep: read again from the bag
+    bag = SharedReadBag(rosbag.Bag(fn), max_cache_bytes=0)
+    assert len(list(bag.read_messages())) == 10
+    assert len(list(bag.read_messages())) == 10
+    assert bag.num_cached_reads == 0
+    bag.close()
+
+
+@dtu.unit_test
+def scheduling_workers_and_memory():
+    assert choose_num_workers(3, max_memory_mb=0) == 3
+    assert choose_num_workers(0, max_memory_mb=0) >= 1
+    # a budget larger than the memory: one worker at a time
+    assert choose_num_workers(0, max_memory_mb=10 ** 9) == 1
+
+    # the cache is at most half of the budget
+    assert get_cache_budget_mb(512, max_memory_mb=0) == 512
+    assert get_cache_budget_mb(512, max_memory_mb=400) == 200
+    assert get_cache_budget_mb(100, max_memory_mb=400) == 100
+
+    with memory_limit(256):
+        try:
+            _ = ' ' * (1024 * 1024 * 1024)
+        except MemoryError:
+            pass
+        else:
+            raise Exception('Expected MemoryError')
+    # the limit is removed afterwards
+    _ = ' ' * (512 * 1024 * 1024)
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,53 @@
+import numpy as np
+
+import duckietown_utils as dtu
+from easy_regression.analyzers.signal_stats import reduce_stats
+from easy_regression.analyzers.streaming_stats import StreamingStats
+
+
+def stats_for(values, t0=0.0, t1=1.0):
+    s = StreamingStats()
+    for x in values:
+        s.add(x)
+    res = dict(num_log_segments=1, length=t1 - t0)
+    res.update(s.to_yaml())
+    return res
+
+
+@dtu.unit_test
+def streaming_stats_small():
+    res = stats_for([5, 1, 4, 2, 3])
+    assert res['nsamples'] == 5
+    assert res['mean'] == 3
+    assert res['variance'] == 2
+    assert (res['min'], res['max']) == (1, 5)
+    assert res['median'] == 3
+
+
+@dtu.unit_test
+def streaming_stats_reduce():
+    np.random.seed(0)
+    logs = [np.random.lognormal(size=np.random.randint(10, 3000)) for _ in range(300)]
+    total = stats_for(logs[0])
+    for values in logs[1:]:
+        r = {}
+        reduce_stats(total, stats_for(values), r)
+        total = r
+
+    values = np.concatenate(logs)
+    assert total['num_log_segments'] == len(logs)
+    assert total['nsamples'] == len(values)
+    assert np.allclose(total['mean'], np.mean(values))
+    assert np.allclose(total['variance'], np.var(values))
+    assert total['min'] == np.min(values)
+    assert total['max'] == np.max(values)
+    # the sketch stays small
+    assert len(total['quantile_sketch']['means']) < 200
+    # quantiles, within 1% in rank
+    for name, q in [('median', 0.5), ('p90', 0.9), ('p99', 0.99)]:
+        rank = np.mean(values < total[name])
+        assert abs(rank - q) < 0.01, (name, rank, q)
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -10,4 +10,5 @@ from .utils import *
 from .scale_and_shift import *
 
 from .interface import *
-from .identity import *
\ No newline at end of file
+from .identity import *
+from .anti_instagram_incremental import *
@@ -1,6 +1,6 @@
 import cv2
 from .kmeans import getparameters2, identifyColors, runKMeans
-from .scale_and_shift import scaleandshift
+from .scale_and_shift import scaleandshift, scaleandshift_lut, applylut
 from anti_instagram.kmeans import CENTERS, CENTERS2
 import numpy as np
 import duckietown_utils as dtu
@@ -17,13 +17,24 @@ def calculate_transform(image):
         parameters['scale']
         parameters['shift']
     """
+    clusters4 = runKMeans(image, num_colors=4, init=CENTERS2)
+    clusters3 = runKMeans(image, num_colors=3, init=CENTERS)
+    return transform_from_clusters(clusters3, clusters4)
+
+def transform_from_clusters(clusters3, clusters4):
+    """
+        Computes the transform from the results of runKMeans() 
+        with 3 and 4 colors.
+        
+        Returns the same values as calculate_transform().
+    """
     centers4 = CENTERS2
-    trained4, counter4,score4 = runKMeans(image, num_colors=4, init=centers4)
+    trained4, counter4,score4 = clusters4
     trained4 = trained4[[0,2,3],:]
     counter4 = [counter4[0],counter4[2],counter4[3]]
     centers4 = centers4[[0,2,3],:]
     centers3 = CENTERS
-    trained3, counter3,score3 = runKMeans(image, num_colors=3, init=centers3)
+    trained3, counter3,score3 = clusters3
     decision34=(score3+3e7)>score4;
     if (decision34):
         logger.info("picked 3 colors")
@@ -88,7 +99,12 @@ class ScaleAndShift(object):
 
 class AntiInstagram(AntiInstagramInterface):
 
-    def __init__(self, median_blur=0):
+    def __init__(self, median_blur=0, use_lut=False):
+        """
+            If use_lut is True, the transform is applied to uint8 images
+            with a lookup table (one per channel), which gives the same
+            result without creating a float image.
+        """
         self.scale = [1.0, 1.0, 1.0]
         self.shift = [0.0, 0.0, 0.0]
         self.health = 0
@@ -96,13 +112,30 @@ class AntiInstagram(AntiInstagramInterface):
 #         median_blur = 5
         self.median_blur = median_blur
         
+        self.use_lut = use_lut
+        # scale and shift used to create self._lut
+        self._lut_key = None
+        self._lut = None
+        
     def applyTransform(self, image):
+        if self.use_lut and image.dtype == np.uint8:
+            return applylut(image, self._get_lut())
+        
         corrected_image = scaleandshift(image, self.scale, self.shift)
         res = np.clip(corrected_image, 0, 255).astype('uint8')
 #         res = cv2.convertScaleAbs(corrected_image).astype('uint8')
 #         print res.dtype
         return res
     
+    def _get_lut(self):
+        # scale and shift can be set directly (see LineDetectorNode2), 
+        # so we check whether they changed rather than relying on setters
+        key = tuple(float(x) for x in self.scale) + tuple(float(x) for x in self.shift)
+        if key != self._lut_key:
+            self._lut = scaleandshift_lut(self.scale, self.shift)
+            self._lut_key = key
+        return self._lut
+    
     def calculateTransform(self, image): #, testframe=False):
         if self.median_blur > 0:
             image = cv2.medianBlur(image, self.median_blur)
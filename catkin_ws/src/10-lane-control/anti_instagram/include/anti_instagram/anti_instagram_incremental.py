@@ -0,0 +1,95 @@
+import cv2
+
+import duckietown_utils as dtu
+
+from .anti_instagram_imp import AntiInstagram, transform_from_clusters
+from .kmeans import CENTERS, CENTERS2, runKMeans, refineKMeans
+
+__all__ = [
+    'AntiInstagramIncremental',
+]
+
+logger = dtu.logger
+
+
+class AntiInstagramIncremental(AntiInstagram):
+    """
+        Same transform as AntiInstagram, but the cluster centers are kept
+        across frames.
+
+        The first frame is processed with the full KMeans (as AntiInstagram
+        does). For the following frames, the centers are refined with
+        `refine_iterations` warm-started iterations.
+
+        The drift is the relative increase of the mean squared distance
+        of the pixels from their centers, with respect to the last full
+        computation. If it is larger than `drift_threshold`, the full
+        KMeans is run again.
+    """
+
+    def __init__(self, median_blur=0, refine_iterations=2, drift_threshold=0.5,
+                 use_lut=False):
+        AntiInstagram.__init__(self, median_blur=median_blur, use_lut=use_lut)
+        self.refine_iterations = refine_iterations
+        self.drift_threshold = drift_threshold
+        self.reset()
+
+    def reset(self):
+        """ Forgets the centers; the next frame uses the full KMeans. """
+        self.clusters3 = None
+        self.clusters4 = None
+        self.reference_error3 = None
+        self.reference_error4 = None
+        self.drift = None
+        self.num_full = 0
+        self.num_incremental = 0
+
+    def calculateTransform(self, image):
+        if self.median_blur > 0:
+            image = cv2.medianBlur(image, self.median_blur)
+
+        if self.clusters3 is None:
+            self._full(image)
+        else:
+            self._incremental(image)
+            if self.drift > self.drift_threshold:
+                logger.debug('AI drift %.3f > %.3f: full recomputation' %
+                             (self.drift, self.drift_threshold))
+                self._full(image)
+
+        success, self.health, parameters = \
+            transform_from_clusters(self.clusters3, self.clusters4)
+        if not success:
+            raise Exception('calculate_transform failed')
+        self.scale = parameters['scale']
+        self.shift = parameters['shift']
+        logger.debug('Scale: %s shift: %s' % (self.scale, self.shift))
+
+    def _full(self, image):
+        self.clusters4 = runKMeans(image, num_colors=4, init=CENTERS2)
+        self.clusters3 = runKMeans(image, num_colors=3, init=CENTERS)
+        n = get_num_points(self.clusters3)
+        self.reference_error3 = -self.clusters3[2] / n
+        self.reference_error4 = -self.clusters4[2] / n
+        self.drift = 0.0
+        self.num_full += 1
+
+    def _incremental(self, image):
+        self.clusters4 = refineKMeans(image, self.clusters4[0], self.refine_iterations)
+        self.clusters3 = refineKMeans(image, self.clusters3[0], self.refine_iterations)
+        n = get_num_points(self.clusters3)
+        error3 = -self.clusters3[2] / n
+        error4 = -self.clusters4[2] / n
+        self.drift = max(relative_increase(error3, self.reference_error3),
+                         relative_increase(error4, self.reference_error4))
+        self.num_incremental += 1
+
+
+def get_num_points(clusters):
+    _, labelcount, _ = clusters
+    return float(sum(labelcount.values()))
+
+
+def relative_increase(value, reference):
+    eps = 1e-8
+    return (value - reference) / (reference + eps)
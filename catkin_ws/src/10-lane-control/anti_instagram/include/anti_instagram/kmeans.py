@@ -45,6 +45,43 @@ def runKMeans(cv_img, num_colors, init):
 	score=kmc.score(imgdata)
 	return trained_centers, labelcount,score
 
+def refineKMeans(cv_img, init, num_iterations):
+	""" 
+		Warm-started version of runKMeans(): runs a few iterations of 
+		Lloyd's algorithm starting from the given centers (for example,
+		the ones found for the previous frame). 
+		
+		Returns the same values as runKMeans().
+	"""
+	imgdata = getimgdatapts(cv_img[-100:,:,:]).astype('float64') # same cut off as runKMeans
+	centers = np.array(init, dtype='float64')
+	num_colors = centers.shape[0]
+	for _ in range(num_iterations):
+		labels, _ = assignToCenters(imgdata, centers)
+		counts = np.bincount(labels, minlength=num_colors)
+		for c in range(imgdata.shape[1]):
+			sums = np.bincount(labels, weights=imgdata[:, c], minlength=num_colors)
+			# empty clusters keep their previous center
+			nonempty = counts > 0
+			centers[nonempty, c] = sums[nonempty] / counts[nonempty]
+
+	labels, distances2 = assignToCenters(imgdata, centers)
+	counts = np.bincount(labels, minlength=num_colors)
+	labelcount = Counter()
+	for i in np.arange(num_colors):
+		labelcount[i] = counts[i]
+	# same convention as KMeans.score(): opposite of the inertia
+	score = -np.sum(distances2)
+	return centers, labelcount, score
+
+def assignToCenters(imgdata, centers):
+	""" Returns the label of the closest center for each point, 
+		and the squared distance to it. """
+	diff = imgdata[:, np.newaxis, :] - centers[np.newaxis, :, :]
+	distances2 = np.sum(diff * diff, axis=2)
+	labels = np.argmin(distances2, axis=1)
+	return labels, distances2[np.arange(len(labels)), labels]
+
 
 def identifyColors(trained, true):
 	# print trained
@@ -1,3 +1,4 @@
+import cv2
 import numpy as np
 
 class SASParams(object):
@@ -42,3 +43,32 @@ def scaleandshift1(img, scale, shift):
     img_shift = np.reshape(img_shift + np.array(shift), [h, w, 3])
 
     return img_shift
+
+
+def scaleandshift_lut(scale, shift):
+    """ 
+        Returns a lookup table of shape (256, 1, 3) (uint8) for cv2.LUT,
+        so that applying it gives the same result as
+
+            np.clip(scaleandshift(img, scale, shift), 0, 255).astype('uint8')
+
+        for uint8 images.
+    """
+    assert len(scale) == 3, scale
+    assert len(shift) == 3, shift
+
+    values = np.arange(256, dtype='float32')
+    lut = np.zeros((256, 1, 3), dtype='uint8')
+    for i in range(3):
+        s = np.array(scale[i]).astype('float32')
+        p = np.array(shift[i]).astype('float32')
+        # same operations, in the same precision, as scaleandshift2()
+        v = values * s + p
+        lut[:, 0, i] = np.clip(v, 0, 255).astype('uint8')
+    return lut
+
+def applylut(img, lut):
+    """ Applies a lookup table created by scaleandshift_lut(). """
+    assert img.dtype == np.uint8, img.dtype
+    assert img.shape[2] == 3
+    return cv2.LUT(img, lut)
@@ -1,3 +1,5 @@
 
 from . import iids_tests
 from . import annotations_test
+from . import incremental_tests
+from . import scale_and_shift_tests
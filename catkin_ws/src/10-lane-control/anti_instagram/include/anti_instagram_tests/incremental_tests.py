@@ -0,0 +1,52 @@
+from numpy.testing.utils import assert_allclose
+
+from anti_instagram import AntiInstagramIncremental, AntiInstagram
+import duckietown_utils as dtu
+import numpy as np
+
+
+def synthetic_road_image(H=120, W=160):
+    """ An image with gray, yellow and white pixels, plus noise. """
+    colors = np.array([[60, 60, 60], [50, 240, 240], [240, 240, 240]])
+    labels = np.random.randint(len(colors), size=(H, W))
+    noise = np.random.randn(H, W, 3) * 10
+    return np.clip(colors[labels] + noise, 0, 255).astype('uint8')
+
+
+@dtu.unit_test
+def test_incremental_same_image():
+    np.random.seed(0)
+    image = synthetic_road_image()
+
+    ai = AntiInstagram()
+    ai.calculateTransform(image)
+
+    aii = AntiInstagramIncremental(refine_iterations=2, drift_threshold=0.5)
+    aii.calculateTransform(image)
+    assert aii.num_full == 1
+    # the same image again: the centers do not move and there is no drift
+    aii.calculateTransform(image)
+    assert aii.num_full == 1
+    assert aii.num_incremental == 1
+    assert aii.drift < 0.01, aii.drift
+
+    assert_allclose(ai.scale, aii.scale, rtol=0.01)
+    assert_allclose(ai.shift, aii.shift, atol=1)
+
+
+@dtu.unit_test
+def test_incremental_drift():
+    np.random.seed(0)
+    image = synthetic_road_image()
+
+    aii = AntiInstagramIncremental(refine_iterations=1, drift_threshold=0.5)
+    aii.calculateTransform(image)
+
+    # a much noisier image makes the clusters worse: full recomputation
+    noisy = np.clip(image + np.random.randn(*image.shape) * 40, 0, 255).astype('uint8')
+    aii.calculateTransform(noisy)
+    assert aii.num_full == 2, aii.num_full
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -0,0 +1,31 @@
+from numpy.testing.utils import assert_equal
+
+from anti_instagram import AntiInstagram
+import duckietown_utils as dtu
+import numpy as np
+
+
+@dtu.unit_test
+def test_lut_equivalent():
+    np.random.seed(0)
+    image = np.random.randint(0, 256, size=(120, 160, 3)).astype('uint8')
+
+    ai_float = AntiInstagram(use_lut=False)
+    ai_lut = AntiInstagram(use_lut=True)
+
+    for _ in range(10):
+        scale = np.random.uniform(0.3, 3, 3)
+        shift = np.random.uniform(-200, 200, 3)
+        for ai in [ai_float, ai_lut]:
+            # set directly, as LineDetectorNode2 does
+            ai.scale = scale
+            ai.shift = shift
+
+        res_float = ai_float.applyTransform(image)
+        res_lut = ai_lut.applyTransform(image)
+        assert res_lut.dtype == np.uint8
+        assert_equal(res_float, res_lut)
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
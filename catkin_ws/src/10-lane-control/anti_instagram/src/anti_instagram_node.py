@@ -7,6 +7,7 @@ import duckietown_utils as dtu
 from cv_bridge import CvBridge
 from line_detector.timekeeper import TimeKeeper
 from anti_instagram.anti_instagram_imp import AntiInstagram
+from anti_instagram.anti_instagram_incremental import AntiInstagramIncremental
 
 class AntiInstagramNode(object):
     
@@ -17,6 +18,11 @@ class AntiInstagramNode(object):
         self.locked = False
 
         self.image_pub_switch = rospy.get_param("~publish_corrected_image",False)
+        # If true, the transform is updated for every image, not only on click
+        self.continuous = rospy.get_param("~continuous",False)
+        # In continuous mode, log every this many images (and on full recomputations)
+        self.continuous_log_interval = rospy.get_param("~continuous_log_interval",100)
+        self.num_continuous = 0
 
         # Initialize publishers and subscribers
         self.pub_image = rospy.Publisher("~corrected_image", Image, queue_size=1)
@@ -38,7 +44,10 @@ class AntiInstagramNode(object):
         self.transform = AntiInstagramTransform()
         # FIXME: read default from configuration and publish it
 
-        self.ai = AntiInstagram()
+        if self.continuous:
+            self.ai = AntiInstagramIncremental()
+        else:
+            self.ai = AntiInstagram()
         self.corrected_image = Image()
         self.bridge = CvBridge()
 
@@ -49,6 +58,10 @@ class AntiInstagramNode(object):
         # memorize image
         self.image_msg = image_msg
 
+        # in continuous mode, update the transform only while the correction is ON
+        if self.continuous and self.click_on:
+            self.processImageContinuous(image_msg)
+
         if self.image_pub_switch:
             tk = TimeKeeper(image_msg)
             cv_image = self.bridge.imgmsg_to_cv2(image_msg, "bgr8")
@@ -78,12 +91,26 @@ class AntiInstagramNode(object):
                 self.transform.s = [0,0,0,1,1,1]
                 self.pub_transform.publish(self.transform)
                 rospy.loginfo('ai: Color transform is turned OFF!')
-
-
-    def processImage(self,msg):
+                if self.continuous:
+                    # start again from the full computation when turned ON
+                    self.ai.reset()
+
+    def processImageContinuous(self, msg):
+        """ Updates the transform with one more image, logging only now and then. """
+        num_full = self.ai.num_full
+        self.processImage(msg, verbose=False)
+        self.num_continuous += 1
+        refit = self.ai.num_full > num_full
+        if refit or self.num_continuous % self.continuous_log_interval == 0:
+            rospy.loginfo('ai: Color transform updated (%d full, %d incremental computations, drift %s).' %
+                          (self.ai.num_full, self.ai.num_incremental, self.ai.drift))
+
+
+    def processImage(self,msg,verbose=True):
         '''
         Inputs:
             msg - CompressedImage - uncorrected image from raspberry pi camera
+            verbose - if False, only the problems are logged
 
         Uses anti_instagram library to adjust msg so that it looks like the same
         color temperature as a duckietown reference image. Calculates health of the node
@@ -91,7 +118,8 @@ class AntiInstagramNode(object):
         to how good of a transformation it is.
         '''
 
-        rospy.loginfo('ai: Computing color transform...')
+        if verbose:
+            rospy.loginfo('ai: Computing color transform...')
         tk = TimeKeeper(msg)
 
         try:
@@ -120,7 +148,8 @@ class AntiInstagramNode(object):
 
             self.pub_health.publish(self.health)
             self.pub_transform.publish(self.transform)
-            rospy.loginfo('ai: Color transform published.')
+            if verbose:
+                rospy.loginfo('ai: Color transform published.')
 
 
 if __name__ == '__main__':
@@ -75,13 +75,10 @@ def look_at(log, output, anti_instagram, line_detector, image_prep, lane_filter,
     gp = GroundProjection(vehicle_name)
 
     topic = dtu.get_image_topic(bag)
-    res = dtu.d8n_read_all_images_from_bag(bag, topic, max_images=1)
+    images = dtu.d8n_iterate_images_from_bag(bag, topic, max_images=1, nthreads=1)
+    _timestamp, image_cv_bgr = list(images)[0]
 
-    image_cv = res[0]['rgb']
-
-#     dtu.logger.debug(dtu.describe_value(image_cv))
-
-    image_cv_bgr = dtu.bgr_from_rgb(image_cv)
+#     dtu.logger.debug(dtu.describe_value(image_cv_bgr))
 
     dtu.DuckietownConstants.show_timeit_benchmarks = True
     res, _stats = run_pipeline(image_cv_bgr, gp=gp,
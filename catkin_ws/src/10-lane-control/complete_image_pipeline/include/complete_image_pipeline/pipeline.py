@@ -22,11 +22,27 @@ from localization_templates import FAMILY_LOC_TEMPLATES
 import numpy as np
 
 
+class PipelineDetails(object):
+    """
+        The levels of detail of run_pipeline(), from the cheapest.
+    """
+    # Only the estimate: res contains the segments ("segment_list")
+    # and the belief of the lane filter ("belief"), and no images.
+    ESTIMATE = 0
+    # As ESTIMATE, and also the quality in the stats.
+    STATS = 1
+    # The images of the localization (plots of the belief and of the map).
+    DEFAULT = 2
+    # Also the intermediate images of the line detection.
+    ALL = 3
+
+
 @dtu.contract(gp=GroundProjection, ground_truth='SE2|None', image='array[HxWx3](uint8)')
 def run_pipeline(image, gp, line_detector_name, image_prep_name, lane_filter_name, anti_instagram_name,
                  all_details=False,
                  ground_truth=None,
-                 actual_map=None):
+                 actual_map=None,
+                 details=None):
     """
         Image: numpy (H,W,3) == BGR
         Returns a dictionary, res with the following fields:
@@ -34,27 +50,65 @@ def run_pipeline(image, gp, line_detector_name, image_prep_name, lane_filter_nam
             res['input_image']
 
         ground_truth = pose
+
+        details: one of the PipelineDetails levels; by default, ALL
+        if all_details is True and DEFAULT otherwise.
+
+        The algorithm instances are pooled (see EasyAlgoDB.get_pooled_instance),
+        so a stateful one (such as the "incremental" anti_instagram) remembers
+        the previous images. Call get_easy_algo_db().reset_instance_pool()
+        before processing an unrelated sequence of images.
     """
-    from anti_instagram import AntiInstagramInterface
+    if details is None:
+        details = PipelineDetails.ALL if all_details else PipelineDetails.DEFAULT
+
+    if details >= PipelineDetails.DEFAULT:
+        print('backend: %s' % matplotlib.get_backend())
+        print('fname: %s' % matplotlib.matplotlib_fname())
+
+    res, detections = run_pipeline_detection(image, gp,
+                                             line_detector_name=line_detector_name,
+                                             image_prep_name=image_prep_name,
+                                             anti_instagram_name=anti_instagram_name,
+                                             details=details)
+    return run_pipeline_localization(image, gp, res, detections,
+                                     lane_filter_name=lane_filter_name,
+                                     details=details,
+                                     ground_truth=ground_truth,
+                                     actual_map=actual_map)
+
+
+@dtu.contract(gp=GroundProjection, image='array[HxWx3](uint8)')
+def run_pipeline_detection(image, gp, line_detector_name, image_prep_name, anti_instagram_name,
+                           details=PipelineDetails.DEFAULT):
+    """
+        The first part of run_pipeline(), which depends only on the image:
+        color correction, line detection, and ground projection.
 
-    print('backend: %s' % matplotlib.get_backend())
-    print('fname: %s' % matplotlib.matplotlib_fname())
+        Returns (res, detections), where res contains the images created
+        so far and detections is a dict with the segments
+        ("segment_list_rect"), their ground coordinates ("ground_segments")
+        and the rectified image ("rectified", None if details < DEFAULT).
 
-    quick = False
+        The results can be pickled, so this can run in another process.
+    """
+    from anti_instagram import AntiInstagramInterface
 
     dtu.check_isinstance(image, np.ndarray)
+    all_details = details >= PipelineDetails.ALL
 
     gpg = gp.get_ground_projection_geometry()
 
     res = OrderedDict()
-    stats = OrderedDict()
 
-    res['Raw input image'] = image
+    if details >= PipelineDetails.DEFAULT:
+        res['Raw input image'] = image
+    # The instances are reused across calls, with their state
+    # (see run_pipeline())
     algo_db = get_easy_algo_db()
-    line_detector = algo_db.create_instance(FAMILY_LINE_DETECTOR, line_detector_name)
-    lane_filter = algo_db.create_instance(FAMILY_LANE_FILTER, lane_filter_name)
-    image_prep = algo_db.create_instance(ImagePrep.FAMILY, image_prep_name)
-    ai = algo_db.create_instance(AntiInstagramInterface.FAMILY, anti_instagram_name)
+    line_detector = algo_db.get_pooled_instance(FAMILY_LINE_DETECTOR, line_detector_name)
+    image_prep = algo_db.get_pooled_instance(ImagePrep.FAMILY, image_prep_name)
+    ai = algo_db.get_pooled_instance(AntiInstagramInterface.FAMILY, anti_instagram_name)
 
     pts = ProcessingTimingStats()
     pts.reset()
@@ -110,6 +164,56 @@ def run_pipeline(image, gp, line_detector_name, image_prep_name, lane_filter_nam
     with pts.phase('find_ground_coordinates'):
         sg = find_ground_coordinates(gpg, segment_list2_rect)
 
+    if details >= PipelineDetails.DEFAULT:
+        with pts.phase('rectify'):
+            rectified0 = gpg.rectify(image)
+
+        # with the transform computed for this image
+        rectified = ai.applyTransform(rectified0)
+    else:
+        rectified = None
+
+    detections = OrderedDict()
+    detections['segment_list_rect'] = segment_list2_rect
+    detections['ground_segments'] = sg
+    detections['rectified'] = rectified
+
+    dtu.logger.info(pts.get_stats())
+    return res, detections
+
+
+@dtu.contract(gp=GroundProjection, ground_truth='SE2|None', image='array[HxWx3](uint8)')
+def run_pipeline_localization(image, gp, res, detections, lane_filter_name,
+                              details=PipelineDetails.DEFAULT,
+                              ground_truth=None,
+                              actual_map=None):
+    """
+        The second part of run_pipeline(): the lane filter update,
+        the visualization and the quality computation, given the output
+        (res, detections) of run_pipeline_detection().
+
+        Returns (res, stats) as run_pipeline().
+    """
+    all_details = details >= PipelineDetails.ALL
+    plots = details >= PipelineDetails.DEFAULT
+
+    gpg = gp.get_ground_projection_geometry()
+    segment_list2_rect = detections['segment_list_rect']
+    sg = detections['ground_segments']
+    rectified = detections['rectified']
+
+    res = OrderedDict(res)
+    stats = OrderedDict()
+
+    # The lane filter is re-initialized below, before being used.
+    algo_db = get_easy_algo_db()
+    lane_filter = algo_db.get_pooled_instance(FAMILY_LANE_FILTER, lane_filter_name)
+
+    pts = ProcessingTimingStats()
+    pts.reset()
+    pts.received_message()
+    pts.decided_to_process()
+
     lane_filter.initialize()
     if all_details:
         res['prior'] = lane_filter.get_plot_phi_d()
@@ -117,9 +221,22 @@ def run_pipeline(image, gp, line_detector_name, image_prep_name, lane_filter_nam
     with pts.phase('lane filter update'):
         _likelihood = lane_filter.update(sg)
 
-    if not quick:
+    if plots:
         with pts.phase('lane filter plot'):
             res['likelihood'] = lane_filter.get_plot_phi_d(ground_truth=ground_truth)
+    with pts.phase('lane filter get_estimate()'):
+        est = lane_filter.get_estimate()
+    stats['estimate'] = est
+
+    if not plots:
+        res['segment_list'] = segment_list2_rect
+        # a copy, because the lane filter instance is reused
+        res['belief'] = np.copy(lane_filter.get_belief())
+
+    if details == PipelineDetails.ESTIMATE:
+        dtu.logger.info(pts.get_stats())
+        return res, stats
+
     easy_algo_db = get_easy_algo_db()
 
     if isinstance(lane_filter, (LaneFilterMoreGeneric)):
@@ -129,10 +246,7 @@ def run_pipeline(image, gp, line_detector_name, image_prep_name, lane_filter_nam
         dtu.logger.debug('Using default template %r for visualization' % template_name)
 
     localization_template = \
-        easy_algo_db.create_instance(FAMILY_LOC_TEMPLATES, template_name)
-
-    with pts.phase('lane filter get_estimate()'):
-        est = lane_filter.get_estimate()
+        easy_algo_db.get_pooled_instance(FAMILY_LOC_TEMPLATES, template_name)
 
     # Coordinates in TILE frame
     g = localization_template.pose_from_coords(est)
@@ -145,46 +259,44 @@ def run_pipeline(image, gp, line_detector_name, image_prep_name, lane_filter_nam
             res['real'] = plot_map_and_segments(actual_map, tinfo, sg.segments, dpi=120,
                                                  ground_truth=ground_truth)
 
-    with pts.phase('rectify'):
-        rectified0 = gpg.rectify(image)
-
-    rectified = ai.applyTransform(rectified0)
-
     if all_details:
         res['image_input_rect'] = rectified
 
-    res['segments rectified on image rectified'] = \
-        vs_fancy_display(rectified, segment_list2_rect)
+    if plots:
+        res['segments rectified on image rectified'] = \
+            vs_fancy_display(rectified, segment_list2_rect)
 
     assumed = localization_template.get_map()
 
-    if not quick:
+    if plots:
         with pts.phase('plot_map_and_segments'):
             res['model assumed for localization'] = plot_map_and_segments(assumed, tinfo, sg.segments, dpi=120,
                                                ground_truth=ground_truth)
 
     assumed_axle = tinfo.transform_map_to_frame(assumed, FRAME_AXLE)
 
-    with pts.phase('plot_map reprojected'):
-        res['map reprojected on image'] = plot_map(rectified, assumed_axle, gpg,
-                                               do_ground=False, do_horizon=True,
-                                               do_faces=False, do_faces_outline=True,
-                                               do_segments=False)
+    if plots:
+        with pts.phase('plot_map reprojected'):
+            res['map reprojected on image'] = plot_map(rectified, assumed_axle, gpg,
+                                                   do_ground=False, do_horizon=True,
+                                                   do_faces=False, do_faces_outline=True,
+                                                   do_segments=False)
 
     with pts.phase('quality computation'):
         predicted_segment_list_rectified = predict_segments(sm=assumed_axle, gpg=gpg)
-        quality_res, quality_stats = judge_quality(image, segment_list2_rect, predicted_segment_list_rectified)
+        quality_res, quality_stats = judge_quality(image, segment_list2_rect, predicted_segment_list_rectified,
+                                                   summary=plots)
         res.update(quality_res)
 
 #     res['blurred']= cv2.medianBlur(image, 11)
-    stats['estimate'] = est
     stats.update(quality_stats)
 
     dtu.logger.info(pts.get_stats())
     return res, stats
 
 
-def judge_quality(image, observed_segment_list, predicted_segment_list):
+def judge_quality(image, observed_segment_list, predicted_segment_list, summary=True):
+    """ If summary is False, only the stats are computed, without the summary image. """
     res = OrderedDict()
     stats = OrderedDict()
 
@@ -195,7 +307,7 @@ def judge_quality(image, observed_segment_list, predicted_segment_list):
     observed_width = int(14 * r)
     predicted_width = int(50 * r)
 
-    summary_bgr = np.zeros(reason_shape, 'uint8')
+    summary_bgr = np.zeros(reason_shape, 'uint8') if summary else None
 
     ratios = []
     for color in [Segment.WHITE, Segment.YELLOW, Segment.RED, ]:
@@ -213,9 +325,10 @@ def judge_quality(image, observed_segment_list, predicted_segment_list):
         explained = np.sign(observed_mask * predicted_mask)
         not_explained = observed_mask - explained
 
-        _B, G, R = 0, 1, 2
-        summary_bgr[:, :, R] |= (not_explained * 255).astype('uint8')
-        summary_bgr[:, :, G] |= (explained * 255).astype('uint8')
+        if summary:
+            _B, G, R = 0, 1, 2
+            summary_bgr[:, :, R] |= (not_explained * 255).astype('uint8')
+            summary_bgr[:, :, G] |= (explained * 255).astype('uint8')
 
         ratio_explained = 1 - (np.sum(not_explained) / (np.sum(explained) + np.sum(not_explained) + 1))
         ratios.append(ratio_explained)
@@ -226,8 +339,9 @@ def judge_quality(image, observed_segment_list, predicted_segment_list):
     avg = np.mean(ratios)
 
     percent = lambda x: '%d%%' % (x * 100)
-    s = "W %s Y %s R %s" % (percent(ratios[0]), percent(ratios[1]), percent(ratios[2]))
-    res['explained %s [%s]' % (percent(avg), s)] = summary_bgr
+    if summary:
+        s = "W %s Y %s R %s" % (percent(ratios[0]), percent(ratios[1]), percent(ratios[2]))
+        res['explained %s [%s]' % (percent(avg), s)] = summary_bgr
 
     stats['quality'] = avg
     stats['ratios'] = ratios
@@ -260,10 +374,9 @@ def get_grid(shape, L=32, col={0: (255, 0, 0), 1: (0, 255, 0)}):
     """ Creates a grid of given shape """
     H, W = shape
     res = np.zeros((H, W, 3), 'uint8')
-    for i in range(H):
-        for j in range(W):
-            cx = int(i / L)
-            cy = int(j / L)
-            coli = (cx + cy) % 2
-            res[i, j, :] = col[coli]
+    cx = (np.arange(H) // L)[:, np.newaxis]
+    cy = (np.arange(W) // L)[np.newaxis, :]
+    coli = (cx + cy) % 2
+    for k, color in col.items():
+        res[coli == k] = color
     return res
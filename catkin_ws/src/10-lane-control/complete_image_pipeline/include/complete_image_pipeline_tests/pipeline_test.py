@@ -1,7 +1,10 @@
-from complete_image_pipeline.pipeline import run_pipeline
+from complete_image_pipeline.pipeline import run_pipeline, PipelineDetails
 import duckietown_utils as dtu
+from easy_algo import get_easy_algo_db
+import numpy as np
 
 from ground_projection import GroundProjection
+from lane_filter import FAMILY_LANE_FILTER
 
 
 @dtu.unit_test
@@ -26,3 +29,64 @@ def single_image1():
     outd = dtu.get_output_dir_for_test()
     dtu.write_jpgs_to_dir(res, outd)
 
+
+@dtu.unit_test
+def single_image_details():
+    p = dtu.require_resource('frame0002.jpg')
+    image_cv = dtu.image_cv_from_jpg_fn(p)
+
+    robot_name = dtu.DuckietownConstants.ROBOT_NAME_FOR_TESTS
+    gp = GroundProjection(robot_name)
+
+    def run(details, lane_filter_name='baseline'):
+        return run_pipeline(image_cv, gp,
+                            line_detector_name='baseline',
+                            image_prep_name='baseline',
+                            lane_filter_name=lane_filter_name,
+                            anti_instagram_name='baseline',
+                            details=details)
+
+    res, stats = run(PipelineDetails.ESTIMATE)
+    assert list(res) == ['segment_list', 'belief'], list(res)
+    assert list(stats) == ['estimate']
+
+    res2, stats2 = run(PipelineDetails.STATS)
+    assert list(res2) == ['segment_list', 'belief'], list(res2)
+    assert 'quality' in stats2
+
+    # the same estimate as with the images
+    _res3, stats3 = run(PipelineDetails.DEFAULT)
+    assert stats3['estimate'] == stats['estimate']
+    assert stats3['quality'] == stats2['quality']
+
+    # the belief is the one of the estimate
+    # (LaneFilterClassic and LaneFilterHistogram)
+    for lane_filter_name in ['baseline', 'controllers17']:
+        res, stats = run(PipelineDetails.ESTIMATE, lane_filter_name)
+        belief = res['belief']
+        lane_filter = get_easy_algo_db().get_pooled_instance(FAMILY_LANE_FILTER, lane_filter_name)
+        d, phi = estimate_from_belief(lane_filter, belief)
+        estimate = stats['estimate']
+        assert np.allclose([d, phi], [estimate['d'], estimate['phi']]), \
+            (lane_filter_name, d, phi, estimate)
+
+        # not the prior
+        lane_filter.initialize()
+        assert not np.allclose(belief, lane_filter.get_belief()), lane_filter_name
+
+
+def estimate_from_belief(lane_filter, belief):
+    """ Returns (d, phi) at the maximum of the belief. """
+
+    def cell_center(b):
+        i, j = np.unravel_index(b.argmax(), b.shape)
+        return (lane_filter.d_min + (i + 0.5) * lane_filter.delta_d,
+                lane_filter.phi_min + (j + 0.5) * lane_filter.delta_phi)
+
+    if belief.ndim == 2:
+        return cell_center(belief)
+    else:
+        # LaneFilterHistogram: the median of the maxima of the beliefs
+        # for the ranges after the first one
+        centers = np.array([cell_center(b) for b in belief[1:]])
+        return np.median(centers[:, 0]), np.median(centers[:, 1])
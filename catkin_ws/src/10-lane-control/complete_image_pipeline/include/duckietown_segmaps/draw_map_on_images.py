@@ -290,7 +290,7 @@ def predict_segments(sm, gpg):
     """
     x_frustum = +0.1
     fov = np.deg2rad(150)
-    res = []
+    visible = []
     for segment in sm.segments:
         p1 = segment.points[0]
         p2 = segment.points[1]
@@ -308,16 +308,22 @@ def predict_segments(sm, gpg):
 
         if not coords_inside:
             continue
-        w1 = coords_inside[0]
-        w2 = coords_inside[1]
+        visible.append((segment, coords_inside[0], coords_inside[1]))
+
+    # project all the endpoints at once, two rows per segment
+    ground = np.zeros((2 * len(visible), 3))
+    for k, (_, w1, w2) in enumerate(visible):
+        ground[2 * k, :] = w1[0:3]
+        ground[2 * k + 1, :] = w2[0:3]
+    normalized = gpg.ground2vector_v(ground)
+
+    res = []
+    for k, (segment, w1, w2) in enumerate(visible):
         point1 = Point(w1[0], w1[1], w1[2])
         point2 = Point(w2[0], w2[1], w2[2])
 
-        pixel1 = gpg.ground2pixel(point1)
-        pixel2 = gpg.ground2pixel(point2)
-
-        normalized1 = gpg.pixel2vector(pixel1)
-        normalized2 = gpg.pixel2vector(pixel2)
+        normalized1 = Vector2D(*normalized[2 * k, :])
+        normalized2 = Vector2D(*normalized[2 * k + 1, :])
 
         pixels_normalized = [normalized1, normalized2]
         normal = Vector2D(0, 0)
@@ -133,6 +133,74 @@ class GroundProjectionGeometry(object):
 #         print res1, res2
         return res1
 
+    # Array versions of the methods above: they take and return numpy
+    # arrays with one point per row, so that many points can be converted
+    # with a single matrix operation.
+
+    @dtu.contract(vectors='array[Nx2]', returns='array[Nx2]')
+    def vector2pixel_v(self, vectors):
+        """ Array version of vector2pixel(). """
+        scale = np.array([self.ci.width, self.ci.height], dtype='float64')
+        return vectors * scale
+
+    @dtu.contract(pixels='array[Nx2]', returns='array[Nx2]')
+    def pixel2vector_v(self, pixels):
+        """ Array version of pixel2vector(). """
+        scale = np.array([self.ci.width, self.ci.height], dtype='float64')
+        return pixels / scale
+
+    @dtu.contract(vectors='array[Nx2]', returns='array[Nx3]')
+    def vector2ground_v(self, vectors):
+        """ Array version of vector2ground(). """
+        pixels = self.vector2pixel_v(vectors)
+        return self.pixel2ground_v(pixels)
+
+    @dtu.contract(points='array[Nx3]', returns='array[Nx2]')
+    def ground2vector_v(self, points):
+        """ Array version of ground2vector(). """
+        pixels = self.ground2pixel_v(points)
+        return self.pixel2vector_v(pixels)
+
+    @dtu.contract(pixels='array[Nx2]', returns='array[Nx3]')
+    def pixel2ground_v(self, pixels):
+        """ Array version of pixel2ground(); returns points with z = 0. """
+        n = pixels.shape[0]
+        uv_raw = np.ones((3, n))
+        uv_raw[0:2, :] = pixels.T
+        ground_points = np.dot(self.H, uv_raw)
+        points = np.zeros((n, 3))
+        points[:, 0] = ground_points[0, :] / ground_points[2, :]
+        points[:, 1] = ground_points[1, :] / ground_points[2, :]
+        return points
+
+    @dtu.contract(points='array[Nx3]', returns='array[Nx2]')
+    def ground2pixel_v(self, points):
+        """ Array version of ground2pixel(). """
+        if np.any(points[:, 2] != 0):
+            msg = 'This method assumes that the points are ground points (z=0). '
+            msg += 'However, some points have z != 0:\n%s' % points[points[:, 2] != 0]
+            raise ValueError(msg)
+
+        n = points.shape[0]
+        ground_points = np.ones((3, n))
+        ground_points[0:2, :] = points[:, 0:2].T
+        image_points = np.linalg.solve(self.H, ground_points)
+
+        pixels = np.empty((n, 2))
+        pixels[:, 0] = image_points[0, :] / image_points[2, :]
+        pixels[:, 1] = image_points[1, :] / image_points[2, :]
+        return pixels
+
+    @dtu.contract(pixels='array[Nx2]', returns='array[Nx2]')
+    def rectify_point_v(self, pixels):
+        """ Array version of rectify_point(). """
+        if pixels.shape[0] == 0:
+            return np.zeros((0, 2))
+        pcm = self.pcm
+        src = pixels.reshape((-1, 1, 2)).astype('float64')
+        dst = cv2.undistortPoints(src, pcm.K, pcm.D, R=pcm.R, P=pcm.P)
+        return dst.reshape((-1, 2))
+
     def _init_rectify_maps(self):
         W = self.pcm.width
         H = self.pcm.height
@@ -161,13 +229,33 @@ class GroundProjectionGeometry(object):
                         cv_image_rectified)
         return res
 
+    def get_intrinsics_hash(self):
+        """ Returns a string that identifies the camera intrinsics. """
+        pcm = self.pcm
+        data = [pcm.width, pcm.height]
+        data.extend(np.asarray(x, dtype='float64').tolist()
+                    for x in (pcm.K, pcm.D, pcm.R, pcm.P))
+        return dtu.get_md5(repr(data))
+
+    def _init_distort_maps(self):
+        """
+            The inverse maps only depend on the intrinsics, so they
+            are computed once and then read from the cache.
+        """
+
+        def f():
+            if not self._rectify_inited:
+                self._init_rectify_maps()
+            return invert_map_v(self.mapx, self.mapy)
+
+        cache_name = 'distort_maps/' + self.get_intrinsics_hash()
+        self.rmapx, self.rmapy = dtu.get_cached(cache_name, f, quiet=True)
+        self._distort_inited = True
+
     def distort(self, rectified):
-        if not self._rectify_inited:
-            self._init_rectify_maps()
         if not self._distort_inited:
-            self.rmapx, self.rmapy = invert_map(self.mapx, self.mapy)
-            self._distort_inited = True
-        distorted = np.zeros(np.shape(rectified))
+            self._init_distort_maps()
+        distorted = np.empty_like(rectified)
         res = cv2.remap(rectified, self.rmapx, self.rmapy, cv2.INTER_NEAREST, distorted)
         return res
 
@@ -246,15 +334,7 @@ def fill_holes(rmapx, rmapy):
 
     nholes = 0
 
-    R = 2
-    F = R * 2 + 1
-
-    def norm(x):
-        return np.hypot(x[0], x[1])
-
-    deltas0 = [ (i - R - 1, j - R - 1) for i, j in itertools.product(range(F), range(F))]
-    deltas0 = [x for x in deltas0 if norm(x) <= R]
-    deltas0.sort(key=norm)
+    deltas0 = get_fill_holes_deltas(R=2)
 
     def get_deltas():
 #         deltas = list(deltas0)
@@ -292,3 +372,95 @@ def fill_holes(rmapx, rmapy):
 #     print('holes: %s' % holes)
 #     print('deltas: %s' % get_deltas())
 
+
+
+def invert_map_v(mapx, mapy):
+    """
+        Array version of invert_map().
+
+        As in the loop version, when several pixels are mapped to the
+        same target, the last one (in row-major order) is kept.
+    """
+    H, W = mapx.shape[0:2]
+    rmapx = np.empty_like(mapx)
+    rmapx.fill(np.nan)
+    rmapy = np.empty_like(mapx)
+    rmapy.fill(np.nan)
+
+    y, x = np.mgrid[0:H, 0:W]
+    tx = np.round(mapx.reshape((H, W))).astype('int64')
+    ty = np.round(mapy.reshape((H, W))).astype('int64')
+
+    valid = (0 <= tx) & (tx < W) & (0 <= ty) & (ty < H)
+    source = np.flatnonzero(valid)
+    target = ty.ravel()[source] * W + tx.ravel()[source]
+
+    # np.unique returns the first occurrence; look at the reversed
+    # sequence to get the last one instead
+    target_rev = target[::-1]
+    source_rev = source[::-1]
+    target_unique, first = np.unique(target_rev, return_index=True)
+    source_unique = source_rev[first]
+
+    rmapx.reshape(-1)[target_unique] = x.ravel()[source_unique]
+    rmapy.reshape(-1)[target_unique] = y.ravel()[source_unique]
+
+    fill_holes_v(rmapx, rmapy)
+
+    return rmapx, rmapy
+
+
+def fill_holes_v(rmapx, rmapy):
+    """
+        Array version of fill_holes().
+
+        At each pass, every hole takes the value of the closest neighbor
+        that was not a hole at the beginning of the pass, so the known
+        values grow by one ring per pass. The loop version updates the map
+        while visiting the holes in arbitrary (set) order, so the values
+        used for the filled pixels can differ; the other pixels are the same.
+    """
+    H, W = rmapx.shape[0:2]
+    # work on 2D views, so that the changes are seen by the caller
+    mx = rmapx.reshape((H, W))
+    my = rmapy.reshape((H, W))
+
+    deltas = get_fill_holes_deltas(R=2)
+    holes = np.isnan(mx)
+
+    while np.any(holes):
+        known_x = mx.copy()
+        known_y = my.copy()
+        known = ~holes
+        filled = np.zeros((H, W), dtype='bool')
+
+        for di, dj in deltas:
+            # region of (i, j) such that (i + di, j + dj) is inside the image
+            i0, i1 = max(0, -di), min(H, H - di)
+            j0, j1 = max(0, -dj), min(W, W - dj)
+            if i0 >= i1 or j0 >= j1:
+                continue
+            dst = (slice(i0, i1), slice(j0, j1))
+            src = (slice(i0 + di, i1 + di), slice(j0 + dj, j1 + dj))
+
+            use = holes[dst] & ~filled[dst] & known[src]
+            mx[dst][use] = known_x[src][use]
+            my[dst][use] = known_y[src][use]
+            filled[dst] |= use
+
+        if not np.any(filled):
+            break
+        holes &= ~filled
+
+
+def get_fill_holes_deltas(R):
+    """ Returns the offsets of the neighbors to look at, closest first. """
+    F = R * 2 + 1
+
+    def norm(x):
+        return np.hypot(x[0], x[1])
+
+    deltas0 = [ (i - R - 1, j - R - 1) for i, j in itertools.product(range(F), range(F))]
+    deltas0 = [x for x in deltas0 if norm(x) <= R]
+    deltas0.sort(key=norm)
+    return deltas0
@@ -5,12 +5,14 @@ import cv2
 
 from duckietown_msgs.msg import Segment, SegmentList
 import duckietown_utils as dtu
+from geometry_msgs.msg import Point
 from ground_projection.configuration import get_extrinsics_filename
 import numpy as np
 from pi_camera import get_camera_info_for_robot
 
 from .configuration import get_homography_for_robot
 from .ground_projection_geometry import GroundProjectionGeometry
+from .segment import vectors_from_segments
 
 __all__ = [
     'GroundProjection',
@@ -165,9 +167,11 @@ def find_ground_coordinates(gpg, sl, skip_not_on_ground=True):
     sl2.header = sl.header
 
     # Get ground truth of segmentList
-    for s1 in sl.segments:
-        g0 = gpg.vector2ground(s1.pixels_normalized[0])
-        g1 = gpg.vector2ground(s1.pixels_normalized[1])
+    vectors = vectors_from_segments(sl.segments)
+    ground = gpg.vector2ground_v(vectors)
+    for k, s1 in enumerate(sl.segments):
+        g0 = Point(*ground[2 * k, :])
+        g1 = Point(*ground[2 * k + 1, :])
         if skip_not_on_ground:
             if g0.x < cutoff or g1.x < cutoff:
                 continue
@@ -1,6 +1,7 @@
-from duckietown_msgs.msg import Pixel, Segment, SegmentList
+from duckietown_msgs.msg import Pixel, Segment, SegmentList, Vector2D
 import duckietown_utils as dtu
 from ground_projection.ground_projection_geometry import GroundProjectionGeometry
+import numpy as np
 
 
 @dtu.contract(gpg=GroundProjectionGeometry, s1=Segment, returns=Segment)
@@ -27,11 +28,32 @@ def rectify_segment(gpg, s1):
 @dtu.contract(gpg=GroundProjectionGeometry, segment_list=SegmentList,
               returns=SegmentList)
 def rectify_segments(gpg, segment_list):
-    res = []
+    """ Same as calling rectify_segment() on each segment, but all the
+        points are converted at once. """
+    segments = segment_list.segments
+    # normalized coordinates, two rows per segment
+    vectors = vectors_from_segments(segments)
+    pixels = gpg.vector2pixel_v(vectors)
+    # rectify
+    pixels_rectified = gpg.rectify_point_v(pixels)
+    # recompute normalized coordinates
+    vectors_rectified = gpg.pixel2vector_v(pixels_rectified)
 
-    for segment in segment_list.segments:
-        s2 = rectify_segment(gpg, segment)
+    res = []
+    for k, s1 in enumerate(segments):
+        pixels_normalized = [Vector2D(*vectors_rectified[2 * k + i, :]) for i in (0, 1)]
+        s2 = Segment(color=s1.color, pixels_normalized=pixels_normalized)
         res.append(s2)
 
     return SegmentList(segments=res)
 
+
+def vectors_from_segments(segments):
+    """ Returns a (2N)x2 array with the normalized coordinates
+        of the two endpoints of each segment. """
+    vectors = np.zeros((2 * len(segments), 2))
+    for k, s in enumerate(segments):
+        for i in (0, 1):
+            vectors[2 * k + i, 0] = s.pixels_normalized[i].x
+            vectors[2 * k + i, 1] = s.pixels_normalized[i].y
+    return vectors
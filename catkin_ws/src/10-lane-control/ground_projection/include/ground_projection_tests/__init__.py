@@ -0,0 +1,2 @@
+from . import distort_maps
+from . import geometry_v
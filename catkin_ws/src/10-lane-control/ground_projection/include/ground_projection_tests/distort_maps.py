@@ -0,0 +1,78 @@
+import duckietown_utils as dtu
+from ground_projection import get_ground_projection_geometry_for_robot
+from ground_projection.ground_projection_geometry import invert_map, invert_map_v, fill_holes_v
+import numpy as np
+
+
+@dtu.unit_test
+def invert_map_v_same_as_loop():
+    robot_name = dtu.DuckietownConstants.ROBOT_NAME_FOR_TESTS
+    gpg = get_ground_projection_geometry_for_robot(robot_name)
+    gpg._init_rectify_maps()
+    mapx, mapy = gpg.mapx, gpg.mapy
+    H, W = mapx.shape[0:2]
+
+    rmapx1, rmapy1 = invert_map(mapx, mapy)
+    rmapx2, rmapy2 = invert_map_v(mapx, mapy)
+
+    # The pixels that are the target of some source pixel are the same;
+    # when there are several sources, the last one is kept by both.
+    tx = np.round(mapx.reshape((H, W))).astype('int64')
+    ty = np.round(mapy.reshape((H, W))).astype('int64')
+    valid = (0 <= tx) & (tx < W) & (0 <= ty) & (ty < H)
+    targets = np.zeros((H, W), dtype='bool')
+    targets[ty[valid], tx[valid]] = True
+    assert np.any(targets)
+    ntargets = np.sum(targets)
+    assert ntargets < np.sum(valid), 'Expected some collisions in the maps.'
+
+    r1 = rmapx1.reshape((H, W)), rmapy1.reshape((H, W))
+    r2 = rmapx2.reshape((H, W)), rmapy2.reshape((H, W))
+    for a, b in zip(r1, r2):
+        np.testing.assert_array_equal(a[targets], b[targets])
+        # the holes are filled in a different order, but the same ones are filled
+        np.testing.assert_array_equal(np.isnan(a), np.isnan(b))
+
+
+@dtu.unit_test
+def fill_holes_v_fills_only_holes():
+    H, W = 30, 40
+    rmapx = np.arange(H * W, dtype='float32').reshape((H, W))
+    rmapy = -rmapx
+    holes = np.zeros((H, W), dtype='bool')
+    holes[0, 0] = True  # corner
+    holes[10, 10] = True  # isolated
+    holes[15:25, 20:35] = True  # larger than the fill radius
+    holes[:, 38] = True  # whole column
+    rmapx[holes] = np.nan
+    rmapy[holes] = np.nan
+    rmapx0 = rmapx.copy()
+    rmapy0 = rmapy.copy()
+
+    fill_holes_v(rmapx, rmapy)
+
+    assert not np.any(np.isnan(rmapx))
+    assert not np.any(np.isnan(rmapy))
+    np.testing.assert_array_equal(rmapx[~holes], rmapx0[~holes])
+    np.testing.assert_array_equal(rmapy[~holes], rmapy0[~holes])
+    # x and y are taken from the same pixel
+    np.testing.assert_array_equal(rmapy, -rmapx)
+    # every hole takes the value of a pixel that was not a hole
+    assert set(rmapx[holes].tolist()) <= set(rmapx0[~holes].tolist())
+    # an isolated hole takes the value of one of the closest neighbors
+    neighbors = [rmapx0[10 + di, 10 + dj] for di, dj in [(-1, 0), (1, 0), (0, -1), (0, 1)]]
+    assert rmapx[10, 10] in neighbors, (rmapx[10, 10], neighbors)
+
+
+@dtu.unit_test
+def fill_holes_v_without_values():
+    rmapx = np.empty((5, 6), dtype='float32')
+    rmapx.fill(np.nan)
+    rmapy = rmapx.copy()
+    fill_holes_v(rmapx, rmapy)
+    assert np.all(np.isnan(rmapx))
+    assert np.all(np.isnan(rmapy))
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
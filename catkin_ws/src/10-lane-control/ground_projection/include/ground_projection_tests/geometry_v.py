@@ -0,0 +1,96 @@
+from duckietown_msgs.msg import Pixel, Segment, SegmentList, Vector2D
+import duckietown_utils as dtu
+from geometry_msgs.msg import Point
+from ground_projection import get_ground_projection_geometry_for_robot
+from ground_projection.segment import rectify_segment, rectify_segments, vectors_from_segments
+import numpy as np
+
+
+def get_test_gpg():
+    robot_name = dtu.DuckietownConstants.ROBOT_NAME_FOR_TESTS
+    return get_ground_projection_geometry_for_robot(robot_name)
+
+
+def random_vectors(n=50):
+    np.random.seed(42)
+    return np.random.uniform(0, 1, size=(n, 2))
+
+
+@dtu.unit_test
+def vector_pixel_v():
+    gpg = get_test_gpg()
+    vectors = random_vectors()
+
+    pixels = gpg.vector2pixel_v(vectors)
+    for vector, pixel in zip(vectors, pixels):
+        p = gpg.vector2pixel(Vector2D(*vector))
+        np.testing.assert_allclose([p.u, p.v], pixel)
+
+    res = gpg.pixel2vector_v(pixels)
+    for pixel, vector in zip(pixels, res):
+        v = gpg.pixel2vector(Pixel(*pixel))
+        np.testing.assert_allclose([v.x, v.y], vector)
+    np.testing.assert_allclose(res, vectors)
+
+
+@dtu.unit_test
+def pixel_ground_v():
+    gpg = get_test_gpg()
+    vectors = random_vectors()
+    pixels = gpg.vector2pixel_v(vectors)
+
+    points = gpg.pixel2ground_v(pixels)
+    for pixel, point in zip(pixels, points):
+        p = gpg.pixel2ground(Pixel(*pixel))
+        np.testing.assert_allclose([p.x, p.y, p.z], point)
+
+    res = gpg.ground2pixel_v(points)
+    for point, pixel in zip(points, res):
+        p = gpg.ground2pixel(Point(*point))
+        np.testing.assert_allclose([p.u, p.v], pixel)
+    np.testing.assert_allclose(res, pixels)
+
+    points = gpg.vector2ground_v(vectors)
+    for vector, point in zip(vectors, points):
+        p = gpg.vector2ground(Vector2D(*vector))
+        np.testing.assert_allclose([p.x, p.y, p.z], point)
+
+
+@dtu.unit_test
+def rectify_point_v():
+    gpg = get_test_gpg()
+    pixels = gpg.vector2pixel_v(random_vectors())
+
+    res = gpg.rectify_point_v(pixels)
+    for pixel, rectified in zip(pixels, res):
+        r = gpg.rectify_point(tuple(pixel))
+        np.testing.assert_allclose(r, rectified, atol=1e-6)
+
+    assert gpg.rectify_point_v(np.zeros((0, 2))).shape == (0, 2)
+
+
+@dtu.unit_test
+def segments_v():
+    gpg = get_test_gpg()
+    vectors = random_vectors()
+    segments = []
+    for k in range(len(vectors) // 2):
+        pixels_normalized = [Vector2D(*vectors[2 * k]), Vector2D(*vectors[2 * k + 1])]
+        segments.append(Segment(color=k % 3, pixels_normalized=pixels_normalized))
+
+    np.testing.assert_array_equal(vectors_from_segments(segments), vectors)
+    assert vectors_from_segments([]).shape == (0, 2)
+
+    res = rectify_segments(gpg, SegmentList(segments=segments))
+    assert len(res.segments) == len(segments)
+    for s1, s2 in zip(segments, res.segments):
+        expected = rectify_segment(gpg, s1)
+        assert s2.color == s1.color
+        for i in (0, 1):
+            a = expected.pixels_normalized[i]
+            b = s2.pixels_normalized[i]
+            np.testing.assert_allclose([a.x, a.y], [b.x, b.y], atol=1e-8)
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
@@ -4,7 +4,7 @@ from catkin_pkg.python_setup import generate_distutils_setup
 
 # fetch values from package.xml
 setup_args = generate_distutils_setup(
-    packages=['ground_projection'],
+    packages=['ground_projection', 'ground_projection_tests'],
     package_dir={'': 'include'},
 )
 setup(**setup_args)
@@ -3,8 +3,10 @@
 from cv_bridge import CvBridge, CvBridgeError
 from duckietown_msgs.msg import (Segment, SegmentList)
 import duckietown_utils as dtu
+from geometry_msgs.msg import Point
 from ground_projection.ground_projection_interface import GroundProjection, \
     get_ground_projection_geometry_for_robot
+from ground_projection.segment import vectors_from_segments
 from ground_projection.srv import EstimateHomography, EstimateHomographyResponse, GetGroundCoord, GetGroundCoordResponse, GetImageCoord, GetImageCoordResponse  #@UnresolvedImport
 import rospy
 from sensor_msgs.msg import (Image, CameraInfo)
@@ -62,10 +64,13 @@ class GroundProjectionNode(object):
     def lineseglist_cb(self, seglist_msg):
         seglist_out = SegmentList()
         seglist_out.header = seglist_msg.header
-        for received_segment in seglist_msg.segments:
+        # project all the points with one matrix operation
+        vectors = vectors_from_segments(seglist_msg.segments)
+        ground = self.gpg.vector2ground_v(vectors)
+        for k, received_segment in enumerate(seglist_msg.segments):
             new_segment = Segment()
-            new_segment.points[0] = self.gpg.vector2ground(received_segment.pixels_normalized[0])
-            new_segment.points[1] = self.gpg.vector2ground(received_segment.pixels_normalized[1])
+            new_segment.points[0] = Point(*ground[2 * k, :])
+            new_segment.points[1] = Point(*ground[2 * k + 1, :])
             new_segment.color = received_segment.color
             # TODO what about normal and points
             seglist_out.segments.append(new_segment)
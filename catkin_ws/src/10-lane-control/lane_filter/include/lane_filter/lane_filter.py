@@ -20,8 +20,19 @@ __all__ = [
 class LaneFilterHistogram(dtu.Configurable, LaneFilterInterface):
     '''
         The one developed in Fall 2017 by the Controllers
+
+        The parameter ``predict_mode`` selects the implementation of the
+        prediction step:
+
+        - ``loop``: the original cell-by-cell Python loop;
+        - ``vectorized``: the same process model applied to the whole
+          array at once (numerically equivalent, much faster).
     '''
 
+    PREDICT_MODE_LOOP = 'loop'
+    PREDICT_MODE_VECTORIZED = 'vectorized'
+    PREDICT_MODES = [PREDICT_MODE_LOOP, PREDICT_MODE_VECTORIZED]
+
     def __init__(self, configuration):
         param_names = [
             'mean_d_0',
@@ -41,9 +52,15 @@ class LaneFilterHistogram(dtu.Configurable, LaneFilterInterface):
             'min_max',
             'sigma_d_mask',
             'sigma_phi_mask',
+            'predict_mode',
         ]
         dtu.Configurable.__init__(self, param_names, configuration)
 
+        if self.predict_mode not in LaneFilterHistogram.PREDICT_MODES:
+            msg = ('Invalid predict_mode %r; expected one of %s.' %
+                   (self.predict_mode, LaneFilterHistogram.PREDICT_MODES))
+            raise ValueError(msg)
+
         self.d, self.phi = np.mgrid[self.d_min:self.d_max:self.delta_d,
                                    self.phi_min:self.phi_max:self.delta_phi]
         # these are the bounds you would give to pcolor
@@ -113,6 +130,12 @@ class LaneFilterHistogram(dtu.Configurable, LaneFilterInterface):
         return LaneFilterInterface.GOOD
 
     def predict(self, dt, v, w):
+        if self.predict_mode == LaneFilterHistogram.PREDICT_MODE_VECTORIZED:
+            self.predict_vectorized(dt, v, w)
+        else:
+            self.predict_loop(dt, v, w)
+
+    def predict_loop(self, dt, v, w):
         delta_t = dt
         d_t = self.d + v * delta_t * np.sin(self.phi)
         phi_t = self.phi + w * delta_t
@@ -137,6 +160,52 @@ class LaneFilterHistogram(dtu.Configurable, LaneFilterInterface):
                 return
             self.beliefArray[k] = s_belief / np.sum(s_belief)
 
+    def predict_vectorized(self, dt, v, w):
+        """
+            Same process model as predict_loop(), but the cells are moved
+            all at once: the destination of every cell is computed as an
+            array, and the mass is accumulated with np.bincount.
+        """
+        shape = self.d.shape
+        source, destination = self._get_prediction_shift(dt, v, w)
+
+        for k in range(self.num_belief):
+            belief = self.beliefArray[k].ravel()
+            # only cells with positive mass are moved (as in the loop)
+            weights = belief[source]
+            weights = np.where(weights > 0, weights, 0)
+            p_belief = np.bincount(destination, weights=weights,
+                                   minlength=belief.size)
+            p_belief = p_belief.reshape(shape)
+
+            s_belief = np.zeros(shape)
+            gaussian_filter(p_belief, self.cov_mask, output=s_belief, mode='constant')
+
+            if np.sum(s_belief) == 0:
+                return
+            self.beliefArray[k] = s_belief / np.sum(s_belief)
+
+    def _get_prediction_shift(self, dt, v, w):
+        """
+            Returns the flat indices of the cells that stay in the histogram
+            and the flat indices of the cells they are moved to.
+        """
+        d_t = self.d + v * dt * np.sin(self.phi)
+        phi_t = self.phi + w * dt
+
+        inside = ((d_t <= self.d_max) & (d_t >= self.d_min) &
+                  (phi_t >= self.phi_min) & (phi_t <= self.phi_max))
+
+        i_new = np.floor((d_t - self.d_min) / self.delta_d).astype('int')
+        j_new = np.floor((phi_t - self.phi_min) / self.delta_phi).astype('int')
+
+        source = np.flatnonzero(inside)
+        # values exactly on d_max/phi_max fall in the last cell
+        destination = np.ravel_multi_index((i_new.ravel()[source],
+                                            j_new.ravel()[source]),
+                                           self.d.shape, mode='clip')
+        return source, destination
+
     def update(self, segments):
         range_arr = self.range_arr
         for i in range(self.num_belief):
@@ -203,6 +272,14 @@ class LaneFilterHistogram(dtu.Configurable, LaneFilterInterface):
         res['phi'] = phi_median
         return res
 
+    def get_belief(self):
+        """
+            Returns an array with shape (num_belief, H, W): one belief
+            for each range of distances. The estimate is the median of
+            the maxima of the beliefs 1..num_belief-1.
+        """
+        return np.array(self.beliefArray)
+
     def getEstimate(self):
         """ Returns a list with two elements: (d, phi) """
         res = self.get_estimate()
@@ -178,6 +178,9 @@ class LaneFilterClassic(dtu.Configurable, LaneFilterInterface):
         res['phi'] = phi_max
         return res
 
+    def get_belief(self):
+        return self.belief
+
     def getEstimate(self):
         """ Returns a list with two elements: (d, phi) """
         res = self.get_estimate()
@@ -43,3 +43,13 @@ class LaneFilterInterface(object):
     def get_estimate(self):
         """ Returns a numpy array of datatype ESTIMATE_DATATYPE """
 
+    @abstractmethod
+    def get_belief(self):
+        """
+            Returns the current belief, as a numpy array, from which
+            get_estimate() is computed. Its shape depends on the filter.
+
+            The array may be modified by the next update(): make a copy
+            to keep it.
+        """
+
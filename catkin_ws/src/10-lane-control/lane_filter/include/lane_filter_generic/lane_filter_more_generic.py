@@ -44,6 +44,7 @@ class LaneFilterMoreGeneric(dtu.Configurable, LaneFilterInterface):
 
         self.grid_helper = GridHelper(OrderedDict(self.variables), precision=self.precision)
 
+        self._localization_template = None
         self.initialize_belief()
         self.last_segments_used = None
         
@@ -59,14 +60,17 @@ class LaneFilterMoreGeneric(dtu.Configurable, LaneFilterInterface):
         assert_almost_equal(self.belief.flatten().sum(), 1.0)
         
     def initialize(self):
-        easy_algo_db = get_easy_algo_db()
-        self._localization_template = \
-            easy_algo_db.create_instance(FAMILY_LOC_TEMPLATES, 
-                                         self.localization_template)
+        # The template and its representation only depend on the 
+        # configuration, so they are computed only the first time.
+        if self._localization_template is None:
+            easy_algo_db = get_easy_algo_db()
+            self._localization_template = \
+                easy_algo_db.get_pooled_instance(FAMILY_LOC_TEMPLATES, 
+                                                 self.localization_template)
+            sm = self._localization_template.get_map()
+            self.rep_map = get_compat_representation_map(sm, self.delta_segment)
+            
         self.initialize_belief()
-        
-        sm = self._localization_template.get_map()
-        self.rep_map = get_compat_representation_map(sm, self.delta_segment)
                 
     def predict(self, dt, v, w):
         pass
@@ -100,28 +104,20 @@ class LaneFilterMoreGeneric(dtu.Configurable, LaneFilterInterface):
 
     def generate_measurement_likelihood_faster(self, segments):
         with dtu.timeit_clock("get_compat_representation_obs (%d segments)" % len(segments) ):
-            rep_obs = get_compat_representation_obs(segments)
+            rep_obs = get_compat_representation_obs_batch(segments)
             rep_map = self.rep_map
 
             
-        with dtu.timeit_clock("generate_votes_faster (map: %d, obs: %d)" % (len(rep_map.weight),
-                                                                            len(rep_obs.weight)) ):
-            votes = generate_votes_faster(rep_map, rep_obs)
+        with dtu.timeit_clock("generate_votes_batch (map: %d, obs: %d)" % (len(rep_map.weight),
+                                                                           len(rep_obs.weight)) ):
+            votes = generate_votes_batch(rep_map, rep_obs)
             
             if self.bounds_theta_deg is not None:
-                weight = votes.weight.copy()
                 theta_min = np.deg2rad(self.bounds_theta_deg[0])
                 theta_max = np.deg2rad(self.bounds_theta_deg[1])
-                num_outside = 0
-                for i in range(weight.shape[0]):
-                    
-                    theta = votes.theta[i]
-                    
-                    if not (theta_min<=theta<=theta_max):
-                        weight[i] = 0
-                        num_outside += 1
-                    
-                # print('Removed %d of %d because outside box' % (num_outside, len(weight)))
+                inside = np.logical_and(theta_min <= votes.theta, votes.theta <= theta_max)
+                weight = np.where(inside, votes.weight, 0).astype(votes.weight.dtype)
+                # print('Removed %d of %d because outside box' % (np.sum(~inside), len(weight)))
                 votes = remove_zero_weight(votes._replace(weight=weight))
             
     
@@ -250,6 +246,9 @@ class LaneFilterMoreGeneric(dtu.Configurable, LaneFilterInterface):
         # TODO: make F parameter
         return self.grid_helper.get_max_weighted(self.belief, F=1)
 
+    def get_belief(self):
+        return self.belief
+
     @dtu.deprecated("use get_estimate")
     def getEstimate(self):
         """ Returns a list with two elements: (d, phi) """
@@ -475,6 +474,50 @@ def get_compat_representation_obs(segments, precision='float32'):
      
 
     
+    C.flags.writeable = False
+    T.flags.writeable = False
+    N.flags.writeable = False
+    W.flags.writeable = False
+        
+    return PNRep(t=T, color=C, n=N, weight=W)
+
+def get_compat_representation_obs_batch(segments, precision='float32'):
+    """
+        Same as get_compat_representation_obs(), but only the reading
+        of the coordinates from the messages is done in Python;
+        the geometry is computed on whole arrays.
+    """
+    num = len(segments)
+    C = np.fromiter((segment.color for segment in segments), 
+                    dtype='uint8', count=num)
+    
+    def coordinates():
+        for segment in segments:
+            points = segment.points
+            yield points[0].x
+            yield points[0].y
+            yield points[1].x
+            yield points[1].y
+    
+    P = np.fromiter(coordinates(), dtype='float64', count=4 * num)
+    P = P.reshape((num, 2, 2)) # segment, point, coordinate
+    p1 = P[:, 0, :]
+    p2 = P[:, 1, :]
+    
+    p_hat = p1 * 0.5 + p2 * 0.5
+    diff = p1 - p2
+    distance = np.hypot(diff[:, 0], diff[:, 1])
+
+    T = np.empty(shape=(2, num), dtype=precision) # position
+    N = np.empty(shape=(2, num), dtype=precision) # normal
+    W = np.empty(shape=num, dtype=precision) # weight
+    
+    T[0, :] = p_hat[:, 0]
+    T[1, :] = p_hat[:, 1]
+    N[0, :] = +diff[:, 1] / distance
+    N[1, :] = -diff[:, 0] / distance
+    W[:] = distance
+    
     C.flags.writeable = False
     T.flags.writeable = False
     N.flags.writeable = False
@@ -521,7 +564,7 @@ def generate_votes_faster(rep_map, rep_obs, precision='float32'):
                 xy0 = t0 - C*t_est0 - S*t_est1
                 xy1 = t1 + S*t_est0 - C*t_est1
                 
-                C = min(C, 1) # compensate imprecision or acos(C) fails
+                C = max(min(C, 1), -1) # compensate imprecision or acos(C) fails
 
                 theta = -math.acos(C) * np.sign(S)
                 
@@ -535,6 +578,45 @@ def generate_votes_faster(rep_map, rep_obs, precision='float32'):
     res =  PNVotes(p=vote_p, theta=vote_theta, weight=vote_weight)
     return remove_zero_weight(res)
 
+def generate_votes_batch(rep_map, rep_obs, precision='float32'):
+    """
+        Array version of generate_votes_faster(). 
+        
+        All pairs (map section, observation) with the same color are 
+        found at once, and the votes for all of them are computed 
+        with array operations. The votes are returned in the same order.
+    """
+    same_color = rep_map.color[:, np.newaxis] == rep_obs.color[np.newaxis, :]
+    # indices of the compatible pairs, in the same order as the double loop
+    i, j = np.nonzero(same_color)
+    
+    t0 = rep_map.t[0, i]
+    t1 = rep_map.t[1, i]
+    n0 = rep_map.n[0, i]
+    n1 = rep_map.n[1, i]
+    t_est0 = rep_obs.t[0, j]
+    t_est1 = rep_obs.t[1, j]
+    n_est0 = rep_obs.n[0, j]
+    n_est1 = rep_obs.n[1, j]
+    
+    C = n0 * n_est0 + n1 * n_est1
+    S = n0 * n_est1 - n1 * n_est0
+
+    num = len(i)
+    vote_p = np.empty(dtype=precision, shape=(2, num))
+    vote_theta = np.empty(dtype=precision, shape=num)
+    vote_weight = np.empty(dtype=precision, shape=num)
+
+    vote_p[0, :] = t0 - C*t_est0 - S*t_est1
+    vote_p[1, :] = t1 + S*t_est0 - C*t_est1
+    
+    C = np.clip(C.astype('float64'), -1, 1) # compensate imprecision or arccos(C) fails
+    vote_theta[:] = -np.arccos(C) * np.sign(S)
+    vote_weight[:] = rep_map.weight[i] * rep_obs.weight[j]
+    
+    res = PNVotes(p=vote_p, theta=vote_theta, weight=vote_weight)
+    return remove_zero_weight(res)
+
 def remove_zero_weight(pnvotes):
     nonzeros = pnvotes.weight > 0
 
@@ -2,7 +2,7 @@ import numpy as np
 import duckietown_utils as dtu
 from numpy.testing.utils import assert_almost_equal
 from lane_filter_generic.lane_filter_more_generic import get_estimate,\
-    get_estimate_2
+    get_estimate_2, PNRep, generate_votes_faster, generate_votes_batch
 
 @dtu.unit_test
 def test_faster_math():
@@ -23,6 +23,26 @@ def test_faster_math():
         assert_almost_equal(theta1, theta2)
 
 
+def random_pnrep(num, ncolors=3):
+    C = np.random.randint(ncolors, size=num).astype('uint8')
+    T = np.random.randn(2, num).astype('float32')
+    alpha = np.random.uniform(-np.pi, np.pi, size=num)
+    N = np.array([np.cos(alpha), np.sin(alpha)]).astype('float32')
+    W = np.random.rand(num).astype('float32')
+    return PNRep(t=T, n=N, color=C, weight=W)
+
+@dtu.unit_test
+def test_generate_votes_batch():
+    rep_map = random_pnrep(100)
+    rep_obs = random_pnrep(50)
+    
+    votes1 = generate_votes_faster(rep_map, rep_obs)
+    votes2 = generate_votes_batch(rep_map, rep_obs)
+    
+    assert_almost_equal(votes1.p, votes2.p, decimal=5)
+    assert_almost_equal(votes1.theta, votes2.theta, decimal=5)
+    assert_almost_equal(votes1.weight, votes2.weight)
+
 
 if __name__ == '__main__':
     dtu.run_tests_for_this_module()
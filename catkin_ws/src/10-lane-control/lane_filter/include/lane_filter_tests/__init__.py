@@ -0,0 +1 @@
+from .predict import *
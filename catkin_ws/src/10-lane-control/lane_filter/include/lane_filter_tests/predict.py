@@ -0,0 +1,45 @@
+from numpy.testing.utils import assert_allclose
+
+import duckietown_utils as dtu
+from easy_algo import get_easy_algo_db
+from lane_filter import FAMILY_LANE_FILTER, LaneFilterHistogram
+import numpy as np
+
+
+def get_lane_filters(predict_mode1, predict_mode2):
+    db = get_easy_algo_db()
+    instance = db.get_family(FAMILY_LANE_FILTER).instances['controllers17']
+    configuration = dict(instance.parameters['configuration'])
+    configuration['predict_mode'] = predict_mode1
+    f1 = LaneFilterHistogram(configuration)
+    configuration['predict_mode'] = predict_mode2
+    f2 = LaneFilterHistogram(configuration)
+    return f1, f2
+
+
+@dtu.unit_test
+def test_predict_vectorized():
+    f1, f2 = get_lane_filters(LaneFilterHistogram.PREDICT_MODE_LOOP,
+                              LaneFilterHistogram.PREDICT_MODE_VECTORIZED)
+
+    np.random.seed(0)
+    for k in range(f1.num_belief):
+        b = np.random.rand(*f1.d.shape)
+        b[b < 0.3] = 0
+        b = b / np.sum(b)
+        f1.beliefArray[k] = b.copy()
+        f2.beliefArray[k] = b.copy()
+
+    for _ in range(10):
+        dt = np.random.uniform(0, 0.2)
+        v = np.random.uniform(0, 0.5)
+        w = np.random.uniform(-3, 3)
+        f1.predict(dt, v, w)
+        f2.predict(dt, v, w)
+
+        for k in range(f1.num_belief):
+            assert_allclose(f1.beliefArray[k], f2.beliefArray[k], rtol=1e-10, atol=1e-14)
+
+
+if __name__ == '__main__':
+    dtu.run_tests_for_this_module()
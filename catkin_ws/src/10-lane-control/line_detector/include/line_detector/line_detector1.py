@@ -76,10 +76,8 @@ class LineDetectorHSV(dtu.Configurable, LineDetectorInterface):
 
     def _correctPixelOrdering(self, lines, normals):
         flag = ((lines[:, 2] - lines[:, 0]) * normals[:, 1] - (lines[:, 3] - lines[:, 1]) * normals[:, 0]) > 0
-        for i in range(len(lines)):
-            if flag[i]:
-                x1, y1, x2, y2 = lines[i, :]
-                lines[i, :] = [x2, y2, x1, y1]
+        # swap the endpoints (x1, y1) <-> (x2, y2) of the flagged lines, in place
+        lines[flag] = lines[flag][:, [2, 3, 0, 1]]
 
     def _findNormal(self, bw, lines):
         normals = []
@@ -90,16 +88,16 @@ class LineDetectorHSV(dtu.Configurable, LineDetectorInterface):
             dy = 1.* (lines[:, 0:1] - lines[:, 2:3]) / length
 
             centers = np.hstack([(lines[:, 0:1] + lines[:, 2:3]) / 2, (lines[:, 1:2] + lines[:, 3:4]) / 2])
-            x3 = (centers[:, 0:1] - 3.*dx).astype('int')
-            y3 = (centers[:, 1:2] - 3.*dy).astype('int')
-            x4 = (centers[:, 0:1] + 3.*dx).astype('int')
-            y4 = (centers[:, 1:2] + 3.*dy).astype('int')
-            x3 = self._checkBounds(x3, bw.shape[1])
-            y3 = self._checkBounds(y3, bw.shape[0])
-            x4 = self._checkBounds(x4, bw.shape[1])
-            y4 = self._checkBounds(y4, bw.shape[0])
-            flag_signs = (np.logical_and(bw[y3, x3] > 0, bw[y4, x4] == 0)).astype('int') * 2 - 1
-            normals = np.hstack([dx, dy]) * flag_signs
+            # the two points at distance 3 on either side of the center,
+            # as columns x3, y3, x4, y4, clipped to the image
+            delta = 3. * np.hstack([-dx, -dy, dx, dy])
+            samples = (np.hstack([centers, centers]) + delta).astype('int')
+            H, W = bw.shape[:2]
+            samples = np.clip(samples, 0, np.array([W, H, W, H]) - 1)
+            inside3 = bw[samples[:, 1], samples[:, 0]] > 0
+            outside4 = bw[samples[:, 3], samples[:, 2]] == 0
+            flag_signs = np.logical_and(inside3, outside4).astype('int') * 2 - 1
+            normals = np.hstack([dx, dy]) * flag_signs[:, np.newaxis]
 
             """ # Old code with lists and loop, performs 4x slower
             for cnt,line in enumerate(lines):
@@ -18,7 +18,10 @@ class LineDetectorNode2(EasyNode):
 
         self.detector = None
         self.bridge = CvBridge()
-        self.ai = AntiInstagram()
+        # the lookup table avoids creating a float image for every frame
+        self.ai = AntiInstagram(use_lut=True)
+        # the decoded image is only used until the color correction
+        self.decoder = dtu.JPGDecoder(reuse_buffers=True)
         self.active = True
 
         # Only be verbose every 10 cycles
@@ -43,20 +46,28 @@ class LineDetectorNode2(EasyNode):
 
         self.info("AntiInstagram transform received")
 
-    def on_received_image(self, context, image_msg):
+    def decode_image(self, image_msg):
+        """ Called concurrently by the workers, before on_received_image(). """
         if not self.active:
+            return None
+
+        # Decode from compressed image, possibly at reduced size
+        if self.config.decode_reduced:
+            min_shape = tuple(self.config.img_size)
+        else:
+            min_shape = None
+        try:
+            return self.decoder.decode(image_msg.data, min_shape)
+        except ValueError as e:
+            self.info('Could not decode image: %s' % e)
+            return None
+
+    def on_received_image(self, context, image_msg, image_cv):
+        if not self.active or image_cv is None:
             return
 
         self.intermittent_counter += 1
 
-        with context.phase('decoding'):
-            # Decode from compressed image with OpenCV
-            try:
-                image_cv = dtu.bgr_from_jpg(image_msg.data)
-            except ValueError as e:
-                self.loginfo('Could not decode image: %s' % e)
-                return
-
         with context.phase('resizing'):
             # Resize and crop image
             hei_original, wid_original = image_cv.shape[0:2]
@@ -1,3 +1,4 @@
 
 from . import single_image
 from . import single_image_histogram
+from . import normals
@@ -0,0 +1,59 @@
+from easy_algo import get_easy_algo_db
+import duckietown_utils as dtu
+from line_detector.line_detector_interface import FAMILY_LINE_DETECTOR
+import numpy as np
+
+
+@dtu.unit_test
+def find_normal_same_as_loop():
+    db = get_easy_algo_db()
+    line_detector = db.create_instance(FAMILY_LINE_DETECTOR, 'baseline')
+
+    np.random.seed(0)
+    H, W = 60, 80
+    bw = ((np.random.rand(H, W) > 0.5) * 255).astype('uint8')
+    n = 500
+    lines = np.hstack([np.random.randint(0, W, (n, 1)),
+                       np.random.randint(0, H, (n, 1)),
+                       np.random.randint(0, W, (n, 1)),
+                       np.random.randint(0, H, (n, 1))]).astype('int32')
+    # no degenerate segments
+    lines = lines[np.any(lines[:, 0:2] != lines[:, 2:4], axis=1)]
+
+    lines1 = lines.copy()
+    centers1, normals1 = line_detector._findNormal(bw, lines1)
+    lines2 = lines.copy()
+    normals2 = find_normal_loop(bw, lines2)
+
+    np.testing.assert_array_equal(lines1, lines2)
+    np.testing.assert_allclose(normals1, normals2)
+    assert centers1.shape == (len(lines), 2)
+
+
+def find_normal_loop(bw, lines):
+    """ Reference implementation, one line at a time. Modifies lines. """
+    H, W = bw.shape
+
+    def check_bounds(val, bound):
+        return min(max(val, 0), bound - 1)
+
+    normals = np.zeros((len(lines), 2))
+    for i in range(len(lines)):
+        x1, y1, x2, y2 = lines[i, :]
+        length = ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+        dx = 1. * (y2 - y1) / length
+        dy = 1. * (x1 - x2) / length
+        cx = (x1 + x2) / 2
+        cy = (y1 + y2) / 2
+        x3 = check_bounds(int(cx - 3. * dx), W)
+        y3 = check_bounds(int(cy - 3. * dy), H)
+        x4 = check_bounds(int(cx + 3. * dx), W)
+        y4 = check_bounds(int(cy + 3. * dy), H)
+        if bw[y3, x3] > 0 and bw[y4, x4] == 0:
+            normals[i, :] = [dx, dy]
+        else:
+            normals[i, :] = [-dx, -dy]
+
+        if (x2 - x1) * normals[i, 1] - (y2 - y1) * normals[i, 0] > 0:
+            lines[i, :] = [x2, y2, x1, y1]
+    return normals